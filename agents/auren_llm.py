@@ -1,6 +1,27 @@
+from __future__ import annotations
+
+import json
 import os
-from typing import List, Dict, Union
-from groq import Groq, RateLimitError  # 👈 importamos también RateLimitError
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, Dict, Pattern, Tuple, Union
+
+from auren_resilience import (
+    HEDGE_GROQ,
+    DeadlineExceeded,
+    circuit,
+    flight_key,
+    hedged_call,
+    singleflight,
+    stage_timeout,
+)
+
+# groq se importa al crear el cliente: importar un agente no debe costar nada
+if TYPE_CHECKING:
+    from groq import Groq
 
 # =========================
 #  CONFIGURACIÓN DEL MODELO
@@ -9,9 +30,212 @@ from groq import Groq, RateLimitError  # 👈 importamos también RateLimitError
 # Modelo por defecto de Groq (puedes cambiarlo por otro vía variable de entorno)
 DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 
+# Tiers de modelo: los agentes casi-clasificadores no necesitan la latencia de 70B
+MODEL_TIERS: Dict[str, str] = {
+    "small": os.getenv("GROQ_MODEL_SMALL", "llama-3.1-8b-instant"),
+    "large": DEFAULT_MODEL,
+}
+
+# Tabla de routing agente → tier. Por defecto manda el model_tier del registro
+# (agents/registry.py); esto permite sobreescribirlo sin tocar código:
+#   AUREN_AGENT_TIERS='{"hashtag_engine": "large"}'
+def _load_agent_tiers() -> Dict[str, str]:
+    raw = os.getenv("AUREN_AGENT_TIERS", "") or "{}"
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError as e:
+        print(f"⚠️ AUREN_AGENT_TIERS no es JSON válido ({e}). Se ignora.")
+        return {}
+    if not isinstance(data, dict):
+        print("⚠️ AUREN_AGENT_TIERS debe ser un objeto {agente: tier}. Se ignora.")
+        return {}
+    return data
+
+
+AGENT_TIERS: Dict[str, str] = _load_agent_tiers()
+
+# Si la salida del modelo pequeño no pasa la validación → se repite con "large"
+ESCALATE_ON_INVALID = os.getenv("AUREN_LLM_ESCALATE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# Modo estructurado: los agentes con esquema (agents/schemas.py) piden JSON a Groq,
+# se valida campo a campo y solo se reparan los campos inválidos.
+STRUCTURED_OUTPUTS = os.getenv("AUREN_STRUCTURED_OUTPUTS", "1").strip().lower() not in ("0", "false", "no", "off")
+SCHEMA_REPAIRS = int(os.getenv("AUREN_SCHEMA_REPAIRS", "1"))
+
+_JSON_FORMAT = {"type": "json_object"}
+
+# Coste aproximado en USD por millón de tokens (entrada, salida), tarifas públicas de Groq.
+# Modelos desconocidos → 0 (la métrica de coste queda como estimación).
+MODEL_COST_PER_MTOK: Dict[str, Tuple[float, float]] = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+
 # Cliente global reutilizable
 _client: Groq | None = None
 
+# Agente que está llamando ahora mismo al LLM (lo fija agents/registry.call_agent)
+# → {"agent": str, "max_tokens": int | None, "model_tier": str | None}
+_current_agent: ContextVar[Dict[str, Any] | None] = ContextVar("auren_current_agent", default=None)
+
+
+@contextmanager
+def agent_scope(
+    agent: str,
+    max_tokens: int | None = None,
+    model_tier: str | None = None,
+    validate: Callable[[str], bool] | None = None,
+    schema: Dict[str, Any] | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Marca las llamadas al LLM hechas dentro del bloque como del agente `agent`,
+    con la metadata declarada en el registro (max_tokens, tier, validador, esquema).
+
+    Devuelve el dict del scope: en modo estructurado, el LLM layer deja ahí
+    el objeto ya parseado y validado en scope["parsed"].
+    """
+    scope: Dict[str, Any] = {
+        "agent": agent,
+        "max_tokens": max_tokens,
+        "model_tier": model_tier,
+        "validate": validate,
+        "schema": schema,
+        "parsed": None,
+    }
+    token = _current_agent.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_agent.reset(token)
+
+
+def current_agent() -> Dict[str, Any] | None:
+    return _current_agent.get()
+
+
+# =========================
+#  ROUTING POR TIER
+# =========================
+
+def route_model(model: str | None = None) -> Tuple[str, str]:
+    """
+    Devuelve (tier, modelo) para la llamada actual:
+      1) `model` explícito → se respeta tal cual
+      2) AUREN_AGENT_TIERS[agente]
+      3) model_tier declarado en el registro (agent_scope)
+      4) "large"
+    """
+    if model:
+        tier = next((t for t, m in MODEL_TIERS.items() if m == model), "custom")
+        return tier, model
+
+    scope = current_agent() or {}
+    tier = AGENT_TIERS.get(scope.get("agent") or "") or scope.get("model_tier") or "large"
+    if tier not in MODEL_TIERS:
+        print(f"⚠️ Tier de modelo desconocido '{tier}'. Usamos 'large'.")
+        tier = "large"
+    return tier, MODEL_TIERS[tier]
+
+
+def is_valid_output(text: str, validate: Callable[[str], bool] | None = None) -> bool:
+    """Salida usable: no vacía, no es un error controlado y pasa el validador del agente."""
+    if not text or not text.strip():
+        return False
+    if text.lstrip().startswith(("ERROR_RATE_LIMIT:", "ERROR_LLM:")):
+        return False
+    if validate is not None:
+        try:
+            return bool(validate(text))
+        except Exception:
+            return False
+    return True
+
+
+# =========================
+#  MÉTRICAS POR TIER
+# =========================
+
+_metrics: Dict[str, Dict[str, float]] = {}
+_metrics_lock = threading.Lock()
+
+
+def _tier_metrics(tier: str) -> Dict[str, float]:
+    """Contadores del tier (crearlos si hace falta). Llamar con _metrics_lock cogido."""
+    return _metrics.setdefault(
+        tier,
+        {
+            "calls": 0, "errors": 0, "escalations": 0, "latency_s": 0.0,
+            "max_latency_s": 0.0, "prompt_tokens": 0, "completion_tokens": 0,
+            "cost_usd": 0.0,
+        },
+    )
+
+
+def _record(
+    tier: str,
+    model: str,
+    latency_s: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    error: bool = False,
+) -> None:
+    cost_in, cost_out = MODEL_COST_PER_MTOK.get(model, (0.0, 0.0))
+    cost = (prompt_tokens * cost_in + completion_tokens * cost_out) / 1_000_000
+    with _metrics_lock:
+        m = _tier_metrics(tier)
+        m["calls"] += 1
+        m["errors"] += int(error)
+        m["latency_s"] += latency_s
+        m["max_latency_s"] = max(m["max_latency_s"], latency_s)
+        m["prompt_tokens"] += prompt_tokens
+        m["completion_tokens"] += completion_tokens
+        m["cost_usd"] += cost
+
+
+def _record_escalation(tier: str) -> None:
+    with _metrics_lock:
+        _tier_metrics(tier)["escalations"] += 1
+
+
+def llm_metrics() -> Dict[str, Dict[str, float]]:
+    """
+    Copia de las métricas acumuladas por tier:
+    {"small": {"calls", "errors", "escalations", "avg_latency_s", "max_latency_s",
+               "prompt_tokens", "completion_tokens", "cost_usd"}, ...}
+    `escalations` cuenta las salidas de ese tier que hubo que repetir con "large".
+    """
+    with _metrics_lock:
+        snapshot = {tier: dict(m) for tier, m in _metrics.items()}
+    for m in snapshot.values():
+        m["avg_latency_s"] = round(m["latency_s"] / m["calls"], 3) if m["calls"] else 0.0
+        m["latency_s"] = round(m["latency_s"], 3)
+        m["max_latency_s"] = round(m["max_latency_s"], 3)
+        m["cost_usd"] = round(m["cost_usd"], 6)
+    return snapshot
+
+
+def reset_llm_metrics() -> None:
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def format_llm_metrics() -> str:
+    """Tabla markdown con las métricas por tier (para logs / outputs)."""
+    metrics = llm_metrics()
+    if not metrics:
+        return "_Sin llamadas al LLM._"
+    lines = [
+        "| Tier | Llamadas | Errores | Escaladas | Latencia media (s) | Máx (s) | Tokens in/out | Coste (USD) |",
+        "|------|----------|---------|-----------|--------------------|---------|---------------|-------------|",
+    ]
+    for tier, m in sorted(metrics.items()):
+        lines.append(
+            f"| {tier} | {int(m['calls'])} | {int(m['errors'])} | {int(m['escalations'])} | "
+            f"{m['avg_latency_s']:.2f} | {m['max_latency_s']:.2f} | "
+            f"{int(m['prompt_tokens'])}/{int(m['completion_tokens'])} | {m['cost_usd']:.4f} |"
+        )
+    return "\n".join(lines)
+
 
 def _get_client() -> Groq:
     """
@@ -29,6 +253,8 @@ def _get_client() -> Groq:
             "Falta GROQ_API_KEY en las variables de entorno / GitHub Secrets."
         )
 
+    from groq import Groq
+
     _client = Groq(api_key=api_key)
     return _client
 
@@ -38,31 +264,78 @@ def _chat_with_messages(
     model: str | None = None,
     temperature: float = 0.7,
     max_tokens: int = 2048,
+    tier: str = "large",
+    response_format: Dict[str, Any] | None = None,
 ) -> str:
     """
     Llamada básica a Groq usando una lista de mensajes.
     La usan los agentes internos.
 
+    Peticiones idénticas simultáneas (mismo modelo, mensajes y parámetros)
+    se agrupan en una sola llamada real (singleflight).
+
     👉 Devuelve SIEMPRE un string:
        - Respuesta normal del modelo
        - O un texto de error controlado empezando por:
          - 'ERROR_RATE_LIMIT:'
          - 'ERROR_LLM:'
     """
-    client = _get_client()
     model_name = model or DEFAULT_MODEL
+    key = flight_key("groq", model_name, messages, temperature, max_tokens, response_format)
+    return singleflight(
+        key,
+        lambda: _chat_once(messages, model_name, temperature, max_tokens, tier, response_format),
+    )
+
 
+def _chat_once(
+    messages: List[Dict[str, str]],
+    model_name: str,
+    temperature: float,
+    max_tokens: int,
+    tier: str,
+    response_format: Dict[str, Any] | None,
+) -> str:
+    """Una llamada real a Groq (deadline + hedge + breaker + métricas)."""
+    client = _get_client()
+
+    from groq import RateLimitError  # ya cargado por _get_client()
+
+    t0 = time.perf_counter()
     try:
-        resp = client.chat.completions.create(
-            model=model_name,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
+        extra: Dict[str, Any] = {"response_format": response_format} if response_format else {}
+        timeout = stage_timeout("groq")
+        if timeout is not None:
+            extra["timeout"] = timeout
+
+        # Deadline del run/etapa + circuit breaker por modelo (abierto → ERROR_LLM al momento);
+        # petición de cobertura solo con AUREN_HEDGE_GROQ (duplica tokens)
+        resp = hedged_call(
+            f"groq:{model_name}",
+            lambda: client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra,
+            ),
+            stage="groq",
+            breaker=f"groq:{model_name}",
+            hedge=HEDGE_GROQ,
+        )
+        usage = getattr(resp, "usage", None)
+        _record(
+            tier,
+            model_name,
+            time.perf_counter() - t0,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
         )
         # Groq devuelve el contenido en resp.choices[0].message.content
         return resp.choices[0].message.content.strip()
 
     except RateLimitError as e:
+        _record(tier, model_name, time.perf_counter() - t0, error=True)
         # ⚠️ Límite diario de tokens alcanzado: NO rompemos el pipeline
         print(f"⚠️ Groq RateLimitError en _chat_with_messages: {e}")
         return (
@@ -72,6 +345,7 @@ def _chat_with_messages(
         )
 
     except Exception as e:
+        _record(tier, model_name, time.perf_counter() - t0, error=True)
         # Cualquier otro error de red / API → también devolvemos texto controlado
         print(f"⚠️ Error genérico llamando a Groq en _chat_with_messages: {e}")
         return (
@@ -80,6 +354,163 @@ def _chat_with_messages(
         )
 
 
+def _build_messages(
+    system_prompt: Union[str, List[Dict[str, str]]],
+    user_prompt: str | None = None,
+) -> List[Dict[str, str]]:
+    # Caso 2: ya nos pasan messages (lista de dicts)
+    if isinstance(system_prompt, list):
+        return system_prompt
+
+    # Caso 1: system_prompt (str) + user_prompt (str)
+    messages: List[Dict[str, str]] = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    if user_prompt:
+        messages.append({"role": "user", "content": user_prompt})
+    return messages
+
+
+def _scoped_max_tokens(max_tokens: int) -> int:
+    """Si la llamada viene de un agente del registro, su max_tokens declarado manda."""
+    scope = current_agent()
+    if scope and scope.get("max_tokens"):
+        return scope["max_tokens"]
+    return max_tokens
+
+
+def _routed_completion(
+    messages: List[Dict[str, str]],
+    model: str | None,
+    temperature: float,
+    max_tokens: int,
+    response_format: Dict[str, Any] | None = None,
+    validate: Callable[[str], bool] | None = None,
+) -> str:
+    """Llamada con routing por tier + escalada a "large" si la salida no es válida."""
+    tier, model_name = route_model(model)
+
+    text = _chat_with_messages(
+        messages=messages,
+        model=model_name,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        tier=tier,
+        response_format=response_format,
+    )
+
+    if model is None and tier != "large" and ESCALATE_ON_INVALID:
+        if validate is None:
+            validate = (current_agent() or {}).get("validate")
+        if not is_valid_output(text, validate):
+            agent = (current_agent() or {}).get("agent", "?")
+            print(f"↗️ {agent}: salida de '{tier}' no válida. Escalamos a 'large'.")
+            _record_escalation(tier)
+            text = _chat_with_messages(
+                messages=messages,
+                model=MODEL_TIERS["large"],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                tier="large",
+                response_format=response_format,
+            )
+
+    return text
+
+
+def _with_system_note(messages: List[Dict[str, str]], note: str) -> List[Dict[str, str]]:
+    """Copia de `messages` con `note` añadida al mensaje system (o uno nuevo al principio)."""
+    out = [dict(m) for m in messages]
+    for m in out:
+        if m.get("role") == "system":
+            m["content"] = f"{m['content'].rstrip()}\n\n{note}"
+            return out
+    return [{"role": "system", "content": note}] + out
+
+
+def _structured_completion(
+    messages: List[Dict[str, str]],
+    scope: Dict[str, Any],
+    model: str | None,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """
+    Modo JSON con esquema:
+      1) Groq en json_object con el esquema del agente en el prompt
+      2) validación campo a campo
+      3) reparación mínima: solo los campos inválidos (hasta SCHEMA_REPAIRS veces)
+      4) render al formato de texto de siempre + objeto en scope["parsed"]
+    Si no se consigue un JSON válido, se vuelve a la llamada de texto normal.
+    """
+    from .schemas import extract_json, invalid_fields, render
+
+    agent = scope["agent"]
+    schema = scope["schema"]["schema"]
+    schema_json = json.dumps(schema, ensure_ascii=False)
+
+    json_messages = _with_system_note(
+        messages,
+        "Responde SOLO con un objeto JSON válido que cumpla este esquema "
+        "(ignora cualquier formato de texto indicado antes):\n" + schema_json,
+    )
+    text = _routed_completion(
+        json_messages, model, temperature, max_tokens,
+        response_format=_JSON_FORMAT,
+        validate=lambda t: extract_json(t) is not None,
+    )
+    if text.lstrip().startswith(("ERROR_RATE_LIMIT:", "ERROR_LLM:")):
+        return text
+
+    obj = extract_json(text)
+    bad = invalid_fields(obj, schema) if obj is not None else {}
+
+    repairs = 0
+    while obj is not None and bad and repairs < SCHEMA_REPAIRS:
+        repairs += 1
+        print(f"🔧 {agent}: reparando campos {list(bad)} (sin regenerar el resto).")
+        fields_schema = {
+            "type": "object",
+            "required": list(bad),
+            "properties": {k: schema.get("properties", {}).get(k, {}) for k in bad},
+        }
+        context = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+        repair_messages = [
+            {
+                "role": "system",
+                "content": (
+                    "Corriges campos concretos de un JSON generado por otro agente. "
+                    "Responde SOLO con un objeto JSON que contenga ÚNICAMENTE los campos "
+                    "pedidos, cumpliendo este esquema:\n" + json.dumps(fields_schema, ensure_ascii=False)
+                ),
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Petición original:\n{context[:3000]}\n\n"
+                    f"JSON actual:\n{json.dumps(obj, ensure_ascii=False)[:4000]}\n\n"
+                    "Errores:\n" + "\n".join(f"- {e}" for errs in bad.values() for e in errs)
+                ),
+            },
+        ]
+        fixed = extract_json(
+            _routed_completion(
+                repair_messages, model, temperature, max_tokens,
+                response_format=_JSON_FORMAT,
+            )
+        )
+        if fixed:
+            obj.update({k: v for k, v in fixed.items() if k in bad})
+        bad = invalid_fields(obj, schema)
+
+    if obj is None or bad:
+        print(f"⚠️ {agent}: JSON no válido tras reparar. Volvemos al modo texto.")
+        return _routed_completion(messages, model, temperature, max_tokens)
+
+    scope["parsed"] = obj
+    return render(agent, obj)
+
+
 def chat_completion(
     system_prompt: Union[str, List[Dict[str, str]]],
     user_prompt: str | None = None,
@@ -97,24 +528,150 @@ def chat_completion(
 
     - Si `system_prompt` es una lista, se asume que ya es la lista completa de mensajes.
     - Si es un string, se construye la conversación con system + user.
+    - Si la llamada viene de un agente del registro, su max_tokens declarado manda.
+    - Sin `model` explícito, el modelo sale del tier del agente (route_model);
+      si el tier pequeño da una salida inválida, se repite con "large".
+    - Si el agente tiene esquema (agents/schemas.py) y AUREN_STRUCTURED_OUTPUTS
+      está activo, se pide JSON y el objeto validado queda en el scope.
 
     👉 Siempre devuelve un string (normal o de error).
     """
+    messages = _build_messages(system_prompt, user_prompt)
+    max_tokens = _scoped_max_tokens(max_tokens)
 
-    # Caso 2: ya nos pasan messages (lista de dicts)
-    if isinstance(system_prompt, list):
-        messages = system_prompt  # type: ignore[assignment]
-    else:
-        # Caso 1: system_prompt (str) + user_prompt (str)
-        messages: List[Dict[str, str]] = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        if user_prompt:
-            messages.append({"role": "user", "content": user_prompt})
-
-    return _chat_with_messages(
-        messages=messages,
-        model=model,
-        temperature=temperature,
-        max_tokens=max_tokens,
-    )
+    scope = current_agent()
+    if STRUCTURED_OUTPUTS and scope and scope.get("schema"):
+        return _structured_completion(messages, scope, model, temperature, max_tokens)
+
+    return _routed_completion(messages, model, temperature, max_tokens)
+
+
+# =========================
+#  STREAMING
+# =========================
+
+def stream_chat_completion(
+    system_prompt: Union[str, List[Dict[str, str]]],
+    user_prompt: str | None = None,
+    model: str | None = None,
+    temperature: float = 0.7,
+    max_tokens: int = 2048,
+) -> Iterator[str]:
+    """
+    Igual que chat_completion, pero va devolviendo el texto a trozos
+    según lo genera Groq (stream=True), sin esperar a la respuesta completa.
+
+        for chunk in stream_chat_completion(SYSTEM_PROMPT, user_prompt):
+            ...
+
+    - Mismo circuit breaker que _chat_once (`groq:<modelo>`): con el circuito
+      abierto no se abre el stream y se delega en chat_completion (un solo
+      trozo, con su routing / escalada y su ERROR_LLM al momento).
+    - Respeta el deadline del run / etapa "groq": se comprueba entre trozos.
+
+    👉 Nunca lanza: si falla antes de empezar, produce un único trozo
+       con el texto de error controlado ('ERROR_RATE_LIMIT:' / 'ERROR_LLM:').
+       Si falla a mitad (o se agota el deadline), se corta el stream y se
+       avisa por consola.
+    """
+    tier, model_name = route_model(model)
+    cb = circuit(f"groq:{model_name}")
+    if not cb.allow():
+        yield chat_completion(system_prompt, user_prompt, model, temperature, max_tokens)
+        return
+
+    started = False
+    t0 = time.perf_counter()
+    try:
+        client = _get_client()
+        from groq import RateLimitError  # ya cargado por _get_client()
+    except Exception as e:
+        print(f"⚠️ Error genérico en stream de Groq (stream_chat_completion): {e}")
+        yield f"ERROR_LLM: No se ha podido llamar al modelo de Groq. Detalle técnico: {e}"
+        return
+
+    try:
+        extra: Dict[str, Any] = {}
+        timeout = stage_timeout("groq")
+        if timeout is not None:
+            if timeout <= 0:
+                raise DeadlineExceeded("groq: sin tiempo para abrir el stream.")
+            extra["timeout"] = timeout
+        ends_at = None if timeout is None else time.monotonic() + timeout
+
+        stream = client.chat.completions.create(
+            model=model_name,
+            messages=_build_messages(system_prompt, user_prompt),
+            temperature=temperature,
+            max_tokens=_scoped_max_tokens(max_tokens),
+            stream=True,
+            **extra,
+        )
+        for chunk in stream:
+            if ends_at is not None and time.monotonic() > ends_at:
+                raise DeadlineExceeded(f"groq: stream cortado por el deadline ({timeout:.1f}s).")
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                started = True
+                yield delta
+        cb.record_success()
+        _record(tier, model_name, time.perf_counter() - t0)
+
+    except RateLimitError as e:
+        cb.record_failure()
+        _record(tier, model_name, time.perf_counter() - t0, error=True)
+        print(f"⚠️ Groq RateLimitError en stream_chat_completion: {e}")
+        if not started:
+            yield (
+                "ERROR_RATE_LIMIT: El modelo de Groq ha alcanzado el límite diario de tokens. "
+                "Este texto es un fallback automático desde agents/auren_llm.py. "
+                "Los agentes que intenten parsear esta respuesta deben tratarla como error suave."
+            )
+
+    except Exception as e:
+        cb.record_failure()
+        _record(tier, model_name, time.perf_counter() - t0, error=True)
+        print(f"⚠️ Error genérico en stream de Groq (stream_chat_completion): {e}")
+        if not started:
+            yield (
+                f"ERROR_LLM: No se ha podido llamar al modelo de Groq. "
+                f"Detalle técnico: {e}"
+            )
+
+
+# Separador por defecto entre bloques: una línea que solo contiene '---'
+SEGMENT_SEPARATOR = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+
+
+def iter_segments(
+    chunks: Iterable[str],
+    separator: Pattern[str] = SEGMENT_SEPARATOR,
+) -> Iterator[str]:
+    """
+    Agrupa un stream de trozos de texto en segmentos completos.
+    Cada vez que aparece `separator` (por defecto una línea '---') se
+    devuelve el segmento anterior; el último se devuelve al cerrar el stream.
+
+    Solo se busca el separador en líneas ya terminadas ('\n'), para no
+    cortar un segmento por un '---' que todavía se está escribiendo.
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            closed = buffer.rfind("\n")
+            if closed < 0:
+                break
+            m = separator.search(buffer, 0, closed + 1)
+            if not m:
+                break
+            segment = buffer[: m.start()].strip()
+            buffer = buffer[m.end():].lstrip("\n")
+            if segment:
+                yield segment
+
+    tail = buffer.strip()
+    if tail:
+        yield tail
@@ -24,6 +24,8 @@ CHANNELS: List[Dict[str, Any]] = [
         "country": "ES",
         "language": "es",
         "niche": "dinero y libertad",
+        # Solo publica YouTube Shorts: sin versiones TikTok / Reels (ver run_profiles.RUN_PROFILES)
+        "run_profile": "shorts_only",
     },
     {
         "id": "auren_dinero_avanzado",
@@ -32,6 +34,8 @@ CHANNELS: List[Dict[str, Any]] = [
         "country": "ES",
         "language": "es",
         "niche": "dinero y libertad",
+        # Reparte cada vídeo en TikTok / Shorts / Reels → perfil completo
+        "run_profile": "full",
     },
 ]
 
@@ -62,3 +66,29 @@ def pick_next_job(seeds: List[TopicSeed]):
             }
 
     return None  # no queda nada nuevo
+
+
+def pick_next_jobs(seeds: List[TopicSeed], limit: int | None = None) -> List[Dict[str, Any]]:
+    """
+    Igual que pick_next_job, pero devuelve TODOS los (canal + semilla) libres
+    (hasta `limit`). Lo usa el modo worker para llenar la cola de golpe.
+    """
+    jobs: List[Dict[str, Any]] = []
+    for seed in seeds:
+        channel = choose_channel_for_seed(seed)
+        topic_slug = _simple_slug(seed.keyword)
+
+        if is_used(channel["id"], topic_slug):
+            continue
+
+        jobs.append(
+            {
+                "channel": channel,
+                "seed": seed,
+                "topic_slug": topic_slug,
+            }
+        )
+        if limit is not None and len(jobs) >= limit:
+            break
+
+    return jobs
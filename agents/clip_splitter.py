@@ -7,18 +7,24 @@ Input:
 {
     "script_v2": str,
     "min_clips": int,
-    "max_clips": int
+    "max_clips": int,
+    "on_clip": callable  # opcional: recibe cada clip (dict) en cuanto termina de generarse
 }
 
 Output:
 {
     "clips_raw": str  # texto con CLIP 1, CLIP 2, ...
 }
+
+Modo streaming: `stream_clips(input_data)` va devolviendo cada clip ya parseado
+({"index", "title", "objective", "script", "raw"}) según lo escribe el modelo,
+para que lo siguiente (ficheros, render...) empiece sin esperar al último clip.
 """
 
+import re
 from textwrap import dedent
-from typing import Dict, Any
-from .auren_llm import chat_completion
+from typing import Any, Callable, Dict, Iterator
+from .auren_llm import chat_completion, iter_segments, stream_chat_completion
 
 SYSTEM_PROMPT = """
 Eres AUREN_CLIP_SPLITTER.
@@ -53,7 +59,15 @@ Guion:
 """
 
 
-def run_agent(input_data: Dict[str, Any]) -> Dict[str, str]:
+_CLIP_HEADER_RE = re.compile(r"^\s*CLIP\s+(\d+)\s*$", re.IGNORECASE | re.MULTILINE)
+_FIELD_RE = {
+    "title": re.compile(r"^\s*T[ií]tulo\s*:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
+    "objective": re.compile(r"^\s*Objetivo\s*:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
+}
+_SCRIPT_RE = re.compile(r"^\s*Gui[oó]n\s*:\s*\n?(.*)", re.IGNORECASE | re.MULTILINE | re.DOTALL)
+
+
+def _build_prompt(input_data: Dict[str, Any]) -> str:
     script_v2 = input_data.get("script_v2", "").strip()
     if not script_v2:
         raise ValueError("Clip Splitter: falta 'script_v2'.")
@@ -71,10 +85,78 @@ def run_agent(input_data: Dict[str, Any]) -> Dict[str, str]:
     Quiero que lo conviertas en entre {min_clips} y {max_clips} clips cortos,
     siguiendo el formato indicado.
     """
+    return dedent(user_prompt).strip()
+
+
+def parse_clip(block: str, fallback_index: int = 0) -> Dict[str, Any]:
+    """Parsea un bloque 'CLIP N / Título / Objetivo / Guion' a dict."""
+    header = _CLIP_HEADER_RE.search(block)
+    clip: Dict[str, Any] = {
+        "index": int(header.group(1)) if header else fallback_index,
+        "title": "",
+        "objective": "",
+        "script": "",
+        "raw": block.strip(),
+    }
+    for key, rx in _FIELD_RE.items():
+        m = rx.search(block)
+        if m:
+            clip[key] = m.group(1).strip()
+    m = _SCRIPT_RE.search(block)
+    if m:
+        clip["script"] = m.group(1).strip()
+    return clip
+
+
+def stream_clips(input_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Genera los clips en streaming: cada clip se devuelve en cuanto el modelo
+    cierra su bloque ('---'). Los errores controlados del LLM se devuelven
+    como un único clip con el texto de error en "raw" y "error": True.
+    """
+    chunks = stream_chat_completion(
+        system_prompt=SYSTEM_PROMPT,
+        user_prompt=_build_prompt(input_data),
+        temperature=0.75,
+        max_tokens=2000,
+    )
+    for i, block in enumerate(iter_segments(chunks), start=1):
+        if block.lstrip().startswith(("ERROR_RATE_LIMIT:", "ERROR_LLM:")):
+            yield {"index": i, "title": "", "objective": "", "script": "", "raw": block.strip(), "error": True}
+            continue
+        yield parse_clip(block, fallback_index=i)
+
+
+def run_agent(input_data: Dict[str, Any]) -> Dict[str, str]:
+    on_clip: Callable[[Dict[str, Any]], Any] | None = input_data.get("on_clip")
+
+    if callable(on_clip):
+        clips = []
+        for clip in stream_clips(input_data):
+            clips.append(clip)
+            if clip.get("error"):
+                # un error del LLM no es un clip: no se escribe ningún fichero
+                print(f"⚠️ Clip Splitter: {clip['raw'][:120]}")
+                continue
+            try:
+                on_clip(clip)
+            except Exception as e:
+                print(f"⚠️ Clip Splitter: on_clip falló en CLIP {clip['index']}: {e}")
+        return {
+            "clips_raw": "\n\n---\n".join(c["raw"] for c in clips).strip(),
+            # clips ya parseados (sin volver a leer clips_raw)
+            "parsed": {
+                "clips": [
+                    {"title": c["title"], "objective": c["objective"], "script": c["script"]}
+                    for c in clips
+                    if not c.get("error")
+                ]
+            },
+        }
 
     clips_text = chat_completion(
         system_prompt=SYSTEM_PROMPT,
-        user_prompt=dedent(user_prompt).strip(),
+        user_prompt=_build_prompt(input_data),
         temperature=0.75,
         max_tokens=2000,
     )
@@ -0,0 +1,177 @@
+# agents/publish_pack.py
+"""
+AUREN_PUBLISH_PACK
+Títulos + descripción + hashtags en UNA sola llamada (JSON).
+
+Sustituye a AUREN_TITLE_LAB + AUREN_DESCRIPTION_ENGINE + AUREN_HASHTAG_ENGINE
+cuando se piden los tres a la vez: un solo round-trip y una sola copia del
+guion en el prompt. Cada campo se valida por separado; los que no pasan
+se devuelven en "invalid_fields" para que el pipeline los pida al agente
+individual de siempre.
+
+Input:
+{
+    "script_v2": str,
+    "topic": str,
+    "niche": str,
+    "platform": str,
+    "language": str,
+    "fields": [str, ...]  # opcional: subconjunto de "titles", "description", "hashtags"
+}
+
+Output:
+{
+    "titles_raw": str,       # mismo formato que AUREN_TITLE_LAB ("1) ...")
+    "description_raw": str,  # mismo formato que AUREN_DESCRIPTION_ENGINE
+    "hashtags_raw": str,     # mismo formato que AUREN_HASHTAG_ENGINE ("[TIKTOK]\n#...")
+    "invalid_fields": [str, ...],
+    "parsed": {campo: valor}  # solo campos válidos, ya limpios (lo mismo que se pinta)
+}
+"""
+
+from textwrap import dedent
+from typing import Any, Dict, List, Optional
+from .auren_llm import chat_completion
+from .schemas import extract_json
+
+FIELDS = ("titles", "description", "hashtags")
+
+# campo → clave de salida del agente individual (y agente de fallback)
+FIELD_OUTPUTS = {
+    "titles": "titles_raw",
+    "description": "description_raw",
+    "hashtags": "hashtags_raw",
+}
+
+SYSTEM_PROMPT = """
+Eres AUREN_PUBLISH_PACK.
+
+Preparas todo lo necesario para publicar un vídeo corto
+(TikTok, YouTube Shorts, Reels) a partir de su guion.
+
+Reglas:
+- Títulos: 5–10, curiosidad + beneficio claro, sin mayúsculas completas,
+  sin cifras falsas ni spam cutre.
+- Descripción: 1–2 líneas fuertes arriba, 3–5 bullets con valor,
+  CTA elegante, 3–5 hashtags al final. Texto plano listo para pegar.
+- Hashtags: mezcla grandes, medios y pequeños, nada de spam genérico
+  (#foryou, etc.), en el idioma indicado.
+
+Responde SOLO con un objeto JSON válido, sin texto antes ni después:
+
+{
+  "titles": ["...", "..."],
+  "description": "...",
+  "hashtags": {
+    "tiktok": ["#...", "..."],
+    "shorts": ["#...", "..."],
+    "reels": ["#...", "..."]
+  }
+}
+"""
+
+# Cada campo: limpieza (None = inválido) + render a texto. "parsed" guarda lo limpio,
+# así quien lo lea ve exactamente lo mismo que se pinta.
+
+def _clean_titles(value: Any) -> Optional[List[str]]:
+    if not isinstance(value, list):
+        return None
+    titles = [t.strip() for t in value if isinstance(t, str) and t.strip()]
+    if len(titles) < 3:
+        return None
+    return titles[:10]
+
+
+def _render_titles(titles: List[str]) -> str:
+    return "\n".join(f"{i}) {t}" for i, t in enumerate(titles, start=1))
+
+
+def _clean_description(value: Any) -> Optional[str]:
+    if not isinstance(value, str) or len(value.strip()) < 80:
+        return None
+    return value.strip()
+
+
+def _render_description(description: str) -> str:
+    return description
+
+
+_HASHTAG_BLOCKS = (("tiktok", "TIKTOK"), ("shorts", "SHORTS"), ("reels", "REELS"))
+
+
+def _clean_hashtags(value: Any) -> Optional[Dict[str, List[str]]]:
+    if not isinstance(value, dict):
+        return None
+    clean: Dict[str, List[str]] = {}
+    for key, _label in _HASHTAG_BLOCKS:
+        tags = value.get(key)
+        if not isinstance(tags, list):
+            return None
+        tags = [
+            t.strip() if t.strip().startswith("#") else f"#{t.strip()}"
+            for t in tags
+            if isinstance(t, str) and t.strip()
+        ]
+        if len(tags) < 3:
+            return None
+        clean[key] = tags
+    return clean
+
+
+def _render_hashtags(hashtags: Dict[str, List[str]]) -> str:
+    return "\n\n".join(f"[{label}]\n" + " ".join(hashtags[key]) for key, label in _HASHTAG_BLOCKS)
+
+
+_FIELD_HANDLERS = {
+    "titles": (_clean_titles, _render_titles),
+    "description": (_clean_description, _render_description),
+    "hashtags": (_clean_hashtags, _render_hashtags),
+}
+
+
+def run_agent(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    script_v2 = input_data.get("script_v2", "").strip()
+    if not script_v2:
+        raise ValueError("Publish Pack: falta 'script_v2'.")
+
+    topic = input_data.get("topic", "")
+    niche = input_data.get("niche", "")
+    platform = input_data.get("platform", "YouTube Shorts")
+    language = input_data.get("language", "es")
+    fields = [f for f in input_data.get("fields") or FIELDS if f in FIELDS]
+
+    user_prompt = f"""
+    Guion del vídeo entre ===:
+
+    ===
+    {script_v2}
+    ===
+
+    Tema: {topic}
+    Nicho: {niche}
+    Plataforma principal: {platform}
+    Idioma: {language}
+
+    Devuelve el JSON con estos campos: {", ".join(fields)}.
+    """
+
+    text = chat_completion(
+        system_prompt=SYSTEM_PROMPT,
+        user_prompt=dedent(user_prompt).strip(),
+        temperature=0.8,
+        max_tokens=1500,
+    )
+
+    obj = extract_json(text) or {}
+
+    result: Dict[str, Any] = {"invalid_fields": [], "parsed": {}}
+    for field in fields:
+        clean, render = _FIELD_HANDLERS[field]
+        value = clean(obj.get(field))
+        if value is None:
+            result["invalid_fields"].append(field)
+        else:
+            result[FIELD_OUTPUTS[field]] = render(value)
+            result["parsed"][field] = value
+
+    return result
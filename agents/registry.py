@@ -0,0 +1,215 @@
+# agents/registry.py
+"""
+Registro declarativo de AUREN AGENTS.
+
+Cada agente de /agents se declara aquí con la metadata que usa el executor:
+  - cacheable          → si dos llamadas con el mismo input pueden compartir resultado
+  - model_tier         → "large" (70B) o "small" (modelo rápido)
+  - max_tokens         → tope de tokens de respuesta (lo aplica el LLM layer)
+  - validate           → check barato de la salida; si el tier "small" no lo pasa,
+                         el LLM layer repite la llamada con "large"
+
+El módulo del agente se importa la primera vez que se usa, y el executor
+(call_agent / run_batch) puede cachear, paralelizar o saltarse agentes
+de forma genérica, sin tocar run_gold_pipeline para cada optimización:
+
+    from agents.registry import call_agent, run_batch
+    titles = call_agent("title_lab", {"clip_text": script_v2, "platform": "TikTok"})
+"""
+
+import contextvars
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from agents.auren_llm import agent_scope
+from agents.schemas import get_schema
+
+# Agentes en paralelo dentro de run_batch (1 = secuencial, como antes)
+AGENT_PARALLELISM = int(os.getenv("AUREN_AGENT_PARALLELISM", "4"))
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    name: str
+    module: str
+    cacheable: bool = False
+    model_tier: str = "large"  # "large" | "small"
+    max_tokens: int = 2048
+    cache_ttl: float = 6 * 3600  # segundos (solo si cacheable)
+    validate: Callable[[str], bool] | None = None
+
+
+_SPECS: List[AgentSpec] = [
+    # ------------- FÁBRICA (CREATIVE + FINAL) -------------
+    AgentSpec("angle_master", "agents.angle_master", max_tokens=1400),
+    AgentSpec("script_doctor", "agents.script_doctor", max_tokens=1500),
+    AgentSpec("clip_splitter", "agents.clip_splitter", max_tokens=2000),
+    AgentSpec("title_lab", "agents.title_lab", max_tokens=800),
+    AgentSpec("platform_translator", "agents.platform_translator", max_tokens=1500),
+    AgentSpec("publish_pack", "agents.publish_pack", max_tokens=1500),
+    # ------------- MONEY / AFILIADOS -------------
+    AgentSpec("hotmart_engine", "agents.hotmart_engine", cacheable=True, max_tokens=700),
+    AgentSpec("saas_engine", "agents.saas_engine", cacheable=True, max_tokens=700),
+    # ------------- CRECIMIENTO Y OPTIMIZACIÓN -------------
+    AgentSpec("hook_engine", "agents.hook_engine"),
+    AgentSpec(
+        "novelty_detector", "agents.novelty_detector",
+        cacheable=True, model_tier="small",
+        validate=lambda text: len(text.strip()) >= 80,
+    ),
+    AgentSpec("opportunity_scorer", "agents.opportunity_scorer", cacheable=True),
+    AgentSpec("content_gap_hunter", "agents.content_gap_hunter", cacheable=True),
+    AgentSpec(
+        "hashtag_engine", "agents.hashtag_engine",
+        cacheable=True, model_tier="small",
+        validate=lambda text: text.count("#") >= 3,
+    ),
+    AgentSpec("description_engine", "agents.description_engine"),
+    AgentSpec(
+        "upload_scheduler", "agents.upload_scheduler",
+        cacheable=True, model_tier="small", cache_ttl=24 * 3600,
+        validate=lambda text: any(ch.isdigit() for ch in text),  # al menos horas / días
+    ),
+    AgentSpec("retention_analyzer", "agents.retention_analyzer"),
+    AgentSpec("ctr_forecaster", "agents.ctr_forecaster"),
+    AgentSpec("content_performance", "agents.content_performance"),
+    # ------------- DASHBOARD -------------
+    AgentSpec("dashboard_engine", "agents.dashboard_engine"),
+    # ------------- BRAIN -------------
+    AgentSpec("trend_oracle", "agents.trend_oracle", cacheable=True),
+    AgentSpec("channel_evaluator", "agents.channel_evaluator"),
+    AgentSpec("topic_scout_real", "agents.topic_scout_real", cacheable=True),
+    # ------------- CLIPS (sueltos) -------------
+    AgentSpec(
+        "emotional_analyzer", "agents.emotional_analyzer",
+        cacheable=True, model_tier="small", max_tokens=600,
+    ),
+    AgentSpec("quality_rater", "agents.quality_rater", max_tokens=800),
+    AgentSpec("thumbnail_brief", "agents.thumbnail_brief", max_tokens=1000),
+]
+
+AGENTS: Dict[str, AgentSpec] = {spec.name: spec for spec in _SPECS}
+
+_loaded: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+_lock = threading.Lock()
+
+# Caché en proceso de resultados de agentes cacheables: key → (expira_en, resultado)
+_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_spec(name: str) -> AgentSpec:
+    spec = AGENTS.get(name)
+    if spec is None:
+        raise KeyError(f"Agente desconocido en el registro: {name!r}")
+    return spec
+
+
+def get_agent(name: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Devuelve la función run_agent del agente `name`, importando su módulo
+    solo la primera vez.
+    """
+    fn = _loaded.get(name)
+    if fn is not None:
+        return fn
+
+    spec = get_spec(name)
+    with _lock:
+        fn = _loaded.get(name)
+        if fn is None:
+            module = importlib.import_module(spec.module)
+            fn = module.run_agent
+            _loaded[name] = fn
+        return fn
+
+
+def _cache_key(name: str, payload: Dict[str, Any]) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{name}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+def _is_error_result(result: Dict[str, Any]) -> bool:
+    """Las respuestas de error controlado del LLM no se cachean."""
+    for value in result.values():
+        if isinstance(value, str) and value.lstrip().startswith(("ERROR_RATE_LIMIT:", "ERROR_LLM:")):
+            return True
+    return False
+
+
+def call_agent(name: str, payload: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Ejecuta un agente por nombre:
+      - import perezoso del módulo
+      - caché en proceso si el agente es cacheable (misma entrada → mismo resultado)
+      - el LLM layer recibe la metadata del agente (max_tokens, tier, validate, esquema) vía agent_scope
+      - si el agente tiene esquema JSON, el resultado incluye "parsed" (objeto validado)
+    """
+    spec = get_spec(name)
+
+    key = None
+    if spec.cacheable and use_cache:
+        key = _cache_key(name, payload)
+        with _cache_lock:
+            hit = _cache.get(key)
+        if hit is not None and hit[0] > time.time():
+            return dict(hit[1])
+
+    fn = get_agent(name)
+    with agent_scope(
+        spec.name,
+        max_tokens=spec.max_tokens,
+        model_tier=spec.model_tier,
+        validate=spec.validate,
+        schema=get_schema(spec.name),
+    ) as scope:
+        result = fn(payload)
+
+    # Modo estructurado: el objeto ya validado viaja con el resultado (y se cachea con él)
+    if scope["parsed"] is not None and "parsed" not in result:
+        result = {**result, "parsed": scope["parsed"]}
+
+    if key is not None and not _is_error_result(result):
+        with _cache_lock:
+            _cache[key] = (time.time() + spec.cache_ttl, dict(result))
+
+    return result
+
+
+def run_batch(
+    calls: Dict[str, Tuple[str, Dict[str, Any]]],
+    max_workers: int | None = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Ejecuta varios agentes independientes a la vez.
+
+    calls = {"etiqueta": ("nombre_agente", payload), ...}
+    Devuelve {"etiqueta": resultado, ...}. Si algún agente lanza excepción,
+    se propaga (igual que si se hubieran llamado uno detrás de otro).
+    """
+    if not calls:
+        return {}
+
+    workers = max(1, min(max_workers or AGENT_PARALLELISM, len(calls)))
+    if workers == 1:
+        return {label: call_agent(name, payload) for label, (name, payload) in calls.items()}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auren-agent") as pool:
+        # Cada hilo hereda el contexto (deadline del run, etc.)
+        futures = {
+            label: pool.submit(contextvars.copy_context().run, call_agent, name, payload)
+            for label, (name, payload) in calls.items()
+        }
+        return {label: fut.result() for label, fut in futures.items()}
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
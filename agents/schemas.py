@@ -0,0 +1,252 @@
+# agents/schemas.py
+"""
+Esquemas JSON de salida de los AUREN AGENTS (modo estructurado).
+
+Con AUREN_STRUCTURED_OUTPUTS activo, el LLM layer pide a Groq JSON
+(response_format json_object) con el esquema del agente, valida campo a campo,
+repara SOLO los campos inválidos con una llamada mínima y devuelve:
+
+  - el texto renderizado en el formato de siempre (el agente no cambia)
+  - el objeto ya parseado, que call_agent añade al resultado como "parsed"
+
+Así run_gold_pipeline no vuelve a parsear texto libre (p. ej. el primer título
+para AUREN_CTR_FORECASTER): usa result["parsed"].
+
+Solo tienen esquema los agentes cuya salida se parsea o se reutiliza por
+campos. Los de prosa (script_doctor, description_engine, retention_analyzer,
+hotmart_engine, saas_engine, upload_scheduler...) se pegan tal cual en el
+informe; publish_pack ya pide su propio JSON; clip_splitter va en streaming
+(cada clip se parsea según llega, ver agents/clip_splitter.py).
+
+Subconjunto de JSON Schema soportado: type (object, array, string, number,
+integer), properties, required, items, minItems, maxItems, minLength,
+minimum, maximum.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+# =========================
+#  VALIDACIÓN
+# =========================
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+}
+
+
+def validate(obj: Any, schema: Dict[str, Any], path: str = "") -> List[str]:
+    """Devuelve la lista de errores ("campo: motivo"); vacía si `obj` es válido."""
+    errors: List[str] = []
+    where = path or "(raíz)"
+
+    expected = schema.get("type")
+    py_type = _TYPES.get(expected)
+    if py_type is not None:
+        if isinstance(obj, bool) or not isinstance(obj, py_type):
+            return [f"{where}: se esperaba {expected}"]
+
+    if expected == "object":
+        for key in schema.get("required", []):
+            if key not in obj:
+                errors.append(f"{path + '.' if path else ''}{key}: falta el campo")
+        for key, sub in schema.get("properties", {}).items():
+            if key in obj:
+                errors.extend(validate(obj[key], sub, f"{path + '.' if path else ''}{key}"))
+
+    elif expected == "array":
+        if "minItems" in schema and len(obj) < schema["minItems"]:
+            errors.append(f"{where}: mínimo {schema['minItems']} elementos (hay {len(obj)})")
+        if "maxItems" in schema and len(obj) > schema["maxItems"]:
+            errors.append(f"{where}: máximo {schema['maxItems']} elementos (hay {len(obj)})")
+        if "items" in schema:
+            for i, item in enumerate(obj):
+                errors.extend(validate(item, schema["items"], f"{where}[{i}]"))
+
+    elif expected == "string":
+        if "minLength" in schema and len(obj.strip()) < schema["minLength"]:
+            errors.append(f"{where}: texto demasiado corto")
+        if "enum" in schema and obj not in schema["enum"]:
+            errors.append(f"{where}: debe ser uno de {', '.join(schema['enum'])}")
+
+    elif expected in ("number", "integer"):
+        if "minimum" in schema and obj < schema["minimum"]:
+            errors.append(f"{where}: menor que {schema['minimum']}")
+        if "maximum" in schema and obj > schema["maximum"]:
+            errors.append(f"{where}: mayor que {schema['maximum']}")
+
+    return errors
+
+
+def invalid_fields(obj: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Agrupa los errores por campo de primer nivel (lo que se repara)."""
+    fields: Dict[str, List[str]] = {}
+    for err in validate(obj, schema):
+        field = err.split(":", 1)[0].split(".", 1)[0].split("[", 1)[0]
+        fields.setdefault(field, []).append(err)
+    return fields
+
+
+def extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """Objeto JSON de una respuesta del LLM (tolera ```json``` y texto alrededor)."""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        obj = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+# =========================
+#  RENDER (JSON → formato de texto de siempre)
+# =========================
+
+def _numbered(items: List[str]) -> str:
+    return "\n".join(f"{i}) {t}" for i, t in enumerate(items, start=1))
+
+
+def _render_angles(obj: Dict[str, Any]) -> str:
+    return "\n\n".join(
+        f"{i}) {a['name']}\nHook: {a['hook']}" for i, a in enumerate(obj["angles"], start=1)
+    )
+
+
+def _render_hooks(obj: Dict[str, Any]) -> str:
+    return "HOOKS:\n" + _numbered(obj["hooks"])
+
+
+def _render_titles(obj: Dict[str, Any]) -> str:
+    return _numbered(obj["titles"])
+
+
+def _render_platform_versions(obj: Dict[str, Any]) -> str:
+    return (
+        f"[TIKTOK]\n{obj['tiktok']}\n\n"
+        f"[SHORTS]\n{obj['shorts']}\n\n"
+        f"[REELS]\n{obj['reels']}"
+    )
+
+
+def _render_hashtags(obj: Dict[str, Any]) -> str:
+    return "\n\n".join(
+        f"[{label}]\n" + " ".join(t if t.startswith("#") else f"#{t}" for t in obj[key])
+        for key, label in (("tiktok", "TIKTOK"), ("shorts", "SHORTS"), ("reels", "REELS"))
+    )
+
+
+def _render_ctr(obj: Dict[str, Any]) -> str:
+    variants = _numbered([f"{v['title']} — {v['thumbnail_idea']}" for v in obj["variants"]])
+    return (
+        "EVALUACION:\n"
+        f"- CTR estimado: {obj['ctr_estimate']}\n"
+        f"- Motivo: {obj['reason']}\n\n"
+        f"VARIANTES:\n{variants}"
+    )
+
+
+def _render_rating(obj: Dict[str, Any]) -> str:
+    return f"Nota global: {obj['score']}/10\n\n{obj['feedback']}"
+
+
+_STR = {"type": "string", "minLength": 1}
+_TAGS = {"type": "array", "items": _STR, "minItems": 3}
+
+# agente → {"schema": JSON schema, "render": obj → texto}
+AGENT_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "angle_master": {
+        "schema": {
+            "type": "object",
+            "required": ["angles"],
+            "properties": {
+                "angles": {
+                    "type": "array",
+                    "minItems": 5,
+                    "items": {
+                        "type": "object",
+                        "required": ["name", "hook"],
+                        "properties": {"name": _STR, "hook": _STR},
+                    },
+                },
+            },
+        },
+        "render": _render_angles,
+    },
+    "hook_engine": {
+        "schema": {
+            "type": "object",
+            "required": ["hooks"],
+            "properties": {"hooks": {"type": "array", "items": _STR, "minItems": 3}},
+        },
+        "render": _render_hooks,
+    },
+    "title_lab": {
+        "schema": {
+            "type": "object",
+            "required": ["titles"],
+            "properties": {"titles": {"type": "array", "items": _STR, "minItems": 3, "maxItems": 10}},
+        },
+        "render": _render_titles,
+    },
+    "platform_translator": {
+        "schema": {
+            "type": "object",
+            "required": ["tiktok", "shorts", "reels"],
+            "properties": {"tiktok": _STR, "shorts": _STR, "reels": _STR},
+        },
+        "render": _render_platform_versions,
+    },
+    "hashtag_engine": {
+        "schema": {
+            "type": "object",
+            "required": ["tiktok", "shorts", "reels"],
+            "properties": {"tiktok": _TAGS, "shorts": _TAGS, "reels": _TAGS},
+        },
+        "render": _render_hashtags,
+    },
+    "ctr_forecaster": {
+        "schema": {
+            "type": "object",
+            "required": ["ctr_estimate", "reason", "variants"],
+            "properties": {
+                # Mismo formato que el agente en texto libre: CTR esperado (bajo, medio, alto)
+                "ctr_estimate": {"type": "string", "enum": ["bajo", "medio", "alto"]},
+                "reason": _STR,
+                "variants": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["title", "thumbnail_idea"],
+                        "properties": {"title": _STR, "thumbnail_idea": _STR},
+                    },
+                },
+            },
+        },
+        "render": _render_ctr,
+    },
+    "quality_rater": {
+        "schema": {
+            "type": "object",
+            "required": ["score", "feedback"],
+            "properties": {
+                "score": {"type": "number", "minimum": 0, "maximum": 10},
+                "feedback": _STR,
+            },
+        },
+        "render": _render_rating,
+    },
+}
+
+
+def get_schema(agent: str) -> Optional[Dict[str, Any]]:
+    return AGENT_SCHEMAS.get(agent)
+
+
+def render(agent: str, obj: Dict[str, Any]) -> str:
+    renderer: Callable[[Dict[str, Any]], str] = AGENT_SCHEMAS[agent]["render"]
+    return renderer(obj)
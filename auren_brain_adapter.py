@@ -9,9 +9,15 @@ Incluye dos modos:
      del Space "AUREN-MEDIA-BRAIN" y devuelve una config de vídeo.
 
 2) 📁 Modo archivo local (plan JSON en disco)
-   - load_brain_plan(path) lee un JSON con el plan del Brain.
-   - pick_video_from_brain(plan) elige un vídeo del plan.
+   - pending_plan_file_videos(path) recorre los vídeos del plan que el
+     ledger de progreso (video_ids completados, en topic_memory) aún no
+     tiene como hechos, leyendo el fichero en streaming (JSON Lines o JSON
+     clásico, brain_plan_stream.py) sin cargar planes enormes en memoria.
      (usado por auto_gold.py cuando se usa AUREN_BRAIN_PLAN_PATH)
+   - API pública del adaptador para otros scripts (auto_gold no la usa):
+     load_brain_plan(path), iter_plan_videos(plan) (formato plano "videos"
+     o anidado "channels[].videos[]" de brain_plans/), pick_video_from_brain(plan)
+     e iter_plan_file_videos(path) (todos los vídeos, en streaming).
 
 Ambos devuelven una estructura homogénea:
 {
@@ -26,11 +32,22 @@ Ambos devuelven una estructura homogénea:
 }
 """
 
+from __future__ import annotations
+
 import os
 import json
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Tuple
+
+from auren_resilience import flight_key, hedged_call, singleflight
+
+from brain_plan_stream import iter_pending_plan_file, iter_plan_file, read_header
+from topic_memory import used_slugs
 
-from gradio_client import Client
+# gradio_client se importa al crear el cliente (arranque rápido de auto_gold)
+if TYPE_CHECKING:
+    from gradio_client import Client
 
 HF_TOKEN = os.getenv("HF_TOKEN", "").strip()
 BRAIN_SPACE_ID = os.getenv("AUREN_BRAIN_SPACE_ID", "").strip()
@@ -40,19 +57,31 @@ BRAIN_SPACE_ID = os.getenv("AUREN_BRAIN_SPACE_ID", "").strip()
 # 🔌 CLIENTE REMOTO PARA EL SPACE AUREN MEDIA BRAIN
 # =====================================================
 
+_brain_client: Client | None = None
+_brain_client_lock = threading.Lock()
+
+
 def _get_brain_client() -> Client:
     """
-    Crea un cliente para el Space del Brain.
+    Cliente para el Space del Brain (uno por proceso, compartido por
+    auto_gold y el adaptador).
     Lanza error si no hay BRAIN_SPACE_ID configurado.
     """
+    global _brain_client
+
     if not BRAIN_SPACE_ID:
         raise RuntimeError("❌ AUREN_BRAIN_SPACE_ID no está definido en el entorno.")
 
-    if HF_TOKEN:
-        # gradio_client usa HF_TOKEN de la variable de entorno
-        os.environ["HF_TOKEN"] = HF_TOKEN
+    with _brain_client_lock:
+        if _brain_client is None:
+            from gradio_client import Client
+
+            if HF_TOKEN:
+                # gradio_client usa HF_TOKEN de la variable de entorno
+                os.environ["HF_TOKEN"] = HF_TOKEN
 
-    return Client(BRAIN_SPACE_ID)
+            _brain_client = Client(BRAIN_SPACE_ID)
+        return _brain_client
 
 
 def _call_brain_plan(
@@ -92,27 +121,155 @@ def _call_brain_plan(
     return result
 
 
+def _normalize_video(v: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Un vídeo del plan → config de AutoGold. `ctx` son los campos heredados
+    del plan (formato plano) o del canal (formato channels[].videos[]).
+    """
+    return {
+        "channel_name": v.get("channel_name") or ctx.get("channel_name") or "Canal_sin_nombre",
+        "country": v.get("country") or ctx.get("country") or "ES",
+        "language": v.get("language") or ctx.get("language") or "es",
+        "topic": v.get("topic") or v.get("seed_topic") or "tema_sin_titulo",
+        "video_id": v.get("video_id") or v.get("topic_slug") or "video_sin_id",
+        "emotion": v.get("emotion") or ctx.get("emotion") or "aspiracional",
+        "target_platform": v.get("target_platform") or ctx.get("target_platform") or "shorts",
+        "affiliate_slot": v.get("affiliate_slot") or v.get("slot"),
+    }
+
+
+def _plan_ctx(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Campos heredados por los vídeos del formato plano."""
+    return {
+        "channel_name": plan.get("channel_name"),
+        "country": plan.get("country"),
+        "language": plan.get("language"),
+    }
+
+
+def _channel_ctx(ch: Dict[str, Any]) -> Dict[str, Any]:
+    """Campos heredados por los vídeos de channels[].videos[]."""
+    return {
+        "channel_name": ch.get("name") or ch.get("channel_name") or ch.get("id"),
+        "country": ch.get("country"),
+        "language": ch.get("language"),
+        "target_platform": ch.get("target_platform"),
+        "emotion": ch.get("emotion_default"),
+    }
+
+
+def iter_plan_videos(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Recorre TODOS los vídeos de un plan del Brain, ya normalizados. Soporta:
+      - formato plano:   {"channel_name", "country", "language", "videos": [...]}
+      - formato anidado: {"channels": [{"name", "country", "language",
+                                        "target_platform", "emotion_default",
+                                        "videos": [...]}, ...]}  (brain_plans/)
+    """
+    flat_ctx = _plan_ctx(plan)
+    for v in plan.get("videos") or []:
+        if isinstance(v, dict):
+            yield _normalize_video(v, flat_ctx)
+
+    for ch in plan.get("channels") or []:
+        if not isinstance(ch, dict):
+            continue
+        ctx = _channel_ctx(ch)
+        for v in ch.get("videos") or []:
+            if isinstance(v, dict):
+                yield _normalize_video(v, ctx)
+
+
 def _extract_video_cfg_from_plan(plan: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
     Normaliza un plan del Brain (sea remoto o desde archivo)
-    a la estructura mínima que necesita AutoGold.
+    a la estructura mínima que necesita AutoGold (primer vídeo del plan).
     """
-    videos = plan.get("videos") or []
-    if not videos:
+    return next(iter_plan_videos(plan), None)
+
+
+# =====================================================
+# 🗃️ CACHÉ COMPARTIDA DE /brain_plan
+# =====================================================
+# auto_gold.brain_enrich_plan y maybe_enrich_with_brain piden el mismo plan:
+# los dos pasan por fetch_brain_plan, así que por run hay como mucho UNA llamada
+# al Space por combinación de argumentos.
+#   - edad < TTL                 → caché
+#   - TTL ≤ edad < TTL + STALE   → caché (stale) + refresco en segundo plano
+#   - más viejo / sin entrada    → llamada (agrupada con singleflight)
+
+BRAIN_PLAN_TTL_S = float(os.getenv("AUREN_BRAIN_PLAN_TTL_S", "900"))
+BRAIN_PLAN_STALE_S = float(os.getenv("AUREN_BRAIN_PLAN_STALE_S", "3600"))
+
+_plan_cache: Dict[Tuple[str, ...], Tuple[float, Dict[str, Any]]] = {}
+_plan_refreshing: set = set()
+_plan_cache_lock = threading.Lock()
+
+
+def _fetch_and_store(key: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    plan = singleflight(
+        flight_key("brain_plan", *key),
+        lambda: hedged_call(
+            "brain_plan",
+            lambda: _call_brain_plan(*key),
+            breaker="space:brain",
+            # Con el circuito abierto o el Space caído → None al momento
+            fallback=lambda: None,
+        ),
+    )
+    if isinstance(plan, dict):
+        with _plan_cache_lock:
+            _plan_cache[key] = (time.monotonic(), plan)
+    return plan
+
+
+def _refresh_in_background(key: Tuple[str, ...]) -> None:
+    with _plan_cache_lock:
+        if key in _plan_refreshing:
+            return
+        _plan_refreshing.add(key)
+
+    def _run() -> None:
+        try:
+            _fetch_and_store(key)
+        except Exception as e:
+            print(f"⚠️ No se pudo refrescar el plan del Brain: {e}")
+        finally:
+            with _plan_cache_lock:
+                _plan_refreshing.discard(key)
+
+    threading.Thread(target=_run, name="brain-plan-refresh", daemon=True).start()
+
+
+def fetch_brain_plan(
+    channel_name: str | None,
+    seed_topic: str,
+    topic_slug: str,
+    niche: str,
+    country: str,
+    language: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Plan del Space AUREN MEDIA BRAIN (dict) con caché TTL + stale-while-revalidate.
+    None si no hay Brain configurado o no responde.
+    El dict se comparte entre llamadas: no mutarlo.
+    """
+    if not BRAIN_SPACE_ID:
         return None
 
-    v = videos[0]  # por ahora usamos el primer vídeo del plan
+    key = (channel_name or "", seed_topic, topic_slug, niche, country, language)
+    with _plan_cache_lock:
+        entry = _plan_cache.get(key)
 
-    return {
-        "channel_name": plan.get("channel_name") or "Canal_sin_nombre",
-        "country": plan.get("country") or "ES",
-        "language": plan.get("language") or "es",
-        "topic": v.get("topic") or v.get("seed_topic") or "tema_sin_titulo",
-        "video_id": v.get("video_id") or v.get("topic_slug") or "video_sin_id",
-        "emotion": v.get("emotion") or "aspiracional",
-        "target_platform": v.get("target_platform") or "shorts",
-        "affiliate_slot": v.get("affiliate_slot"),
-    }
+    if entry is not None:
+        age = time.monotonic() - entry[0]
+        if age < BRAIN_PLAN_TTL_S:
+            return entry[1]
+        if age < BRAIN_PLAN_TTL_S + BRAIN_PLAN_STALE_S:
+            _refresh_in_background(key)
+            return entry[1]
+
+    return _fetch_and_store(key)
 
 
 # =====================================================
@@ -148,7 +305,7 @@ def maybe_enrich_with_brain(
         return None
 
     try:
-        plan = _call_brain_plan(
+        plan = fetch_brain_plan(
             channel_name=channel_name,
             seed_topic=seed_topic,
             topic_slug=topic_slug,
@@ -160,6 +317,10 @@ def maybe_enrich_with_brain(
         print("⚠️ Error llamando a AUREN MEDIA BRAIN:", e)
         return None
 
+    if plan is None:
+        print("⚠️ AUREN MEDIA BRAIN no respondió.")
+        return None
+
     cfg = _extract_video_cfg_from_plan(plan)
     if not cfg:
         print("⚠️ Brain devolvió un plan sin vídeos. Se ignora.")
@@ -186,9 +347,68 @@ def load_brain_plan(path: str) -> Dict[str, Any]:
     return data
 
 
+def _normalize_entry(v: Dict[str, Any], raw_ctx: Dict[str, Any]) -> Dict[str, Any]:
+    ctx = _channel_ctx(raw_ctx) if raw_ctx.get("_channel") else _plan_ctx(raw_ctx)
+    return _normalize_video(v, ctx)
+
+
+def plan_file_key(path: str) -> str:
+    """plan_key leyendo solo la cabecera del fichero (no el plan entero)."""
+    return plan_key(read_header(path), path)
+
+
+def iter_plan_file_videos(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Como iter_plan_videos, pero leyendo el fichero en streaming
+    (JSON Lines o JSON clásico): memoria acotada para planes enormes.
+    """
+    for v, ctx in iter_plan_file(path):
+        yield _normalize_entry(v, ctx)
+
+
+def pending_plan_file_videos(path: str, key: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Vídeos pendientes de un fichero de plan, en streaming. En JSON Lines
+    reanuda desde el cursor (primer vídeo no completado según el ledger).
+    """
+    key = key or plan_file_key(path)
+    done = done_video_ids(key)
+    entries = iter_pending_plan_file(
+        path,
+        key,
+        done,
+        video_id_of=lambda v, ctx: _normalize_entry(v, ctx)["video_id"],
+    )
+    for v, ctx in entries:
+        yield _normalize_entry(v, ctx)
+
+
 def pick_video_from_brain(plan: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
     Elige un vídeo del plan cargado desde archivo y lo normaliza.
     Misma estructura que maybe_enrich_with_brain.
     """
     return _extract_video_cfg_from_plan(plan)
+
+
+# =====================================================
+# 📒 LEDGER DE PROGRESO DEL PLAN
+# =====================================================
+# Los video_id completados se guardan en topic_memory bajo "plan:<plan_key>"
+# (mismo fichero, mismo lock entre procesos, misma completion idempotente
+# que los jobs de channel_router).
+
+def plan_key(plan: Dict[str, Any], path: Optional[str] = None) -> str:
+    """Identificador estable del plan: plan_name, meta.generated_at o nombre del fichero."""
+    meta = plan.get("meta") if isinstance(plan.get("meta"), dict) else {}
+    key = plan.get("plan_name") or meta.get("generated_at") or (os.path.basename(path) if path else "") or "brain_plan"
+    return str(key)
+
+
+def ledger_channel_id(key: str) -> str:
+    return f"plan:{key}"
+
+
+def done_video_ids(key: str) -> set:
+    return used_slugs(ledger_channel_id(key))
+
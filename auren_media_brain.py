@@ -15,16 +15,24 @@ Flujo:
    - Nivel 2: Modelos internos (scoring)
    - Nivel 3: Agentes operativos (Trend Oracle, Channel Judge, etc.)
    - Nivel 4: Salida JSON para Auto Gold
-   - Nivel 5: Bucle de aprendizaje (a futuro: escribe feedback)
+   - Nivel 5: Bucle de aprendizaje (log de decisiones: brain_decision_log.py)
 
 3) Devuelve un dict (JSON) con la ORDEN para generar un vídeo.
 """
 
+from __future__ import annotations
+
 from dataclasses import dataclass, asdict
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Mapping, Sequence, Tuple, Union
+import json
 import math
+import os
 import re
 from datetime import datetime
+from pathlib import Path
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 # ==========================================
@@ -53,41 +61,197 @@ class TopicCandidate:
     emotion: str             # "peligro_urgencia", "esperanza", etc.
 
 
-def simple_topic_score(t: TopicCandidate) -> float:
+# Pesos de los modelos de scoring (configurables por llamada: weights=...)
+TOPIC_WEIGHTS: Dict[str, float] = {
+    "base_money_score": 0.5,
+    "novelty": 0.3,
+    "competition": -0.2,
+}
+
+CHANNEL_WEIGHTS: Dict[str, float] = {
+    "ctr": 0.25,
+    "retention": 0.25,
+    "growth": 0.25,
+    "rpm": 0.25,
+    "revenue": 0.0,
+    "engagement": 0.0,
+}
+
+# Pesos aprendidos del rendimiento real (brain_learning.py → data/brain_weights.json).
+# Se cargan al arrancar; el learner los actualiza en caliente en estos mismos dicts.
+DEFAULT_TOPIC_WEIGHTS = dict(TOPIC_WEIGHTS)
+DEFAULT_CHANNEL_WEIGHTS = dict(CHANNEL_WEIGHTS)
+
+
+def _load_learned_weights() -> None:
+    try:
+        import brain_learning
+
+        learned = brain_learning.load_weights()
+    except Exception as e:
+        print(f"⚠️ No se pudieron cargar los pesos aprendidos del Brain: {e}")
+        return
+    if learned:
+        TOPIC_WEIGHTS.update(learned.get("topic", {}))
+        CHANNEL_WEIGHTS.update(learned.get("channel", {}))
+
+
+_load_learned_weights()
+
+
+def simple_topic_score(t: TopicCandidate, weights: Mapping[str, float] | None = None) -> float:
     """
     Modelo de Topic Scoring simplificado.
     Combina money_score + novelty – competition.
     Más adelante se puede sustituir por algo más serio
     (regresión, RL, etc.).
     """
-    money = t.base_money_score         # 0–100
-    novelty = t.novelty                # 0–100
-    comp = t.competition               # 0–100
+    w = weights or TOPIC_WEIGHTS
 
     # Queremos:
     # - money alto
     # - novelty medio/alto
     # - competencia razonable (no ultra saturado)
-    score = 0.5 * money + 0.3 * novelty - 0.2 * comp
+    score = sum(coef * getattr(t, field) for field, coef in w.items())
 
     # clamp
     return max(0.0, min(100.0, round(score, 1)))
 
 
-def simple_channel_score(c: ChannelInfo) -> float:
+def simple_channel_score(c: ChannelInfo, weights: Mapping[str, float] | None = None) -> float:
     """
     Modelo de Channel Evaluation simplificado.
     Combina CTR + retención + crecimiento + RPM.
     """
-    score = (
-        0.25 * c.ctr
-        + 0.25 * c.retention
-        + 0.25 * c.growth
-        + 0.25 * c.rpm
-    )
+    w = weights or CHANNEL_WEIGHTS
+    score = sum(coef * getattr(c, field) for field, coef in w.items())
     return max(0.0, min(100.0, round(score, 1)))
 
 
+# ==========================================
+# 🧮 MODO COLUMNAR (NumPy)
+# ==========================================
+# Para rankear miles / millones de candidatos: los topics y canales van como
+# structured arrays (una columna por campo) y el score es una suma ponderada
+# de columnas (vectorizada) + top-k con argpartition (sin ordenar todo).
+# numpy se importa solo aquí.
+
+TOPIC_FIELDS = ("base_money_score", "novelty", "competition")
+CHANNEL_FIELDS = ("ctr", "retention", "growth", "revenue", "rpm", "engagement")
+
+
+def topic_dtype() -> "np.dtype":
+    import numpy as np
+
+    return np.dtype([("topic", object)] + [(f, np.float64) for f in TOPIC_FIELDS] + [("emotion", object)])
+
+
+def channel_dtype() -> "np.dtype":
+    import numpy as np
+
+    return np.dtype(
+        [("name", object), ("niche", object), ("platform", object)]
+        + [(f, np.float64) for f in CHANNEL_FIELDS]
+    )
+
+
+def topics_to_array(topics: Sequence[TopicCandidate]) -> "np.ndarray":
+    import numpy as np
+
+    return np.array(
+        [(t.topic, *(getattr(t, f) for f in TOPIC_FIELDS), t.emotion) for t in topics],
+        dtype=topic_dtype(),
+    )
+
+
+def channels_to_array(channels: Sequence[ChannelInfo]) -> "np.ndarray":
+    import numpy as np
+
+    return np.array(
+        [(c.name, c.niche, c.platform, *(getattr(c, f) for f in CHANNEL_FIELDS)) for c in channels],
+        dtype=channel_dtype(),
+    )
+
+
+def _weighted_scores(arr: "np.ndarray", weights: Mapping[str, float]) -> "np.ndarray":
+    import numpy as np
+
+    # Mismo orden de suma que simple_*_score (sum() de izquierda a derecha): mismos floats,
+    # una pasada vectorizada por campo
+    score = np.zeros(len(arr), dtype=np.float64)
+    for f, coef in weights.items():
+        score += coef * np.asarray(arr[f], dtype=np.float64)
+
+    # np.round (×10 y al par) no coincide con round() de Python en los casi-empates
+    # (6.65 → 6.6 vs 6.7): esos pocos se redondean uno a uno, como en el modo clásico
+    rounded = np.round(score, 1)
+    scaled = score * 10
+    for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        rounded[i] = round(float(score[i]), 1)
+    return np.clip(rounded, 0.0, 100.0)
+
+
+def score_topics(arr: "np.ndarray", weights: Mapping[str, float] | None = None) -> "np.ndarray":
+    """Versión vectorizada de simple_topic_score para un structured array de topics."""
+    return _weighted_scores(arr, weights or TOPIC_WEIGHTS)
+
+
+def score_channels(arr: "np.ndarray", weights: Mapping[str, float] | None = None) -> "np.ndarray":
+    """Versión vectorizada de simple_channel_score para un structured array de canales."""
+    return _weighted_scores(arr, weights or CHANNEL_WEIGHTS)
+
+
+def top_k(scores: "np.ndarray", k: int) -> "np.ndarray":
+    """
+    Índices de los k mejores scores, de mayor a menor (empates → índice menor primero,
+    igual que el sort estable del modo clásico). O(n + k log k).
+    """
+    import numpy as np
+
+    n = len(scores)
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    if k == 1:
+        return np.array([np.argmax(scores)], dtype=np.intp)
+    if k < n:
+        # umbral del k-ésimo y todos los que lo igualan, para desempatar por índice
+        kth = np.partition(scores, n - k)[n - k]
+        idx = np.flatnonzero(scores >= kth)
+    else:
+        idx = np.arange(n)
+    order = np.lexsort((idx, -scores[idx]))
+    return idx[order[:k]]
+
+
+def rank_topics(
+    topics: Union[Sequence[TopicCandidate], "np.ndarray"],
+    k: int = 10,
+    weights: Mapping[str, float] | None = None,
+) -> List[Tuple[TopicCandidate, float]]:
+    """Top-k de topics (lista de dataclasses o structured array) con su score."""
+    arr = topics if hasattr(topics, "dtype") else topics_to_array(topics)
+    scores = score_topics(arr, weights)
+    return [(_topic_from_row(arr[i]), float(scores[i])) for i in top_k(scores, k)]
+
+
+def _topic_from_row(row: Any) -> TopicCandidate:
+    return TopicCandidate(
+        topic=str(row["topic"]),
+        emotion=str(row["emotion"]),
+        **{f: float(row[f]) for f in TOPIC_FIELDS},
+    )
+
+
+def _channel_from_row(row: Any) -> ChannelInfo:
+    return ChannelInfo(
+        name=str(row["name"]),
+        niche=str(row["niche"]),
+        platform=str(row["platform"]),
+        **{f: float(row[f]) for f in CHANNEL_FIELDS},
+    )
+
+
 def classify_channel(score: float) -> str:
     """
     GOD / GOOD / MID / DEAD según score.
@@ -202,20 +366,21 @@ def choose_platforms(channel: ChannelInfo) -> List[str]:
 
 
 # ==========================================
-# 🟥 NIVEL 5 — BUCLE (stub)
+# 🟥 NIVEL 5 — BUCLE
 # ==========================================
 
 def record_brain_decision(decision: Dict[str, Any]) -> None:
     """
-    Aquí en el futuro:
-    - guardar en DB
-    - escribir a un log
-    - alimentar un modelo de aprendizaje
-
-    Por ahora, lo dejamos como stub.
+    Registra la decisión (o el plan semanal) en el log append-only
+    (brain_decision_log.py): es el histórico del que aprende el bucle.
+    Un fallo al registrar nunca tumba al Brain.
     """
-    # TODO: conectar con tu sistema de logs / DB
-    pass
+    try:
+        import brain_decision_log
+
+        brain_decision_log.record(decision)
+    except Exception as e:
+        print(f"⚠️ No se pudo registrar la decisión del Brain: {e}")
 
 
 # ==========================================
@@ -223,8 +388,10 @@ def record_brain_decision(decision: Dict[str, Any]) -> None:
 # ==========================================
 
 def run_media_brain_once(
-    channels: List[ChannelInfo],
-    topics: List[TopicCandidate],
+    channels: Union[List[ChannelInfo], "np.ndarray"],
+    topics: Union[List[TopicCandidate], "np.ndarray"],
+    topic_weights: Mapping[str, float] | None = None,
+    channel_weights: Mapping[str, float] | None = None,
 ) -> Dict[str, Any]:
     """
     Función principal del BRAIN.
@@ -232,37 +399,56 @@ def run_media_brain_once(
     Recibe:
       - lista de canales disponibles (con métricas)
       - lista de temas candidatos (ya enriquecidos con money_score, etc.)
+      - opcional: pesos de los modelos de scoring (por defecto TOPIC_WEIGHTS / CHANNEL_WEIGHTS)
+
+    `channels` y `topics` también pueden ser structured arrays de NumPy
+    (channels_to_array / topics_to_array): modo columnar, un solo pase
+    vectorizado para millones de candidatos.
 
     Devuelve:
       - dict con el "plan de vídeo" para Auto Gold.
     """
 
-    if not channels:
+    if len(channels) == 0:
         raise ValueError("Debe haber al menos un canal definido para el Brain.")
 
-    if not topics:
+    if len(topics) == 0:
         raise ValueError("Debe haber al menos un topic candidato para el Brain.")
 
-    # 1) Scoring de canales
-    channel_scores = []
-    for ch in channels:
-        s = simple_channel_score(ch)
-        channel_scores.append((ch, s))
+    if hasattr(channels, "dtype") or hasattr(topics, "dtype"):
+        # Modo columnar: scoring vectorizado + top-1 sin ordenar
+        ch_arr = channels if hasattr(channels, "dtype") else channels_to_array(channels)
+        tp_arr = topics if hasattr(topics, "dtype") else topics_to_array(topics)
+
+        ch_scores = score_channels(ch_arr, channel_weights)
+        i = int(top_k(ch_scores, 1)[0])
+        best_channel, best_channel_score = _channel_from_row(ch_arr[i]), float(ch_scores[i])
+
+        tp_scores = score_topics(tp_arr, topic_weights)
+        j = int(top_k(tp_scores, 1)[0])
+        best_topic, best_topic_score = _topic_from_row(tp_arr[j]), float(tp_scores[j])
+    else:
+        # 1) Scoring de canales
+        channel_scores = []
+        for ch in channels:
+            s = simple_channel_score(ch, channel_weights)
+            channel_scores.append((ch, s))
+
+        # Escogemos el mejor canal (por ahora; luego se puede ponderar por nicho)
+        channel_scores.sort(key=lambda x: x[1], reverse=True)
+        best_channel, best_channel_score = channel_scores[0]
+
+        # 2) Scoring de topics
+        topic_scores = []
+        for tc in topics:
+            ts = simple_topic_score(tc, topic_weights)
+            topic_scores.append((tc, ts))
+
+        topic_scores.sort(key=lambda x: x[1], reverse=True)
+        best_topic, best_topic_score = topic_scores[0]
 
-    # Escogemos el mejor canal (por ahora; luego se puede ponderar por nicho)
-    channel_scores.sort(key=lambda x: x[1], reverse=True)
-    best_channel, best_channel_score = channel_scores[0]
     best_channel_label = classify_channel(best_channel_score)
 
-    # 2) Scoring de topics
-    topic_scores = []
-    for tc in topics:
-        ts = simple_topic_score(tc)
-        topic_scores.append((tc, ts))
-
-    topic_scores.sort(key=lambda x: x[1], reverse=True)
-    best_topic, best_topic_score = topic_scores[0]
-
     # 3) Decisiones de estilo, voz, miniatura, afiliado, etc.
     script_style = pick_script_style(best_topic, best_channel)
     voice = pick_voice(best_topic, best_channel)
@@ -294,6 +480,10 @@ def run_media_brain_once(
             "competition": best_topic.competition,
             "channel_score": best_channel_score,
             "channel_priority": best_channel_label,
+            # features en el momento de decidir: el bucle de aprendizaje las une
+            # con el rendimiento real del vídeo (brain_learning.py)
+            "topic_features": {f: getattr(best_topic, f) for f in TOPIC_FIELDS},
+            "channel_features": {f: getattr(best_channel, f) for f in CHANNEL_FIELDS},
             "generated_at": datetime.utcnow().isoformat() + "Z",
             "reason": (
                 f"Canal '{best_channel.name}' clasificado como {best_channel_label} "
@@ -302,7 +492,197 @@ def run_media_brain_once(
         },
     }
 
-    # Nivel 5 — registrar decisión (stub)
+    # Nivel 5 — registrar decisión
     record_brain_decision(decision)
 
     return decision
+
+
+# ==========================================
+# 📅 PLANIFICADOR SEMANAL (multi-vídeo, multi-canal)
+# ==========================================
+
+WEEK_DAYS = ("Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo")
+
+PLATFORM_LABELS = {
+    "youtube_shorts": "YouTube Shorts",
+    "tiktok": "TikTok",
+    "reels": "Instagram Reels",
+}
+
+
+def build_weekly_plan(
+    channels: Union[List[ChannelInfo], "np.ndarray"],
+    topics: Union[List[TopicCandidate], "np.ndarray"],
+    videos_per_day: int = 1,
+    days: Sequence[str] = WEEK_DAYS,
+    capacity: Mapping[str, int] | None = None,
+    max_emotion_share: float = 0.5,
+    plan_name: str | None = None,
+    timezone: str = "Europe/Madrid",
+    channel_meta: Mapping[str, Mapping[str, Any]] | None = None,
+    topic_weights: Mapping[str, float] | None = None,
+    channel_weights: Mapping[str, float] | None = None,
+    out_path: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Plan completo de la semana para TODOS los canales, en el formato de brain_plans/:
+
+    {
+      "plan_name": str, "timezone": str,
+      "channels": [
+        {"id", "name", "language", "country", "target_platform", "emotion_default",
+         "videos": [{"video_id", "topic", "emotion", "target_platform",
+                     "scheduled_day", "slot", "topic_score"}, ...]},
+        ...
+      ]
+    }
+
+    - Topics y canales se puntúan UNA vez (modo columnar) y se recorren en orden de score.
+    - `videos_per_day` vídeos por canal y día; `capacity` = máximo semanal por canal (por nombre).
+    - Diversidad: ningún topic se repite en el plan, una emoción no pasa de
+      `max_emotion_share` de los vídeos de un canal y no se repite en dos vídeos seguidos
+      (si no hay candidato que cumpla, se relaja la restricción de emoción).
+    - `channel_meta[nombre]` puede fijar language / country / id / emotion_default.
+    - `out_path`: además se guarda en disco para AUTO GOLD (--brain-plan). Con
+      .jsonl, en JSON Lines (brain_plan_stream.write_plan_jsonl: se lee en
+      streaming y se reanuda con cursor); si no, JSON clásico como brain_plans/.
+    """
+    if len(channels) == 0:
+        raise ValueError("Debe haber al menos un canal definido para el Brain.")
+
+    if len(topics) == 0:
+        raise ValueError("Debe haber al menos un topic candidato para el Brain.")
+
+    ch_arr = channels if hasattr(channels, "dtype") else channels_to_array(channels)
+    tp_arr = topics if hasattr(topics, "dtype") else topics_to_array(topics)
+    capacity = capacity or {}
+    channel_meta = channel_meta or {}
+
+    ch_scores = score_channels(ch_arr, channel_weights)
+    ch_order = top_k(ch_scores, len(ch_arr))
+    plan_channels = [_channel_from_row(ch_arr[i]) for i in ch_order]
+
+    # Ids de canal únicos: dos nombres con el mismo slug ("Auren Dinero" / "Auren Dinero!")
+    # no pueden compartir ids de vídeo (el ledger y la cola deduplican por video_id)
+    channel_ids: Dict[str, str] = {}
+    taken: set = set()
+    for ch in plan_channels:
+        base = channel_meta.get(ch.name, {}).get("id") or slugify(ch.name).replace("-", "_")
+        cid, n = base, 1
+        while cid in taken:
+            n += 1
+            cid = f"{base}_{n}"
+        taken.add(cid)
+        channel_ids[ch.name] = cid
+
+    quotas = {
+        ch.name: min(capacity.get(ch.name, videos_per_day * len(days)), videos_per_day * len(days))
+        for ch in plan_channels
+    }
+
+    # Candidatos: solo hace falta el top de tantos topics como huecos (+ margen para diversidad)
+    total_slots = sum(quotas.values())
+    tp_scores = score_topics(tp_arr, topic_weights)
+    cand = top_k(tp_scores, min(len(tp_arr), max(total_slots * 4, 64)))
+    cand_topics = [str(tp_arr[i]["topic"]) for i in cand]
+    cand_emotions = [str(tp_arr[i]["emotion"]) for i in cand]
+
+    used_topics: set = set()
+    cursor = 0  # todo lo anterior al cursor ya está usado
+    per_channel: Dict[str, List[Dict[str, Any]]] = {ch.name: [] for ch in plan_channels}
+    emotion_counts: Dict[str, Dict[str, int]] = {ch.name: {} for ch in plan_channels}
+
+    def _pick(ch_name: str) -> int | None:
+        nonlocal cursor
+        while cursor < len(cand) and cand_topics[cursor].lower() in used_topics:
+            cursor += 1
+        videos = per_channel[ch_name]
+        last_emotion = videos[-1]["emotion"] if videos else None
+        max_same = max(1, math.ceil(max_emotion_share * quotas[ch_name]))
+        fallback = None
+        for j in range(cursor, len(cand)):
+            if cand_topics[j].lower() in used_topics:
+                continue
+            if fallback is None:
+                fallback = j
+            emo = cand_emotions[j]
+            if emo != last_emotion and emotion_counts[ch_name].get(emo, 0) < max_same:
+                return j
+        return fallback
+
+    for day in days:
+        for ch in plan_channels:
+            for _ in range(videos_per_day):
+                if len(per_channel[ch.name]) >= quotas[ch.name]:
+                    break
+                j = _pick(ch.name)
+                if j is None:
+                    break
+                row = tp_arr[cand[j]]
+                topic = _topic_from_row(row)
+                used_topics.add(cand_topics[j].lower())
+                emotion_counts[ch.name][topic.emotion] = emotion_counts[ch.name].get(topic.emotion, 0) + 1
+                per_channel[ch.name].append(
+                    {
+                        "video_id": f"{channel_ids[ch.name]}_{len(per_channel[ch.name]) + 1:03d}",
+                        "topic": topic.topic,
+                        "emotion": topic.emotion,
+                        "target_platform": PLATFORM_LABELS.get(choose_platforms(ch)[0], choose_platforms(ch)[0]),
+                        "scheduled_day": day,
+                        "slot": guess_affiliate_tag(topic, ch),
+                        "topic_score": float(tp_scores[cand[j]]),
+                        "topic_features": {f: getattr(topic, f) for f in TOPIC_FIELDS},
+                    }
+                )
+
+    out_channels: List[Dict[str, Any]] = []
+    for ch, score in zip(plan_channels, (float(ch_scores[i]) for i in ch_order)):
+        meta = channel_meta.get(ch.name, {})
+        videos = per_channel[ch.name]
+        counts = emotion_counts[ch.name]
+        out_channels.append(
+            {
+                "id": channel_ids[ch.name],
+                "name": ch.name,
+                "language": meta.get("language", "es"),
+                "country": meta.get("country", "ES"),
+                "target_platform": PLATFORM_LABELS.get(choose_platforms(ch)[0], choose_platforms(ch)[0]),
+                "emotion_default": meta.get("emotion_default")
+                or (max(counts, key=counts.get) if counts else "aspiracional"),
+                "channel_score": score,
+                "channel_priority": classify_channel(score),
+                "channel_features": {f: getattr(ch, f) for f in CHANNEL_FIELDS},
+                "videos": videos,
+            }
+        )
+
+    plan = {
+        "plan_name": plan_name or f"Semana_{datetime.utcnow():%Y_%W}_Auren",
+        "timezone": timezone,
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "channels": out_channels,
+    }
+
+    # Nivel 5 — registrar plan
+    record_brain_decision(plan)
+
+    if out_path:
+        save_plan(plan, out_path)
+
+    return plan
+
+
+def save_plan(plan: Dict[str, Any], path: str) -> None:
+    """Guarda un plan (escritura atómica): JSON Lines si `path` es .jsonl, si no JSON clásico."""
+    from brain_plan_stream import is_jsonl, write_plan_jsonl
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    if is_jsonl(path):
+        write_plan_jsonl(plan, path)
+        return
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
@@ -0,0 +1,491 @@
+# auren_resilience.py
+"""
+⏱️ Deadlines + hedged requests para las llamadas remotas de AUTO GOLD
+(Spaces de HuggingFace y Groq).
+
+- Deadline por run y por etapa: se guarda en un ContextVar, así que se propaga
+  sola a todo lo que se llama dentro (también a los hilos de run_batch, que
+  copian el contexto). Un deadline interior nunca amplía uno exterior.
+
+      with deadline(300):                     # run completo
+          hedged_call("creative", fn, stage="creative")   # + tope de la etapa
+
+- Hedging: si la primera petición tarda más que el percentil configurado
+  (AUREN_HEDGE_PERCENTILE, p90 por defecto) de las latencias observadas,
+  se lanza una segunda idéntica y gana la primera respuesta buena.
+
+- Fallback local: si el tiempo que queda no llega ni para una llamada típica
+  (p50), se usa el fallback directamente en vez de esperar a la excepción.
+
+- Circuit breakers por endpoint (closed → open → half-open), con el estado
+  compartido en data/auren_circuits.json para que todos los workers / nodos
+  vean el mismo: con el circuito abierto la llamada cuesta milisegundos
+  (fallback inmediato) en vez de un timeout entero. El estado vive en memoria:
+  el fichero solo se escribe en las transiciones y se relee cada CB_REFRESH_S.
+
+      hedged_call("hub_media_plan", fn, breaker="hub:/media_plan", fallback=...)
+
+- Singleflight: peticiones idénticas en vuelo a la vez (mismo prompt, misma
+  lista de topics, misma búsqueda de Pexels) se agrupan en UNA llamada real
+  y todos los que esperan reciben su resultado.
+
+      singleflight(flight_key("hub_money_flow", topics, lang), fn)
+"""
+
+import contextvars
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+try:
+    import fcntl  # POSIX: estado de circuitos compartido entre procesos / nodos
+except ImportError:  # Windows → solo entre hilos
+    fcntl = None
+
+T = TypeVar("T")
+
+# ==========================================
+# ⚙️ CONFIG
+# ==========================================
+HEDGE_ENABLED = os.getenv("AUREN_HEDGE", "1").strip().lower() not in ("0", "false", "no", "off")
+HEDGE_PERCENTILE = float(os.getenv("AUREN_HEDGE_PERCENTILE", "0.9"))
+# Sin historial suficiente, esperamos esto antes de lanzar la segunda petición
+HEDGE_DEFAULT_DELAY_S = float(os.getenv("AUREN_HEDGE_DEFAULT_DELAY_S", "20"))
+HEDGE_MIN_SAMPLES = 10
+
+# Deadline de un run completo (0 = sin límite)
+RUN_DEADLINE_S = float(os.getenv("AUREN_RUN_DEADLINE_S", "0"))
+
+# Tope por etapa (segundos). Desactivados por defecto (0 = sin tope): un cold
+# start de un Space puede pasar del minuto. Se activan con JSON, p. ej.:
+#   AUREN_STAGE_DEADLINES='{"creative": 90, "hub_money_flow": 60, "hub_media_plan": 90,
+#                           "hub_quality": 90, "groq": 45}'
+def _load_stage_deadlines() -> Dict[str, float]:
+    raw = os.getenv("AUREN_STAGE_DEADLINES", "") or "{}"
+    try:
+        return {k: float(v) for k, v in json.loads(raw).items() if float(v) > 0}
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+        print(f"⚠️ AUREN_STAGE_DEADLINES no es válido ({e}). Sin topes por etapa.")
+        return {}
+
+
+STAGE_DEADLINES: Dict[str, float] = _load_stage_deadlines()
+
+# Hedging de Groq: cada petición de cobertura se paga (la perdedora no se cancela),
+# así que va aparte y desactivado por defecto.
+HEDGE_GROQ = os.getenv("AUREN_HEDGE_GROQ", "0").strip().lower() not in ("0", "false", "no", "off")
+
+# Circuit breakers: fallos seguidos para abrir y segundos abierto antes de probar
+CB_FAILURES = int(os.getenv("AUREN_CB_FAILURES", "5"))
+CB_OPEN_S = float(os.getenv("AUREN_CB_OPEN_S", "60"))
+CB_STATE_PATH = Path(os.getenv("AUREN_CIRCUIT_STATE_PATH", "data/auren_circuits.json"))
+# Cada cuánto se relee el estado compartido (las transiciones sí se escriben al momento)
+CB_REFRESH_S = float(os.getenv("AUREN_CB_REFRESH_S", "2"))
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("auren_deadline", default=None)
+
+# Hilos para las peticiones (y sus hedges). Las peticiones perdedoras no se pueden
+# cancelar: terminan en segundo plano y su resultado se descarta.
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("AUREN_HEDGE_THREADS", "16")), thread_name_prefix="auren-remote")
+
+
+class DeadlineExceeded(TimeoutError):
+    """No hubo respuesta buena antes del deadline."""
+
+
+class CircuitOpen(RuntimeError):
+    """El circuito del endpoint está abierto y no hay fallback."""
+
+
+# ==========================================
+# ⏳ DEADLINES
+# ==========================================
+
+@contextmanager
+def deadline(seconds: float | None) -> Iterator[None]:
+    """Limita el bloque a `seconds` (None / 0 → sin límite nuevo)."""
+    if not seconds:
+        yield
+        return
+
+    new = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(new if current is None else min(current, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> float | None:
+    """Segundos que quedan hasta el deadline actual (None si no hay)."""
+    current = _deadline.get()
+    if current is None:
+        return None
+    return max(0.0, current - time.monotonic())
+
+
+def stage_timeout(stage: str) -> float | None:
+    """Timeout efectivo para una etapa: el menor entre su tope y lo que queda de run."""
+    limits = [t for t in (STAGE_DEADLINES.get(stage), time_left()) if t is not None]
+    return min(limits) if limits else None
+
+
+def with_run_deadline(fn: Callable[..., T]) -> Callable[..., T]:
+    """
+    Decorador: ejecuta `fn` dentro de un deadline de run.
+    Acepta `deadline_s=` extra (por defecto AUREN_RUN_DEADLINE_S).
+    """
+    @functools.wraps(fn)
+    def wrapper(*args: Any, deadline_s: float | None = None, **kwargs: Any) -> T:
+        with deadline(RUN_DEADLINE_S if deadline_s is None else deadline_s):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+# ==========================================
+# 📈 LATENCIAS OBSERVADAS
+# ==========================================
+
+_latencies: Dict[str, Deque[float]] = {}
+_latencies_lock = threading.Lock()
+
+
+def observe(key: str, seconds: float) -> None:
+    with _latencies_lock:
+        _latencies.setdefault(key, deque(maxlen=200)).append(seconds)
+
+
+def percentile(key: str, p: float) -> float | None:
+    """Percentil `p` (0–1) de las últimas latencias de `key` (None si hay pocas muestras)."""
+    with _latencies_lock:
+        samples = sorted(_latencies.get(key, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+def deadline_at_risk(key: str, stage: str | None = None) -> bool:
+    """True si el tiempo que queda no llega para una llamada típica (p50) de `key`."""
+    remaining = stage_timeout(stage) if stage else time_left()
+    if remaining is None:
+        return False
+    typical = percentile(key, 0.5)
+    return remaining <= (typical if typical is not None else 0.0)
+
+
+# ==========================================
+# 🔌 CIRCUIT BREAKERS (estado compartido)
+# ==========================================
+
+_cb_lock = threading.Lock()
+# Copia en memoria del estado compartido: {"states": {...}, "loaded_at": monotonic}
+_cb_cache: Dict[str, Any] = {"states": {}, "loaded_at": None}
+
+
+def _read_states() -> Dict[str, Dict[str, Any]]:
+    try:
+        return json.loads(CB_STATE_PATH.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _cached_states() -> Dict[str, Dict[str, Any]]:
+    """Estado de los circuitos sin tocar disco salvo cada CB_REFRESH_S (sin lock de fichero)."""
+    with _cb_lock:
+        loaded_at = _cb_cache["loaded_at"]
+        if loaded_at is None or time.monotonic() - loaded_at >= CB_REFRESH_S:
+            # os.replace es atómico: leer sin flock ve el fichero viejo o el nuevo, nunca uno a medias
+            _cb_cache.update(states=_read_states(), loaded_at=time.monotonic())
+        return _cb_cache["states"]
+
+
+@contextmanager
+def _circuit_states() -> Iterator[Dict[str, Dict[str, Any]]]:
+    """
+    Estado de todos los circuitos, con lock entre hilos + lock de fichero entre
+    procesos, para las transiciones. Si el bloque lo modifica, se guarda
+    (escritura atómica). En ambos casos refresca la copia en memoria.
+    """
+    with _cb_lock:
+        lock_file = None
+        if fcntl is not None:
+            CB_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            lock_file = open(f"{CB_STATE_PATH}.lock", "a+")
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            states = _read_states()
+            before = json.dumps(states, sort_keys=True)
+
+            yield states
+
+            if json.dumps(states, sort_keys=True) != before:
+                CB_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                tmp = CB_STATE_PATH.with_name(f"{CB_STATE_PATH.name}.{os.getpid()}.tmp")
+                tmp.write_text(json.dumps(states, ensure_ascii=False, indent=2), encoding="utf-8")
+                os.replace(tmp, CB_STATE_PATH)
+            _cb_cache.update(states=json.loads(json.dumps(states)), loaded_at=time.monotonic())
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                lock_file.close()
+
+
+class CircuitBreaker:
+    """
+    closed    → todo pasa; CB_FAILURES fallos seguidos → open
+    open      → nada pasa (fallback inmediato) durante CB_OPEN_S
+    half-open → pasa UNA petición de prueba (un solo worker en todo el cluster);
+                si va bien → closed, si falla → open otra vez
+
+    El camino normal (circuito cerrado, llamada correcta) no toca disco: los
+    fallos seguidos se cuentan en memoria (por proceso) y solo las transiciones
+    (open / half-open / closed) se escriben en el fichero compartido.
+    """
+
+    def __init__(self, name: str, failure_threshold: int | None = None, open_seconds: float | None = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or CB_FAILURES
+        self.open_seconds = open_seconds or CB_OPEN_S
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    def _shared(self) -> Dict[str, Any]:
+        return _cached_states().get(self.name) or {"state": "closed"}
+
+    def state(self) -> str:
+        return self._shared().get("state", "closed")
+
+    def allow(self) -> bool:
+        now = time.time()
+        st = self._shared()
+        if st["state"] == "closed":
+            return True
+        if st["state"] == "open" and now - st["opened_at"] < self.open_seconds:
+            return False
+        if st["state"] == "half_open" and now < st.get("probe_until", 0):
+            return False  # otro worker ya está probando
+
+        # Transición a half-open: se decide con el fichero bloqueado (una sola prueba en el cluster)
+        with _circuit_states() as states:
+            st = states.get(self.name)
+            if not st or st["state"] == "closed":
+                return True
+            if st["state"] == "open" and now - st["opened_at"] < self.open_seconds:
+                return False
+            if st["state"] == "half_open" and now < st.get("probe_until", 0):
+                return False
+            st.update(state="half_open", probe_until=now + self.open_seconds)
+        print(f"🔌 {self.name}: circuito half-open, lanzamos petición de prueba.")
+        return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+        if self.state() == "closed":
+            return
+        with _circuit_states() as states:
+            st = states.get(self.name)
+            if st and st["state"] != "closed":
+                print(f"🔌 {self.name}: circuito cerrado de nuevo.")
+                states[self.name] = {"state": "closed"}
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            failures = self._failures
+        if self.state() != "half_open" and failures < self.failure_threshold:
+            return
+        with _circuit_states() as states:
+            st = states.setdefault(self.name, {"state": "closed"})
+            if st["state"] != "open":
+                print(f"🔌 {self.name}: circuito ABIERTO tras {failures} fallos ({self.open_seconds:.0f}s).")
+            st.update(state="open", opened_at=time.time(), failures=failures)
+            st.pop("probe_until", None)
+        with self._lock:
+            self._failures = 0
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def circuit(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def circuit_states() -> Dict[str, Dict[str, Any]]:
+    """Copia del estado compartido de todos los circuitos (para logs / dashboards)."""
+    return json.loads(json.dumps(_cached_states()))
+
+
+# ==========================================
+# 🪁 HEDGED CALL
+# ==========================================
+
+def hedged_call(
+    key: str,
+    fn: Callable[[], T],
+    stage: str | None = None,
+    validate: Callable[[T], bool] | None = None,
+    fallback: Callable[[], T] | None = None,
+    hedge: bool | None = None,
+    breaker: str | None = None,
+) -> T:
+    """
+    Ejecuta `fn` con deadline y (opcionalmente) una segunda petición de cobertura.
+
+    - `key`: nombre para las latencias (p. ej. "hub_media_plan").
+    - `stage`: tope de STAGE_DEADLINES que aplica (además del deadline del run).
+    - `validate`: una respuesta que no lo pasa cuenta como fallo.
+    - `fallback`: respuesta local si el deadline está en riesgo, se agota,
+      el circuito está abierto o fallan todas las peticiones.
+      Sin fallback → DeadlineExceeded / CircuitOpen / última excepción.
+    - `breaker`: nombre del circuit breaker del endpoint (None → sin breaker).
+    """
+    cb = circuit(breaker) if breaker else None
+    if cb is not None and not cb.allow():
+        if fallback is not None:
+            return fallback()
+        raise CircuitOpen(f"{breaker}: circuito abierto.")
+
+    if fallback is not None and deadline_at_risk(key, stage):
+        print(f"⏱️ {key}: deadline en riesgo ({stage_timeout(stage or '')}s). Usamos el fallback local.")
+        return fallback()
+
+    timeout = stage_timeout(stage) if stage else time_left()
+    hedge = HEDGE_ENABLED if hedge is None else hedge
+    hedge_delay = percentile(key, HEDGE_PERCENTILE) or HEDGE_DEFAULT_DELAY_S
+
+    def _submit() -> Future:
+        ctx = contextvars.copy_context()  # deadline + agent_scope viajan al hilo
+        started = time.monotonic()
+
+        def _timed() -> T:
+            result = ctx.run(fn)
+            observe(key, time.monotonic() - started)
+            return result
+
+        return _pool.submit(_timed)
+
+    t0 = time.monotonic()
+    pending = {_submit()}
+    hedged = False
+    last_error: BaseException | None = None
+
+    while pending:
+        remaining = None if timeout is None else timeout - (time.monotonic() - t0)
+        if remaining is not None and remaining <= 0:
+            break
+
+        wait_for = remaining
+        if hedge and not hedged:
+            until_hedge = hedge_delay - (time.monotonic() - t0)
+            wait_for = until_hedge if wait_for is None else min(wait_for, until_hedge)
+
+        done, pending = wait(pending, timeout=max(0.0, wait_for) if wait_for is not None else None,
+                             return_when=FIRST_COMPLETED)
+
+        for fut in done:
+            try:
+                result = fut.result()
+            except Exception as e:
+                last_error = e
+                continue
+            if validate is None or validate(result):
+                if cb is not None:
+                    cb.record_success()
+                return result
+            last_error = ValueError(f"{key}: respuesta no válida")
+
+        # Solo se cubre la lentitud: un error rápido (p. ej. rate limit) no se repite aquí
+        if pending and hedge and not hedged and time.monotonic() - t0 >= hedge_delay:
+            hedged = True
+            print(f"🪁 {key}: sin respuesta en {hedge_delay:.1f}s. Lanzamos petición de cobertura.")
+            pending.add(_submit())
+
+    if cb is not None:
+        cb.record_failure()
+    if fallback is not None:
+        print(f"⏱️ {key}: sin respuesta buena a tiempo ({last_error or 'deadline'}). Usamos el fallback local.")
+        return fallback()
+    if last_error is not None and not isinstance(last_error, ValueError):
+        raise last_error
+    raise DeadlineExceeded(f"{key}: sin respuesta antes del deadline ({timeout}s).")
+
+
+# ==========================================
+# 🛬 SINGLEFLIGHT (peticiones idénticas en vuelo)
+# ==========================================
+
+class _Flight:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+_flight_stats: Dict[str, Dict[str, int]] = {}
+
+
+def flight_key(*parts: Any) -> str:
+    """Clave estable para singleflight a partir de cualquier cosa serializable."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    prefix = str(parts[0]) if parts else "call"
+    return f"{prefix}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+def singleflight(key: str, fn: Callable[[], T]) -> T:
+    """
+    Si ya hay una llamada con `key` en vuelo, espera a ella y devuelve su
+    resultado (o relanza su excepción); si no, ejecuta `fn`.
+    Solo agrupa llamadas SIMULTÁNEAS: no es una caché.
+    El resultado se comparte tal cual: quien lo reciba no debe mutarlo.
+    """
+    prefix = key.split(":", 1)[0]
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+        stats = _flight_stats.setdefault(prefix, {"calls": 0, "coalesced": 0})
+        stats["calls"] += 1
+        stats["coalesced"] += int(not leader)
+
+    if not leader:
+        flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = fn()
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.event.set()
+
+
+def singleflight_stats() -> Dict[str, Dict[str, int]]:
+    """{prefijo: {"calls", "coalesced"}}: cuántas llamadas se ahorraron por agrupación."""
+    with _flights_lock:
+        return {k: dict(v) for k, v in _flight_stats.items()}
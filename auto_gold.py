@@ -11,53 +11,45 @@
 #
 # Se ejecuta fuera de Hugging (GitHub Actions o tu PC).
 
+from __future__ import annotations
+
 import os
 import json
-from typing import List, Dict, Any
-
-from gradio_client import Client
-import requests  # 👈 para Pexels / Pixabay
-
-from agents.topic_scout import discover_hot_seeds
-from agents.channel_router import pick_next_job
-from topic_memory import mark_used
-from auren_brain_adapter import maybe_enrich_with_brain, load_brain_plan, pick_video_from_brain
-from vault.vault_media import load_vault, suggest_offer_for_video
+import signal
+import threading
+from dataclasses import asdict
+from typing import TYPE_CHECKING, List, Dict, Any
+
+# ⚡ Arranque rápido: gradio_client, requests y los agentes (→ groq) se importan
+# la primera vez que se usan, no al cargar el módulo (ver bench_startup.py).
+if TYPE_CHECKING:
+    from gradio_client import Client
+
+import job_queue
+from agents.topic_scout import TopicSeed, discover_hot_seeds
+from agents.channel_router import pick_next_job, pick_next_jobs
+from topic_memory import is_used, mark_used
+from auren_brain_adapter import (
+    fetch_brain_plan,
+    ledger_channel_id,
+    maybe_enrich_with_brain,
+    pending_plan_file_videos,
+    plan_file_key,
+)
+from vault import vault_cache
+from vault import vault_engine
+from agents.registry import call_agent, run_batch
+from agents.auren_llm import format_llm_metrics, llm_metrics
+from auren_resilience import flight_key, hedged_call, singleflight, singleflight_stats, with_run_deadline
+from quality_gate import GATE_ENABLED as QUALITY_GATE_ENABLED, MIN_SCORE as QUALITY_MIN_SCORE, gate_script
+from run_profiles import ALL_STAGES, profile_for_channel, stages_for_run
 
 # ==============================
-# IMPORT: AUREN AGENTS (carpeta /agents)
+# AUREN AGENTS (carpeta /agents)
 # ==============================
-
-# ------------- FÁBRICA (CREATIVE + FINAL) -------------
-from agents.angle_master import run_agent as run_angle_master
-from agents.script_doctor import run_agent as run_script_doctor
-from agents.clip_splitter import run_agent as run_clip_splitter
-from agents.title_lab import run_agent as run_title_lab
-from agents.platform_translator import run_agent as run_platform_translator
-
-# ------------- MONEY / AFILIADOS -------------
-from agents.hotmart_engine import run_agent as run_hotmart_engine
-from agents.saas_engine import run_agent as run_saas_engine
-
-# ------------- CRECIMIENTO Y OPTIMIZACIÓN -------------
-from agents.hook_engine import run_agent as run_hook_engine
-from agents.novelty_detector import run_agent as run_novelty_detector
-from agents.opportunity_scorer import run_agent as run_opportunity_scorer
-from agents.content_gap_hunter import run_agent as run_content_gap_hunter
-from agents.hashtag_engine import run_agent as run_hashtag_engine
-from agents.description_engine import run_agent as run_description_engine
-
-from agents.upload_scheduler import run_agent as run_upload_scheduler
-from agents.retention_analyzer import run_agent as run_retention_analyzer
-from agents.ctr_forecaster import run_agent as run_ctr_forecaster
-from agents.content_performance import run_agent as run_content_performance
-
-# ------------- DASHBOARD -------------
-from agents.dashboard_engine import run_agent as run_dashboard_engine
-
-# ------------- **BRAIN (NUEVOS)** -------------
-from agents.trend_oracle import run_agent as run_trend_oracle
-from agents.channel_evaluator import run_agent as run_channel_evaluator
+# Los agentes se declaran en agents/registry.py (inputs, outputs, caché, tier,
+# max_tokens) y se llaman por nombre con call_agent / run_batch: el módulo se
+# importa en el primer uso y los agentes independientes corren en paralelo.
 
 
 # ==============================
@@ -120,8 +112,7 @@ def slugify(text: str) -> str:
 HUB_SPACE_ID = os.getenv("AUREN_HUB_SPACE_ID", "Mariapc601/AUREN-API-HUB").strip()
 CREATIVE_SPACE_ID = os.getenv("AUREN_CREATIVE_SPACE_ID", "Mariapc601/AUREN-CREATIVE-ENGINE").strip()
 
-# MEDIA BRAIN (Space opcional)
-BRAIN_SPACE_ID = os.getenv("AUREN_BRAIN_SPACE_ID", "").strip()
+# MEDIA BRAIN (Space opcional): AUREN_BRAIN_SPACE_ID, cliente y caché en auren_brain_adapter.py
 
 # Render Server (cola de vídeo)
 RENDER_URL = os.getenv(
@@ -132,41 +123,45 @@ RENDER_URL = os.getenv(
 # Si tus Spaces son privados, usamos HF_TOKEN del entorno.
 HF_TOKEN = os.getenv("HF_TOKEN", "").strip()
 
+# Títulos + descripción + hashtags en una sola llamada (AUREN_PUBLISH_PACK).
+# Los campos que no validen se piden a TITLE_LAB / DESCRIPTION_ENGINE / HASHTAG_ENGINE.
+FUSED_METADATA = os.getenv("AUREN_FUSED_METADATA", "1").strip().lower() not in ("0", "false", "no", "off")
 
-def get_client(space_id: str) -> Client:
-    """
-    Crea un cliente gradio_client para un Space.
-    Si existe HF_TOKEN, lo dejamos en la variable de entorno
-    (gradio_client la usa internamente).
-    """
-    if HF_TOKEN:
-        os.environ["HF_TOKEN"] = HF_TOKEN
-    return Client(space_id)
+# Con más topics candidatos que esto, el modelo local (money_model.py) pre-rankea
+# y solo los mejores van al HUB /topic_money_flow. MIND da como mucho 7 topics
+# (mind_discover_topics): con 5, los 2 de menor money_score estimado no se piden
+# al HUB. 0 = sin pre-ranking.
+MONEY_PRERANK_MAX = int(os.getenv("AUREN_MONEY_PRERANK_MAX", "5"))
 
+# Vídeos de un plan del Brain que se encolan por run (0 = todos los pendientes)
+BRAIN_PLAN_BATCH = int(os.getenv("AUREN_BRAIN_PLAN_BATCH", "0"))
 
-# Cliente cacheado para el BRAIN (para no crearlo mil veces)
-_brain_client: Client | None = None
 
+# Clientes gradio cacheados por Space: en modo worker se reutilizan entre jobs
+_clients: Dict[str, Client] = {}
+_clients_lock = threading.Lock()
 
-def get_brain_client() -> Client | None:
-    global _brain_client
 
-    if not BRAIN_SPACE_ID:
-        return None
+def get_client(space_id: str) -> Client:
+    """
+    Devuelve un cliente gradio_client para un Space (creado una sola vez por proceso).
+    Si existe HF_TOKEN, lo dejamos en la variable de entorno
+    (gradio_client la usa internamente).
+    """
+    client = _clients.get(space_id)
+    if client is not None:
+        return client
 
-    if _brain_client is not None:
-        return _brain_client
+    with _clients_lock:
+        client = _clients.get(space_id)
+        if client is None:
+            from gradio_client import Client
 
-    try:
-        if HF_TOKEN:
-            os.environ["HF_TOKEN"] = HF_TOKEN
-        _brain_client = Client(BRAIN_SPACE_ID)
-        # El propio gradio_client ya imprime el "Loaded as API: ..."
-        return _brain_client
-    except Exception as e:
-        print(f"⚠️ Error cargando AUREN-MEDIA-BRAIN ({BRAIN_SPACE_ID}): {e}")
-        _brain_client = None
-        return None
+            if HF_TOKEN:
+                os.environ["HF_TOKEN"] = HF_TOKEN
+            client = Client(space_id)
+            _clients[space_id] = client
+        return client
 
 
 # ======================================
@@ -190,22 +185,16 @@ def brain_enrich_plan(
     Depende de que el Space exponga un endpoint `brain_plan`.
     Si algo falla, devuelve None y AUTO GOLD sigue como siempre.
     """
-    client = get_brain_client()
-    if client is None:
-        return None
-
     try:
-        result = client.predict(
-            channel_name or "",
-            seed_topic,
-            topic_slug,
-            niche,
-            country,
-            language,
-            api_name="brain_plan",  # 👉 endpoint que tendrá el Space del Brain
+        # Caché compartida con maybe_enrich_with_brain: como mucho una llamada por run
+        return fetch_brain_plan(
+            channel_name=channel_name,
+            seed_topic=seed_topic,
+            topic_slug=topic_slug,
+            niche=niche,
+            country=country,
+            language=language,
         )
-        # Puede devolver dict o string; lo tratamos luego
-        return result
     except Exception as e:
         print(f"⚠️ Error llamando a AUREN MEDIA BRAIN (brain_plan): {e}")
         return None
@@ -309,29 +298,77 @@ def mind_discover_topics(
 
 def hub_topic_money_flow(topics: List[str], lang: str = "es") -> List[Dict[str, Any]]:
     """
-    Llama al endpoint /topic_money_flow del HUB y devuelve SIEMPRE una lista de dicts.
-    Cada dict incluye: topic, views_30d, intent, ads_density, money_score.
+    Llama al endpoint /topic_money_flow del HUB y devuelve SIEMPRE una lista de dicts
+    (mismo orden que `topics`). Cada dict incluye: topic, views_30d, intent, ads_density, money_score.
+
+    - Topics puntuados hace menos de AUREN_MONEY_CACHE_TTL_S → caché, sin HUB.
+    - Solo los que faltan van al HUB; sus filas se guardan en caché (y entrenan el modelo local).
+    - Si el HUB está caído (circuito abierto, deadline o error), usa el modelo local (money_model.py).
     """
-    client = get_client(HUB_SPACE_ID)
-    topics_json = json.dumps(topics, ensure_ascii=False)
+    import money_model
 
-    result = client.predict(
-        topics_json,
-        lang,
-        api_name="/topic_money_flow",
-    )
+    hits, misses = money_model.cache_lookup(topics, lang)
+    if not misses:
+        return [hits[t] for t in topics]
 
-    # HUB actual devuelve lista directa
-    if isinstance(result, list):
-        return result
+    topics_json = json.dumps(misses, ensure_ascii=False)
 
-    # Por si en el futuro volvemos a {"results": [...]}
-    if isinstance(result, dict) and isinstance(result.get("results"), list):
-        return result["results"]
+    def _normalize(result: Any) -> List[Dict[str, Any]] | None:
+        # HUB actual devuelve lista directa
+        if isinstance(result, list):
+            return result
+        # Por si en el futuro volvemos a {"results": [...]}
+        if isinstance(result, dict) and isinstance(result.get("results"), list):
+            return result["results"]
+        return None
 
-    raise RuntimeError(
-        f"Respuesta inesperada de topic_money_flow: tipo {type(result)} | contenido: {str(result)[:200]}"
+    # Misma lista de topics en vuelo desde otro worker → una sola llamada al HUB
+    result = singleflight(
+        flight_key("hub_money_flow", topics_json, lang),
+        lambda: hedged_call(
+            "hub_money_flow",
+            lambda: get_client(HUB_SPACE_ID).predict(
+                topics_json,
+                lang,
+                api_name="/topic_money_flow",
+            ),
+            stage="hub_money_flow",
+            breaker="hub:/topic_money_flow",
+            validate=lambda r: _normalize(r) is not None,
+            fallback=lambda: local_topic_money_flow(misses, lang=lang),
+        ),
     )
+    rows = _normalize(result) or []
+
+    # Filas emparejadas por su propio "topic" (nunca por posición): si el HUB
+    # omite o reordena alguna, ese topic cae al modelo local y no se cachea.
+    wanted = {t.strip().lower(): t for t in misses}
+    fresh: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        if not isinstance(row, dict) or not isinstance(row.get("topic"), str):
+            continue
+        t = wanted.get(row["topic"].strip().lower())
+        if t is not None and t not in fresh:
+            fresh[t] = {**row, "topic": t}
+    # cache_store ignora las filas estimadas en local (fallback)
+    money_model.cache_store(list(fresh.values()), lang)
+
+    by_topic = {**hits, **fresh}
+    missing = [t for t in topics if t not in by_topic]
+    if missing:
+        by_topic.update(zip(missing, local_topic_money_flow(missing, lang=lang)))
+    return [by_topic[t] for t in topics]
+
+
+def local_topic_money_flow(topics: List[str], lang: str = "es") -> List[Dict[str, Any]]:
+    """
+    Scoring local (sin HUB) con la misma forma de salida que /topic_money_flow:
+    modelo NumPy ajustado con respuestas cacheadas del HUB, o heurística por
+    palabras clave si aún no hay datos.
+    """
+    import money_model
+
+    return money_model.local_rows(topics, lang=lang)
 
 
 # ============================================================
@@ -349,12 +386,21 @@ def hub_media_plan(script: str, want_thumb: bool, want_broll: bool) -> Dict[str,
       "raw": respuesta_original
     }
     """
-    client = get_client(HUB_SPACE_ID)
-    result = client.predict(
-        script.strip(),
-        bool(want_thumb),
-        bool(want_broll),
-        api_name="/media_plan",
+    result = singleflight(
+        flight_key("hub_media_plan", script.strip(), bool(want_thumb), bool(want_broll)),
+        lambda: hedged_call(
+            "hub_media_plan",
+            lambda: get_client(HUB_SPACE_ID).predict(
+                script.strip(),
+                bool(want_thumb),
+                bool(want_broll),
+                api_name="/media_plan",
+            ),
+            stage="hub_media_plan",
+            breaker="hub:/media_plan",
+            # Sin tiempo para el HUB: el informe sigue, sin plan de producción
+            fallback=lambda: "⚠️ /media_plan no disponible (deadline o circuito abierto): plan de producción omitido.",
+        ),
     )
 
     # String plano
@@ -412,11 +458,19 @@ def hub_quality_analyze(script: str, tipo: str) -> Dict[str, Any]:
       "suggestions": list[str]
     }
     """
-    client = get_client(HUB_SPACE_ID)
-    result = client.predict(
-        script,
-        tipo,
-        api_name="/quality_analyze",
+    result = singleflight(
+        flight_key("hub_quality", script, tipo),
+        lambda: hedged_call(
+            "hub_quality",
+            lambda: get_client(HUB_SPACE_ID).predict(
+                script,
+                tipo,
+                api_name="/quality_analyze",
+            ),
+            stage="hub_quality",
+            breaker="hub:/quality_analyze",
+            fallback=lambda: "⚠️ /quality_analyze no disponible (deadline o circuito abierto): QA omitido.",
+        ),
     )
 
     if isinstance(result, str):
@@ -457,22 +511,34 @@ def creative_generate_script(topic: str, emotion: str, platform: str, audience:
     if not audience or audience.strip() == "":
         audience = "jóvenes 18-30 años de España que quieren dinero y libertad usando IA y negocios online"
 
-    # 1) Intento normal: Space remoto
+    # 1) Intento normal: Space remoto (con deadline + hedge; si el deadline
+    #    está en riesgo, directamente el fallback local)
     if CREATIVE_SPACE_ID:
         try:
-            result = run_creative_engine({
-                "topic": topic,
-                "emotion": emotion,
-                "platform": platform,
-                "audience": audience,
-            })
-            return result
+            return hedged_call(
+                "creative",
+                lambda: run_creative_engine({
+                    "topic": topic,
+                    "emotion": emotion,
+                    "platform": platform,
+                    "audience": audience,
+                }),
+                stage="creative",
+                breaker="space:creative",
+                validate=lambda text: bool(text and text.strip()),
+                fallback=lambda: creative_fallback_script(topic),
+            )
 
         except Exception as e:
             # Log técnico solo en consola, no en el guion
             print(f"⚠️ Error llamando a AUREN-CREATIVE-ENGINE ({CREATIVE_SPACE_ID}):", e)
 
-    # 2) FALLBACK LOCAL — Guion limpio y usable
+    # 2) FALLBACK LOCAL
+    return creative_fallback_script(topic)
+
+
+def creative_fallback_script(topic: str) -> str:
+    """Guion limpio y usable sin llamar a ningún Space."""
     hook = (
         f"Nadie te explicó de verdad qué es {topic}, pero cada día que no entiendes esto,"
         " alguien gana dinero a tu costa."
@@ -504,6 +570,13 @@ Así que la próxima vez que escuches {topic}, no huyas: respira hondo, entiende
 
 def download_video(url: str, save_path: str):
     """Descarga un archivo de vídeo desde una URL a la ruta indicada."""
+    # Dos hilos pidiendo el mismo fichero en la misma ruta → una sola descarga
+    return singleflight(flight_key("download", url, save_path), lambda: _download_video(url, save_path))
+
+
+def _download_video(url: str, save_path: str):
+    import requests
+
     try:
         r = requests.get(url, stream=True, timeout=10)
         r.raise_for_status()
@@ -531,6 +604,20 @@ def extract_keywords_from_plan(plan: str) -> list[str]:
     return list(set(keywords))[:10]   # máximo 10
 
 
+def stock_search(url: str, headers: Dict[str, str] | None = None) -> Dict[str, Any]:
+    """
+    GET JSON de búsqueda de stock (Pexels / Pixabay). Búsquedas idénticas en
+    vuelo a la vez (misma keyword desde varios topics / workers) se agrupan.
+    """
+    import requests
+
+    def _get() -> Dict[str, Any]:
+        r = requests.get(url, headers=headers, timeout=10)
+        return r.json()
+
+    return singleflight(flight_key("stock_search", url), _get)
+
+
 def pexels_search_and_download(keywords: list[str], target_folder: str, max_videos: int = 5):
     api_key = os.getenv("PEXELS_API_KEY", "")
     if not api_key:
@@ -543,8 +630,7 @@ def pexels_search_and_download(keywords: list[str], target_folder: str, max_vide
     for kw in keywords:
         url = f"https://api.pexels.com/videos/search?query={kw}&per_page=2"
         try:
-            r = requests.get(url, headers=headers, timeout=10)
-            data = r.json()
+            data = stock_search(url, headers=headers)
             for video in data.get("videos", []):
                 file_url = video["video_files"][0]["link"]
                 file_name = f"{kw}_{video['id']}.mp4"
@@ -570,8 +656,7 @@ def pixabay_search_and_download(keywords: list[str], target_folder: str, max_vid
     for kw in keywords:
         url = f"https://pixabay.com/api/videos/?key={api_key}&q={kw}&per_page=2"
         try:
-            r = requests.get(url, timeout=10)
-            data = r.json()
+            data = stock_search(url)
             for hit in data.get("hits", []):
                 file_url = hit["videos"]["medium"]["url"]
                 file_name = f"{kw}_{hit['id']}.mp4"
@@ -637,6 +722,8 @@ def send_to_render_server(
         "assets_folder": assets_folder,  # 👈 se manda al Render Server
     }
 
+    import requests
+
     try:
         r = requests.post(RENDER_URL, json=payload, timeout=20)
         r.raise_for_status()
@@ -665,25 +752,59 @@ def send_to_render_server(
 # 🔐 VAULT / Helper simple y alineado con la firma real
 # ============================================================
 
-def pick_offer_for_video(niche: str, topic: str, country_code: str):
+def pick_offer_for_video(
+    niche: str,
+    topic: str,
+    country_code: str,
+    channel_name: str | None = None,
+    affiliate_slot: str | None = None,
+    script: str = "",
+):
     """
-    Helper que carga el Vault y llama a `suggest_offer_for_video`
-    con la firma real (vault, niche, topic, country_code).
+    Mejor oferta del Vault unificado (vault_media + affiliates, ver vault/vault_engine.py)
+    para un vídeo: override de canal → slot → topic / nicho / guion, filtrado por país.
+    Con `script` (guion V2) el matching usa también el texto del guion.
     """
-    vault = load_vault()
-
-    return suggest_offer_for_video(
-        vault=vault,
+    return vault_engine.suggest_offer(
+        topic,
         niche=niche,
-        topic=topic,
         country_code=country_code,
+        channel_name=channel_name,
+        affiliate_slot=affiliate_slot,
+        script=script,
     )
 
 
+def clip_file_writer(folder: str) -> Any:
+    """
+    Callback on_clip para AUREN_CLIP_SPLITTER en streaming: cada clip se escribe
+    en `folder/clip_NN.md` en cuanto el modelo lo termina, sin esperar al resto.
+    El callback guarda las rutas escritas en `.paths`.
+    """
+    paths: List[str] = []
+
+    def on_clip(clip: Dict[str, Any]) -> None:
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"clip_{int(clip['index']):02d}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(clip["raw"] + "\n")
+        paths.append(path)
+        print(f"🎬 Clip {clip['index']} listo → {path}")
+
+    on_clip.paths = paths  # type: ignore[attr-defined]
+    return on_clip
+
+
+def _offer_is_pinned(offer: Dict[str, Any] | None) -> bool:
+    """True si la oferta viene fijada por el Brain/canal (slot u override), no por matching."""
+    return bool(offer) and offer.get("source") in ("channel_override", "slot_match")
+
+
 # ============================================================
 # 8) PIPELINE GOLD COMPLETO (ya con AGENTES AUREN + BRAIN opcional)
 # ============================================================
 
+@with_run_deadline
 def run_gold_pipeline(
     niche: str,
     country_code: str = "ES",
@@ -696,6 +817,9 @@ def run_gold_pipeline(
     top_n: int = 1,
     channel_name: str | None = None,
     affiliate_slot: str | None = None,
+    run_profile: str | None = None,
+    quality_gate: bool | None = None,
+    brain_plan: Dict[str, Any] | None = None,
 ) -> str:
     """
     1) MIND: genera lista de topics a partir de un NICHO.
@@ -719,9 +843,30 @@ def run_gold_pipeline(
        - Plan de publicación (UPLOAD_SCHEDULER).
        - Encola vídeo en Render Server (send_to_render_server).
 
+    Solo se ejecutan las etapas que necesita el perfil del canal
+    (run_profiles.py): `run_profile` explícito, o el del canal, o AUREN_RUN_PROFILE.
+
+    Tras SCRIPT_DOCTOR, el quality gate (quality_gate.py) regenera el guion con
+    presupuesto acotado o aborta el topic antes del fan-out.
+    `quality_gate=None` → AUREN_QUALITY_GATE.
+
+    `brain_plan`: plan del Brain ya pedido por quien lanza el run (p. ej. el
+    worker con la semilla original); {} → ya se pidió y no hubo plan. Con None,
+    la etapa brain_comment lo pide al Space.
+
+    Todo el run va bajo un deadline (`deadline_s=`, por defecto AUREN_RUN_DEADLINE_S)
+    que se propaga a las llamadas a Spaces y Groq (auren_resilience.py).
+
     Devuelve un markdown grande con todo + dashboard final.
     """
 
+    # 0) Perfil → etapas mínimas de este run
+    profile = run_profile or profile_for_channel(channel_name)
+    if quality_gate is None:
+        quality_gate = QUALITY_GATE_ENABLED
+    stages = stages_for_run(profile, run_quality=run_quality, want_broll=want_broll)
+    skipped = [s for s in ALL_STAGES if s not in stages]
+
     # 1) MIND — descubrir topics
     mind = mind_discover_topics(niche, country_code=country_code, lang=lang_topics)
     topics = mind["topics"]
@@ -729,7 +874,11 @@ def run_gold_pipeline(
     if not topics:
         return "⚠️ MIND ENGINE no generó topics."
 
-    # 2) EMPIRE — money score
+    # 2) EMPIRE — money score (pre-ranking local si hay muchos candidatos)
+    if MONEY_PRERANK_MAX and len(topics) > MONEY_PRERANK_MAX:
+        import money_model
+
+        topics = money_model.prerank(topics, lang=lang_topics, top_k=MONEY_PRERANK_MAX)
     money_rows = hub_topic_money_flow(topics, lang=lang_topics)
 
     fused = []
@@ -749,6 +898,18 @@ def run_gold_pipeline(
     top_n = max(1, min(top_n, len(fused)))
     top_topics = fused[:top_n]
 
+    # 🔐 VAULT — una sola pasada para todos los TOP (es local): si la oferta viene
+    # fijada por affiliate_slot / override de canal, Hotmart y SaaS sobran.
+    vault_offers: List[Dict[str, Any] | None] = [None] * len(top_topics)
+    if "vault_offer" in stages or "hotmart" in stages or "saas" in stages:
+        vault_offers = vault_engine.match_many(
+            [r["topic"] for r in top_topics],
+            niche=niche,
+            country_code=country_code,
+            channel_name=channel_name,
+            affiliate_slot=affiliate_slot,
+        )
+
     out: List[str] = []
 
     out.append("# 🟣 AUREN AUTO GOLD — RUN EXTERNO\n")
@@ -764,13 +925,15 @@ def run_gold_pipeline(
         "- AUREN MEDIA BRAIN (si está activo)\n"
     )
 
-    # 🧩 Contexto de ejecución (canal + slot de afiliado)
-    if channel_name or affiliate_slot:
-        out.append("\n## 🧩 Contexto de ejecución\n")
-        if channel_name:
-            out.append(f"- Canal: **{channel_name}**")
-        if affiliate_slot:
-            out.append(f"- Affiliate slot: **{affiliate_slot}**")
+    # 🧩 Contexto de ejecución (canal + slot de afiliado + perfil)
+    out.append("\n## 🧩 Contexto de ejecución\n")
+    if channel_name:
+        out.append(f"- Canal: **{channel_name}**")
+    if affiliate_slot:
+        out.append(f"- Affiliate slot: **{affiliate_slot}**")
+    out.append(f"- Perfil de ejecución: **{profile}**")
+    if skipped:
+        out.append(f"- Etapas omitidas por el perfil: {', '.join(skipped)}")
 
     # Bloque MIND
     out.append("\n## 🧠 MIND ENGINE — Discover hot topics\n")
@@ -781,71 +944,69 @@ def run_gold_pipeline(
     # =========================================
     # EXTRA MIND: NOVELTY + OPORTUNIDADES + GAPS
     # =========================================
-    topics_list_markdown = "\n".join(f"- {t}" for t in topics)
-
-    out.append("\n### 🧠 Extra MIND — análisis de novedad y oportunidades\n")
+    if "extra_mind" in stages:
+        topics_list_markdown = "\n".join(f"- {t}" for t in topics)
 
-    # NOVELTY DETECTOR
-    novelty_data = run_novelty_detector(
-        {
-            "topics_raw": topics_list_markdown,
-        }
-    )
-    novelty_raw = novelty_data.get("novelty_report_raw", "").strip()
-
-    # OPPORTUNITY SCORER
-    opportunity_data = run_opportunity_scorer(
-        {
-            "topics_raw": topics_list_markdown,
-        }
-    )
-    opportunity_raw = opportunity_data.get("opportunity_table_raw", "").strip()
+        out.append("\n### 🧠 Extra MIND — análisis de novedad y oportunidades\n")
 
-    # CONTENT GAP HUNTER
-    gap_data = run_content_gap_hunter(
-        {
-            "niche": niche,
-            "competitor_notes": "Competencia típica de YouTube/TikTok en este nicho.",
-        }
-    )
-    gaps_raw = gap_data.get("gaps_raw", "").strip()
+        # NOVELTY DETECTOR + OPPORTUNITY SCORER + CONTENT GAP HUNTER (independientes → en paralelo)
+        extra_mind = run_batch(
+            {
+                "novelty": ("novelty_detector", {"topics_raw": topics_list_markdown}),
+                "opportunity": ("opportunity_scorer", {"topics_raw": topics_list_markdown}),
+                "gaps": (
+                    "content_gap_hunter",
+                    {
+                        "niche": niche,
+                        "competitor_notes": "Competencia típica de YouTube/TikTok en este nicho.",
+                    },
+                ),
+            }
+        )
+        novelty_raw = extra_mind["novelty"].get("novelty_report_raw", "").strip()
+        opportunity_raw = extra_mind["opportunity"].get("opportunity_table_raw", "").strip()
+        gaps_raw = extra_mind["gaps"].get("gaps_raw", "").strip()
 
-    out.append("```markdown")
-    out.append("#### NOVEDAD Y SATURACIÓN\n")
-    out.append(novelty_raw or "⚠️ No se pudo generar análisis de novedad.")
-    out.append("\n\n#### OPORTUNIDADES POR TEMA\n")
-    out.append(opportunity_raw or "⚠️ No se pudo generar tabla de oportunidades.")
-    out.append("\n\n#### GAPS DE CONTENIDO\n")
-    out.append(gaps_raw or "⚠️ No se detectaron gaps específicos.")
-    out.append("```")
+        out.append("```markdown")
+        out.append("#### NOVEDAD Y SATURACIÓN\n")
+        out.append(novelty_raw or "⚠️ No se pudo generar análisis de novedad.")
+        out.append("\n\n#### OPORTUNIDADES POR TEMA\n")
+        out.append(opportunity_raw or "⚠️ No se pudo generar tabla de oportunidades.")
+        out.append("\n\n#### GAPS DE CONTENIDO\n")
+        out.append(gaps_raw or "⚠️ No se detectaron gaps específicos.")
+        out.append("```")
 
     # =========================================
     # 🧠 BRAIN (Space) — comentario estratégico opcional
     # =========================================
-    seed_topic = niche
-    topic_slug = slugify(seed_topic)
-
-    brain_plan = brain_enrich_plan(
-        channel_name=channel_name,
-        seed_topic=seed_topic,
-        topic_slug=topic_slug,
-        niche=niche,
-        country=country_code,
-        language=lang_topics,
-    )
+    if "brain_comment" in stages:
+        if brain_plan is None:
+            seed_topic = niche
+            topic_slug = slugify(seed_topic)
+
+            brain_plan = brain_enrich_plan(
+                channel_name=channel_name,
+                seed_topic=seed_topic,
+                topic_slug=topic_slug,
+                niche=niche,
+                country=country_code,
+                language=lang_topics,
+            )
 
-    if brain_plan:
-        out.append("\n### 🧠 AUREN MEDIA BRAIN — Plan estratégico\n")
-        # Si el Brain devuelve dict con 'markdown', usamos eso.
-        if isinstance(brain_plan, dict) and "markdown" in brain_plan:
-            out.append(brain_plan["markdown"])
-        else:
-            out.append("```json")
-            out.append(json.dumps(brain_plan, ensure_ascii=False, indent=2))
-            out.append("```")
+        if brain_plan:
+            out.append("\n### 🧠 AUREN MEDIA BRAIN — Plan estratégico\n")
+            # Si el Brain devuelve dict con 'markdown', usamos eso.
+            if isinstance(brain_plan, dict) and "markdown" in brain_plan:
+                out.append(brain_plan["markdown"])
+            else:
+                out.append("```json")
+                out.append(json.dumps(brain_plan, ensure_ascii=False, indent=2))
+                out.append("```")
 
     # Tabla ranking EMPIRE
     out.append("\n## 💰 Ranking de topics por money_score\n")
+    if any(row.get("source") in ("local", "local_model") for row in money_rows):
+        out.append("> ⚠️ HUB /topic_money_flow no disponible: money_score estimado en local.\n")
     out.append("| # | Topic | Views 30d | Intent % | Ads % | Money Score |\n")
     out.append("|---|-------|-----------|----------|-------|-------------|\n")
     for i, r in enumerate(fused, start=1):
@@ -866,311 +1027,422 @@ def run_gold_pipeline(
             f"Intent: **{r['intent']:.1f}%** | Ads: **{r['ads_density']:.1f}%**\n"
         )
 
+        vault_offer = vault_offers[idx - 1]
+        topic_stages = stages
+        if _offer_is_pinned(vault_offer):
+            topic_stages = stages_for_run(
+                profile, run_quality=run_quality, want_broll=want_broll, offer_pinned=True
+            )
+
         # ==========================
-        # AUREN_ANGLE_MASTER
+        # AUREN_ANGLE_MASTER + HOOK ENGINE (independientes → en paralelo)
         # ==========================
-        out.append("### 🎯 Ángulos generados (AUREN_ANGLE_MASTER)\n")
-        angles_data = run_angle_master(
-            {
-                "topic": topic,
-                "audience": audience,
-                "emotion": emotion,
-                "platform": platform,
-                "num_angles": 12,
-            }
-        )
-        angles_text = angles_data.get("angles_raw", "").strip()
-        out.append("```markdown")
-        out.append(angles_text or "⚠️ No se generaron ángulos.")
-        out.append("```")
+        ideation_calls = {}
+        if "angles" in topic_stages:
+            ideation_calls["angles"] = (
+                "angle_master",
+                {
+                    "topic": topic,
+                    "audience": audience,
+                    "emotion": emotion,
+                    "platform": platform,
+                    "num_angles": 12,
+                },
+            )
+        if "hooks" in topic_stages:
+            ideation_calls["hooks"] = (
+                "hook_engine",
+                {
+                    "topic": topic,
+                    "audience": audience,
+                    "emotion": emotion,
+                    "platform": platform,
+                },
+            )
+        ideation = run_batch(ideation_calls)
+
+        angles_text = ""
+        if "angles" in topic_stages:
+            out.append("### 🎯 Ángulos generados (AUREN_ANGLE_MASTER)\n")
+            angles_text = ideation["angles"].get("angles_raw", "").strip()
+            out.append("```markdown")
+            out.append(angles_text or "⚠️ No se generaron ángulos.")
+            out.append("```")
 
         # ==========================
         # HOOK ENGINE — hooks extra
         # ==========================
-        out.append("\n### ⚡ Hooks extra (AUREN_HOOK_ENGINE)\n")
-        hook_data = run_hook_engine(
-            {
-                "topic": topic,
-                "audience": audience,
-                "emotion": emotion,
-                "platform": platform,
-            }
-        )
-        hooks_raw = hook_data.get("hooks_raw", "").strip()
-        out.append("```markdown")
-        out.append(hooks_raw or "⚠️ No se pudieron generar hooks adicionales.")
-        out.append("```")
+        if "hooks" in topic_stages:
+            out.append("\n### ⚡ Hooks extra (AUREN_HOOK_ENGINE)\n")
+            hooks_raw = ideation["hooks"].get("hooks_raw", "").strip()
+            out.append("```markdown")
+            out.append(hooks_raw or "⚠️ No se pudieron generar hooks adicionales.")
+            out.append("```")
 
-        # ==========================
-        # CREATIVE ENGINE — GUION V1
-        # ==========================
-        out.append("\n### 🧠 Guion V1 generado (AUREN-CREATIVE-ENGINE)\n")
-        topic_with_angles = (
-            f"{topic}\n\nÁngulos sugeridos:\n{angles_text}" if angles_text else topic
-        )
-        script_v1 = creative_generate_script(
-            topic_with_angles,
-            emotion,
-            platform,
-            audience=audience,
-        )
+        script_v2 = ""
+        if "script_v2" in topic_stages:
+            # ==========================
+            # CREATIVE ENGINE — GUION V1
+            # ==========================
+            out.append("\n### 🧠 Guion V1 generado (AUREN-CREATIVE-ENGINE)\n")
+            topic_with_angles = (
+                f"{topic}\n\nÁngulos sugeridos:\n{angles_text}" if angles_text else topic
+            )
+            script_v1 = creative_generate_script(
+                topic_with_angles,
+                emotion,
+                platform,
+                audience=audience,
+            )
 
-        out.append("```markdown")
-        out.append(script_v1)
-        out.append("```")
+            out.append("```markdown")
+            out.append(script_v1)
+            out.append("```")
+
+            # ==========================
+            # SCRIPT DOCTOR — GUION V2
+            # ==========================
+            out.append("\n### ✍️ Guion V2 refinado (AUREN_SCRIPT_DOCTOR)\n")
+            style_notes = "Tono profesional, cercano, elegante, energía Pendragon."
+            script_v2_dict = call_agent(
+                "script_doctor",
+                {
+                    "script_v1": script_v1,
+                    "emotion": emotion,
+                    "platform": platform,
+                    "audience": audience,
+                    "style_notes": style_notes,
+                }
+            )
+            script_v2 = script_v2_dict.get("script_v2", script_v1)
+
+            # ==========================
+            # 🚦 QUALITY GATE — antes del fan-out caro
+            # ==========================
+            if quality_gate:
+                def _regenerate(prev_script: str, verdict: Dict[str, Any]) -> str:
+                    notes = (
+                        f"{style_notes}\n\nLa versión anterior sacó {verdict['score']}/10. "
+                        f"Corrige esto:\n{verdict['feedback']}"
+                    )
+                    res = call_agent(
+                        "script_doctor",
+                        {
+                            "script_v1": script_v1,
+                            "emotion": emotion,
+                            "platform": platform,
+                            "audience": audience,
+                            "style_notes": notes,
+                        }
+                    )
+                    return res.get("script_v2", prev_script)
+
+                gated = gate_script(script_v2, _regenerate, platform=platform, lang=lang_topics)
+                script_v2 = gated["script"]
+                verdict = gated["verdict"]
+
+            out.append("```markdown")
+            out.append(script_v2)
+            out.append("```")
+
+            if quality_gate:
+                out.append("\n### 🚦 Quality gate (heurística + AUREN_QUALITY_RATER)\n")
+                rater_txt = f" | Rater: **{verdict['rater']}**" if verdict["rater"] is not None else ""
+                out.append(
+                    f"- Nota: **{verdict['score']}/10** (mínimo {QUALITY_MIN_SCORE}) | "
+                    f"Heurística: **{verdict['heuristic']}**{rater_txt} | "
+                    f"Regeneraciones: {gated['attempts']}"
+                )
+                for issue in verdict["issues"]:
+                    out.append(f"- {issue}")
+
+                if not verdict["passed"]:
+                    out.append(
+                        "\n⛔ Guion rechazado por el quality gate: se omiten retención, clips, "
+                        "títulos, media plan, CTR, QA y render para este topic."
+                    )
+                    print(f"⛔ Quality gate: '{topic}' rechazado ({gated['history']}).")
+                    continue
+
+            # Con el guion ya escrito, el matching de ofertas puede usarlo entero
+            # (un pase Aho–Corasick); las ofertas fijadas por slot / override no se tocan.
+            if "vault_offer" in topic_stages and script_v2 and not _offer_is_pinned(vault_offer):
+                vault_offer = pick_offer_for_video(
+                    niche=niche,
+                    topic=topic,
+                    country_code=country_code,
+                    channel_name=channel_name,
+                    affiliate_slot=affiliate_slot,
+                    script=script_v2,
+                ) or vault_offer
 
         # ==========================
-        # SCRIPT DOCTOR — GUION V2
+        # FAN-OUT sobre GUION V2: todos estos agentes son independientes entre sí
+        # → se lanzan juntos (run_batch) y luego se pintan en el orden de siempre.
+        # Solo entran las etapas del perfil.
         # ==========================
-        out.append("\n### ✍️ Guion V2 refinado (AUREN_SCRIPT_DOCTOR)\n")
-        script_v2_dict = run_script_doctor(
-            {
-                "script_v1": script_v1,
-                "emotion": emotion,
-                "platform": platform,
-                "audience": audience,
-                "style_notes": "Tono profesional, cercano, elegante, energía Pendragon.",
-            }
-        )
-        script_v2 = script_v2_dict.get("script_v2", script_v1)
-        out.append("```markdown")
-        out.append(script_v2)
-        out.append("```")
+        clips_writer = clip_file_writer(f"videos/clips_{slugify(topic)}")
+        fanout_calls = {
+            "retention": ("retention_analyzer", {"script_v2": script_v2}),
+            "clips": (
+                "clip_splitter",
+                {
+                    "script_v2": script_v2,
+                    "min_clips": 7,
+                    "max_clips": 12,
+                    "on_clip": clips_writer,  # streaming: ficheros de clip según llegan
+                },
+            ),
+            "titles": ("title_lab", {"clip_text": script_v2, "platform": platform}),
+            "platform_versions": ("platform_translator", {"clip_text": script_v2}),
+            "description": (
+                "description_engine",
+                {
+                    "script_v2": script_v2,
+                    "topic": topic,
+                    "niche": niche,
+                },
+            ),
+            "hashtags": (
+                "hashtag_engine",
+                {
+                    "topic": topic,
+                    "niche": niche,
+                    "language": lang_topics,
+                },
+            ),
+            "hotmart": ("hotmart_engine", {"topic": topic, "audience": audience}),
+            "saas": ("saas_engine", {"topic": topic, "audience": audience}),
+            "upload_plan": (
+                "upload_scheduler",
+                {
+                    "audience": audience,
+                    "timezone": "Europe/Madrid",
+                },
+            ),
+        }
+        fanout_calls = {k: v for k, v in fanout_calls.items() if k in topic_stages}
+
+        # Títulos + descripción + hashtags → una sola llamada JSON si se piden 2 o más
+        fused_fields = [f for f in ("titles", "description", "hashtags") if f in fanout_calls]
+        fused_fallback = {}
+        if FUSED_METADATA and len(fused_fields) >= 2:
+            fused_fallback = {f: fanout_calls.pop(f) for f in fused_fields}
+            fanout_calls["publish_pack"] = (
+                "publish_pack",
+                {
+                    "script_v2": script_v2,
+                    "topic": topic,
+                    "niche": niche,
+                    "platform": platform,
+                    "language": lang_topics,
+                    "fields": fused_fields,
+                },
+            )
+
+        fanout = run_batch(fanout_calls)
+
+        if fused_fallback:
+            pack = fanout.pop("publish_pack")
+            for field in fused_fields:
+                key = f"{field}_raw"
+                if field not in pack.get("invalid_fields", []) and pack.get(key):
+                    fanout[field] = {key: pack[key]}
+                    if field == "titles":
+                        # mismo shape que el "parsed" de AUREN_TITLE_LAB
+                        fanout[field]["parsed"] = {"titles": pack["parsed"]["titles"]}
+            missing = {f: fused_fallback[f] for f in fused_fields if f not in fanout}
+            if missing:
+                print(f"↩️ PUBLISH_PACK: campos no válidos {list(missing)} → agentes individuales.")
+                fanout.update(run_batch(missing))
 
         # ==========================
         # RETENTION ANALYZER
         # ==========================
-        out.append("\n### 📈 Retención estimada (AUREN_RETENTION_ANALYZER)\n")
-        retention_data = run_retention_analyzer(
-            {
-                "script_v2": script_v2,
-            }
-        )
-        retention_raw = retention_data.get("retention_report_raw", "").strip()
-        out.append("```markdown")
-        out.append(retention_raw or "⚠️ No se generó informe de retención.")
-        out.append("```")
+        if "retention" in topic_stages:
+            out.append("\n### 📈 Retención estimada (AUREN_RETENTION_ANALYZER)\n")
+            retention_raw = fanout["retention"].get("retention_report_raw", "").strip()
+            out.append("```markdown")
+            out.append(retention_raw or "⚠️ No se generó informe de retención.")
+            out.append("```")
 
         # ==========================
         # CLIP SPLITTER — CLIPS
         # ==========================
-        out.append("\n### 🎬 Clips generados (AUREN_CLIP_SPLITTER)\n")
-        clips_dict = run_clip_splitter(
-            {
-                "script_v2": script_v2,
-                "min_clips": 7,
-                "max_clips": 12,
-            }
-        )
-        clips_raw = clips_dict.get("clips_raw", "").strip()
-        out.append("```markdown")
-        out.append(clips_raw or "⚠️ No se pudieron generar clips.")
-        out.append("```")
+        if "clips" in topic_stages:
+            out.append("\n### 🎬 Clips generados (AUREN_CLIP_SPLITTER)\n")
+            clips_raw = fanout["clips"].get("clips_raw", "").strip()
+            out.append("```markdown")
+            out.append(clips_raw or "⚠️ No se pudieron generar clips.")
+            out.append("```")
+            if clips_writer.paths:
+                out.append(f"- {len(clips_writer.paths)} clips guardados en `{os.path.dirname(clips_writer.paths[0])}/`")
 
         # ==========================
         # TITLE LAB
         # ==========================
-        out.append("\n### 🏷️ Títulos sugeridos (AUREN_TITLE_LAB)\n")
-        titles_dict = run_title_lab(
-            {
-                "clip_text": script_v2,
-                "platform": platform,
-            }
-        )
-        titles_raw = titles_dict.get("titles_raw", "").strip()
-        out.append("```markdown")
-        out.append(titles_raw or "⚠️ No se generaron títulos.")
-        out.append("```")
+        titles_raw = ""
+        if "titles" in topic_stages:
+            out.append("\n### 🏷️ Títulos sugeridos (AUREN_TITLE_LAB)\n")
+            titles_raw = fanout["titles"].get("titles_raw", "").strip()
+            out.append("```markdown")
+            out.append(titles_raw or "⚠️ No se generaron títulos.")
+            out.append("```")
 
         # ==========================
         # PLATFORM TRANSLATOR
         # ==========================
-        out.append("\n### 🌍 Adaptación por plataforma (AUREN_PLATFORM_TRANSLATOR)\n")
-        platform_dict = run_platform_translator(
-            {
-                "clip_text": script_v2,
-            }
-        )
-        platform_versions_raw = platform_dict.get("platform_versions_raw", "").strip()
-        out.append("```markdown")
-        out.append(
-            platform_versions_raw
-            or "⚠️ No se generaron versiones por plataforma."
-        )
-        out.append("```")
+        if "platform_versions" in topic_stages:
+            out.append("\n### 🌍 Adaptación por plataforma (AUREN_PLATFORM_TRANSLATOR)\n")
+            platform_versions_raw = fanout["platform_versions"].get("platform_versions_raw", "").strip()
+            out.append("```markdown")
+            out.append(
+                platform_versions_raw
+                or "⚠️ No se generaron versiones por plataforma."
+            )
+            out.append("```")
 
         # ==========================
         # DESCRIPTION ENGINE + HASHTAG ENGINE
         # ==========================
-        out.append(
-            "\n### 📝 Descripción y hashtags (AUREN_DESCRIPTION_ENGINE + AUREN_HASHTAG_ENGINE)\n"
-        )
-
-        desc_data = run_description_engine(
-            {
-                "script_v2": script_v2,
-                "topic": topic,
-                "niche": niche,
-            }
-        )
-        description_raw = desc_data.get("description_raw", "").strip()
-
-        hashtag_data = run_hashtag_engine(
-            {
-                "topic": topic,
-                "niche": niche,
-                "language": lang_topics,
-            }
-        )
-        hashtags_raw = hashtag_data.get("hashtags_raw", "").strip()
+        if "description" in topic_stages or "hashtags" in topic_stages:
+            out.append(
+                "\n### 📝 Descripción y hashtags (AUREN_DESCRIPTION_ENGINE + AUREN_HASHTAG_ENGINE)\n"
+            )
 
-        out.append("```markdown")
-        out.append("#### Descripción sugerida\n")
-        out.append(description_raw or "⚠️ No se generó descripción.")
-        out.append("\n\n#### Hashtags sugeridos\n")
-        out.append(hashtags_raw or "⚠️ No se generaron hashtags.")
-        out.append("```")
+            out.append("```markdown")
+            if "description" in topic_stages:
+                description_raw = fanout["description"].get("description_raw", "").strip()
+                out.append("#### Descripción sugerida\n")
+                out.append(description_raw or "⚠️ No se generó descripción.")
+            if "hashtags" in topic_stages:
+                hashtags_raw = fanout["hashtags"].get("hashtags_raw", "").strip()
+                out.append("\n\n#### Hashtags sugeridos\n")
+                out.append(hashtags_raw or "⚠️ No se generaron hashtags.")
+            out.append("```")
 
         # ==========================
         # AFFILIATES: HOTMART + SaaS + VAULT
         # ==========================
-        out.append(
-            "\n### 💸 Encaje de afiliados (AUREN_HOTMART_ENGINE + AUREN_SAAS_ENGINE + VAULT)\n"
-        )
-
-        hotmart_data = run_hotmart_engine(
-            {
-                "topic": topic,
-                "audience": audience,
-            }
-        )
-        hotmart_raw = hotmart_data.get("hotmart_suggestion_raw", "").strip()
-
-        saas_data = run_saas_engine(
-            {
-                "topic": topic,
-                "audience": audience,
-            }
-        )
-        saas_raw = saas_data.get("saas_suggestion_raw", "").strip()
-
-        # 🔐 VAULT — Enlace final real
-        vault_offer = pick_offer_for_video(
-            niche=niche,
-            topic=topic,
-            country_code=country_code,
-        )
-
-        out.append("```markdown")
-        out.append("#### Hotmart\n")
-        out.append(hotmart_raw or "⚠️ Sin sugerencia Hotmart.")
-        out.append("\n\n#### SaaS recurrente\n")
-        out.append(saas_raw or "⚠️ Sin sugerencia SaaS.")
-
-        out.append("\n\n#### VAULT / Enlace final\n")
-        if vault_offer:
-            out.append(f"- Oferta seleccionada: **{vault_offer.get('name', '')}**")
-            out.append(f"- URL afiliada: {vault_offer.get('url', '⚠️ Sin URL definida')}")
-            notes = vault_offer.get("notes")
-            if notes:
-                out.append(f"- Notas: {notes}")
-            cta = vault_offer.get("default_cta")
-            if cta:
-                out.append(f"- CTA sugerida: {cta}")
-        else:
+        if {"hotmart", "saas", "vault_offer"} & topic_stages:
             out.append(
-                "⚠️ No hay ninguna oferta en el Vault que encaje con este tema "
-                "(revisa `vault/affiliates_vault.json`)."
+                "\n### 💸 Encaje de afiliados (AUREN_HOTMART_ENGINE + AUREN_SAAS_ENGINE + VAULT)\n"
             )
 
-        out.append("```")
+            out.append("```markdown")
+            if "hotmart" in topic_stages:
+                hotmart_raw = fanout["hotmart"].get("hotmart_suggestion_raw", "").strip()
+                out.append("#### Hotmart\n")
+                out.append(hotmart_raw or "⚠️ Sin sugerencia Hotmart.")
+            if "saas" in topic_stages:
+                saas_raw = fanout["saas"].get("saas_suggestion_raw", "").strip()
+                out.append("\n\n#### SaaS recurrente\n")
+                out.append(saas_raw or "⚠️ Sin sugerencia SaaS.")
+
+            if "vault_offer" in topic_stages:
+                out.append("\n\n#### VAULT / Enlace final\n")
+                if vault_offer:
+                    out.append(f"- Oferta seleccionada: **{vault_offer.get('name', '')}**")
+                    out.append(f"- URL afiliada: {vault_offer.get('url') or '⚠️ Sin URL definida'}")
+                    notes = vault_offer.get("notes")
+                    if notes:
+                        out.append(f"- Notas: {notes}")
+                    cta = vault_offer.get("default_cta")
+                    if cta:
+                        out.append(f"- CTA sugerida: {cta}")
+                else:
+                    out.append(
+                        "⚠️ No hay ninguna oferta en el Vault que encaje con este tema "
+                        "(revisa `vault/vault_media.json` y `vault/affiliates_vault.json`)."
+                    )
+
+            out.append("```")
 
         # ==========================
         # MEDIA PLAN (con GUION V2)
         # ==========================
-        out.append("\n### 🎥 Plan de producción (HUB /media_plan)\n")
-        media = hub_media_plan(script_v2, want_thumb=want_thumb, want_broll=want_broll)
-        if media.get("plan"):
-            out.append(media["plan"])
-        if want_thumb and media.get("thumbnail_plan"):
-            out.append("\n#### 🖼️ Bloque Miniatura\n")
-            out.append(media["thumbnail_plan"])
-        if want_broll and media.get("broll_plan"):
-            out.append("\n#### 🎬 Bloque B-Roll\n")
-            out.append(media["broll_plan"])
-
-            # ==========================
-            #  DESCARGA AUTOMÁTICA DE CLIPS
-            # ==========================
-            assets_folder = f"videos/assets_{topic.replace(' ', '_')}"
-            os.makedirs(assets_folder, exist_ok=True)
-
-            # 1) Extraer keywords del plan de B-roll
-            kw = extract_keywords_from_plan(media.get("broll_plan", ""))
-
-            # 2) Descargar desde Pexels
-            pex_files = pexels_search_and_download(kw, assets_folder)
-
-            # 3) Descargar desde Pixabay
-            pix_files = pixabay_search_and_download(kw, assets_folder)
-
-            out.append("\n### 🎞️ Clips descargados automáticamente\n")
-            out.append(f"- Pexels: {len(pex_files)} vídeos")
-            out.append(f"- Pixabay: {len(pix_files)} vídeos")
-
-        else:
-            # Si no hay B-roll, no hay assets_folder
-            assets_folder = None
+        media: Dict[str, Any] = {}
+        assets_folder = None
+        if "media_plan" in topic_stages:
+            out.append("\n### 🎥 Plan de producción (HUB /media_plan)\n")
+            want_broll_now = want_broll and "broll" in topic_stages
+            media = hub_media_plan(script_v2, want_thumb=want_thumb, want_broll=want_broll_now)
+            if media.get("plan"):
+                out.append(media["plan"])
+            if want_thumb and media.get("thumbnail_plan"):
+                out.append("\n#### 🖼️ Bloque Miniatura\n")
+                out.append(media["thumbnail_plan"])
+            if want_broll_now and media.get("broll_plan"):
+                out.append("\n#### 🎬 Bloque B-Roll\n")
+                out.append(media["broll_plan"])
+
+                # ==========================
+                #  DESCARGA AUTOMÁTICA DE CLIPS
+                # ==========================
+                assets_folder = f"videos/assets_{topic.replace(' ', '_')}"
+                os.makedirs(assets_folder, exist_ok=True)
+
+                # 1) Extraer keywords del plan de B-roll
+                kw = extract_keywords_from_plan(media.get("broll_plan", ""))
+
+                # 2) Descargar desde Pexels
+                pex_files = pexels_search_and_download(kw, assets_folder)
+
+                # 3) Descargar desde Pixabay
+                pix_files = pixabay_search_and_download(kw, assets_folder)
+
+                out.append("\n### 🎞️ Clips descargados automáticamente\n")
+                out.append(f"- Pexels: {len(pex_files)} vídeos")
+                out.append(f"- Pixabay: {len(pix_files)} vídeos")
 
         # ==========================
         # CTR FORECASTER (título + miniatura)
         # ==========================
-        out.append("\n### 🎯 Predicción de CTR (AUREN_CTR_FORECASTER)\n")
-
-        first_title = ""
-        if titles_raw:
-            for line in titles_raw.splitlines():
-                line = line.strip()
-                if line and not line.startswith(("#", "-", "*")):
-                    first_title = line
-                    break
-
-        thumb_brief_text = media.get("thumbnail_plan") or media.get("plan") or ""
-
-        ctr_data = run_ctr_forecaster(
-            {
-                "title": first_title,
-                "thumbnail_brief": thumb_brief_text,
-            }
-        )
-        ctr_raw = ctr_data.get("ctr_forecast_raw", "").strip()
+        if "ctr" in topic_stages:
+            out.append("\n### 🎯 Predicción de CTR (AUREN_CTR_FORECASTER)\n")
+
+            # Modo estructurado: el primer título ya viene parseado
+            parsed_titles = (fanout.get("titles", {}).get("parsed") or {}).get("titles") or []
+            first_title = parsed_titles[0].strip() if parsed_titles else ""
+            if not first_title and titles_raw:
+                for line in titles_raw.splitlines():
+                    line = line.strip()
+                    if line and not line.startswith(("#", "-", "*")):
+                        first_title = line
+                        break
+
+            thumb_brief_text = media.get("thumbnail_plan") or media.get("plan") or ""
+
+            ctr_data = call_agent(
+                "ctr_forecaster",
+                {
+                    "title": first_title,
+                    "thumbnail_brief": thumb_brief_text,
+                }
+            )
+            ctr_raw = ctr_data.get("ctr_forecast_raw", "").strip()
 
-        out.append("```markdown")
-        out.append(ctr_raw or "⚠️ No se pudo estimar el CTR.")
-        out.append("```")
+            out.append("```markdown")
+            out.append(ctr_raw or "⚠️ No se pudo estimar el CTR.")
+            out.append("```")
 
         # ==========================
         # UPLOAD SCHEDULER
         # ==========================
-        out.append(
-            "\n### 🗓 Plan de publicación recomendado (AUREN_UPLOAD_SCHEDULER)\n"
-        )
-        upload_plan = run_upload_scheduler(
-            {
-                "audience": audience,
-                "timezone": "Europe/Madrid",
-            }
-        )
-        upload_raw = upload_plan.get("upload_plan_raw", "").strip()
+        if "upload_plan" in topic_stages:
+            out.append(
+                "\n### 🗓 Plan de publicación recomendado (AUREN_UPLOAD_SCHEDULER)\n"
+            )
+            upload_raw = fanout["upload_plan"].get("upload_plan_raw", "").strip()
 
-        out.append("```markdown")
-        out.append(upload_raw or "⚠️ No se generó plan de publicación.")
-        out.append("```")
+            out.append("```markdown")
+            out.append(upload_raw or "⚠️ No se generó plan de publicación.")
+            out.append("```")
 
         # ==========================
         # QUALITY ENGINE (sobre GUION V2)
         # ==========================
-        if run_quality:
+        if "quality" in topic_stages:
             if (
                 "short" in platform.lower()
                 or "tiktok" in platform.lower()
@@ -1190,45 +1462,48 @@ def run_gold_pipeline(
         # ==========================
         # RENDER SERVER — Encolar vídeo
         # ==========================
-        out.append("\n### 🧩 Render job (AUREN RENDER SERVER)\n")
-
-        render_res = send_to_render_server(
-            template_id="motivacional_v1",
-            script_v2=script_v2,
-            platform=platform,
-            language=lang_topics,
-            audience=audience,
-            assets_folder=assets_folder,  # ahora es aceptado por la función
-        )
+        if "render" in topic_stages:
+            out.append("\n### 🧩 Render job (AUREN RENDER SERVER)\n")
+
+            render_res = send_to_render_server(
+                template_id="motivacional_v1",
+                script_v2=script_v2,
+                platform=platform,
+                language=lang_topics,
+                audience=audience,
+                assets_folder=assets_folder,  # ahora es aceptado por la función
+            )
 
-        out.append("```json")
-        out.append(json.dumps(render_res, ensure_ascii=False, indent=2))
-        out.append("```")
+            out.append("```json")
+            out.append(json.dumps(render_res, ensure_ascii=False, indent=2))
+            out.append("```")
 
     # ==========================
     # DASHBOARD ENGINE — resumen ejecutivo del run
     # ==========================
-    full_markdown = "\n".join(out)
+    if "dashboard" in stages:
+        full_markdown = "\n".join(out)
 
-    # Limitamos el tamaño para no romper el límite de tokens de Groq (en Dashboard)
-    max_chars = 6000
-    if len(full_markdown) > max_chars:
-        dashboard_input = full_markdown[-max_chars:]
-    else:
-        dashboard_input = full_markdown
+        # Limitamos el tamaño para no romper el límite de tokens de Groq (en Dashboard)
+        max_chars = 6000
+        if len(full_markdown) > max_chars:
+            dashboard_input = full_markdown[-max_chars:]
+        else:
+            dashboard_input = full_markdown
 
-    dashboard_data = run_dashboard_engine(
-        {
-            "inputs_raw": dashboard_input,
-        }
-    )
-    dashboard_raw = dashboard_data.get("dashboard_summary_raw", "").strip()
+        dashboard_data = call_agent(
+            "dashboard_engine",
+            {
+                "inputs_raw": dashboard_input,
+            }
+        )
+        dashboard_raw = dashboard_data.get("dashboard_summary_raw", "").strip()
 
-    out.append("\n---\n")
-    out.append("## 📊 Resumen ejecutivo (AUREN_DASHBOARD_ENGINE)\n")
-    out.append("```markdown")
-    out.append(dashboard_raw or "⚠️ No se generó resumen ejecutivo.")
-    out.append("```")
+        out.append("\n---\n")
+        out.append("## 📊 Resumen ejecutivo (AUREN_DASHBOARD_ENGINE)\n")
+        out.append("```markdown")
+        out.append(dashboard_raw or "⚠️ No se generó resumen ejecutivo.")
+        out.append("```")
 
     return "\n".join(out)
 
@@ -1237,86 +1512,327 @@ def run_gold_pipeline(
 # 9) MAIN — modo controlado por BRAIN o modo AutoGold clásico
 # ============================================================
 
-def main():
-    # ¿Hay plan de Auren Brain?
-    brain_plan_path = os.getenv("AUREN_BRAIN_PLAN_PATH", "").strip()
+def save_run_outputs(markdown: str, tag: str | None = None) -> Dict[str, str]:
+    """
+    Guarda el markdown del run en outputs/ (md + json) y el plan de vídeo en videos/.
+    `tag` se añade al nombre del fichero (en modo worker varios jobs
+    pueden terminar en el mismo segundo).
+    """
+    from datetime import datetime
+    ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    stem = f"{ts}_{tag}" if tag else ts
 
-    if brain_plan_path:
-        # ============================
-        # 🎛️ MODO CONTROLADO POR BRAIN (plan JSON externo)
-        # ============================
-        plan = load_brain_plan(brain_plan_path)
-        video_cfg = pick_video_from_brain(plan)
+    os.makedirs("outputs", exist_ok=True)
+    md_path = f"outputs/auren_gold_{stem}.md"
+    json_path = f"outputs/auren_gold_{stem}.json"
 
-        if not video_cfg:
-            print("⚠️ Auren Brain no devolvió ningún vídeo. Saliendo.")
-            return
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write(markdown)
 
-        print("🧠 Auren Brain activo (plan externo):")
-        print("   Canal:", video_cfg["channel_name"])
-        print("   Topic:", video_cfg["topic"])
-        print("   Video ID:", video_cfg["video_id"])
-        print("   Emoción:", video_cfg["emotion"])
-        print("   Plataforma:", video_cfg["target_platform"])
+    with open(json_path, "w", encoding="utf-8") as f:
+        # llm_metrics: acumuladas en el proceso (en modo worker, de todos los jobs hasta ahora)
+        f.write(json.dumps({"output": markdown, "llm_metrics": llm_metrics()}, ensure_ascii=False, indent=2))
 
-        niche = video_cfg["topic"]
-        country_code = video_cfg["country"]
-        lang_topics = video_cfg["language"]
+    print(f"\n💾 Guardado en: {md_path} y {json_path}")
 
-        emotion = map_emotion(video_cfg["emotion"])
-        platform = map_platform(video_cfg["target_platform"])
-        want_thumb = True
-        want_broll = True
-        run_quality = True
-        top_n = 1
+    os.makedirs("videos", exist_ok=True)
+    video_plan_path = f"videos/video_plan_{stem}.md"
 
+    video_plan_content = (
+        "# 🎬 AUREN VIDEO PLAN\n\n"
+        "## 📝 Guion + Producción\n\n"
+        f"{markdown}\n"
+    )
+
+    with open(video_plan_path, "w", encoding="utf-8") as f:
+        f.write(video_plan_content)
+
+    print(f"📦 Plan de vídeo guardado en: {video_plan_path}")
+
+    return {"md_path": md_path, "json_path": json_path, "video_plan_path": video_plan_path}
+
+
+def pipeline_params_from_brain_video(video_cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convierte la config de un vídeo del Brain (plan JSON) en kwargs de run_gold_pipeline.
+    """
+    return {
+        "niche": video_cfg["topic"],
+        "country_code": video_cfg["country"],
+        "lang_topics": video_cfg["language"],
+        "emotion": map_emotion(video_cfg["emotion"]),
+        "platform": map_platform(video_cfg["target_platform"]),
+        "want_thumb": True,
+        "want_broll": True,
+        "run_quality": True,
+        "top_n": 1,
         # 🔗 Datos extra para VAULT / contexto
-        channel_name = video_cfg["channel_name"]
-        affiliate_slot = video_cfg.get("affiliate_slot")
+        "channel_name": video_cfg["channel_name"],
+        "affiliate_slot": video_cfg.get("affiliate_slot"),
+    }
 
-        markdown = run_gold_pipeline(
-            niche=niche,
-            country_code=country_code,
-            lang_topics=lang_topics,
-            emotion=emotion,
-            platform=platform,
-            want_thumb=want_thumb,
-            want_broll=want_broll,
-            run_quality=run_quality,
-            top_n=top_n,
-            channel_name=channel_name,
-            affiliate_slot=affiliate_slot,
+
+def pipeline_params_from_seed_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convierte un job (canal + semilla) de channel_router en kwargs de run_gold_pipeline,
+    enriqueciéndolo con AUREN MEDIA BRAIN si está disponible.
+    """
+    channel = job["channel"]
+    seed = job["seed"]
+    topic_slug = job["topic_slug"]
+
+    # Defaults básicos (por si el Brain no responde)
+    params: Dict[str, Any] = {
+        "niche": seed.keyword,
+        "country_code": channel["country"],
+        "lang_topics": channel["language"],
+        "emotion": "Motivador",
+        "platform": "YouTube Shorts",
+        "want_thumb": True,
+        "want_broll": True,
+        "run_quality": True,
+        "top_n": 1,
+        "channel_name": channel["name"],
+        "affiliate_slot": None,
+    }
+
+    # 💜 Intentamos enriquecer con AUREN MEDIA BRAIN (una sola llamada al Space:
+    # si responde, maybe_enrich_with_brain sale de la caché con la misma clave)
+    brain_args = {
+        "channel_name": channel["name"],
+        "seed_topic": seed.keyword,
+        "topic_slug": topic_slug,
+        "niche": seed.keyword,
+        "country": params["country_code"],
+        "language": params["lang_topics"],
+    }
+    brain_plan = brain_enrich_plan(**brain_args)
+    brain_cfg = maybe_enrich_with_brain(**brain_args) if brain_plan else None
+
+    if brain_cfg:
+        print("🧠 Auren Media Brain activo, usando sus decisiones.")
+        params.update(
+            {
+                "channel_name": brain_cfg["channel_name"],
+                "niche": brain_cfg["topic"],
+                "country_code": brain_cfg["country"],
+                "lang_topics": brain_cfg["language"],
+                "emotion": map_emotion(brain_cfg["emotion"]),
+                "platform": map_platform(brain_cfg["target_platform"]),
+                "affiliate_slot": brain_cfg.get("affiliate_slot"),
+            }
         )
+    else:
+        print("ℹ️ Brain no disponible / sin respuesta válida. Usamos defaults.")
 
-        # Opcional: aquí podrías pasar también info del Brain al nombre del fichero
-        from datetime import datetime
-        ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    # El comentario del BRAIN reutiliza este mismo plan: tras el update, niche /
+    # canal ya no son los de la semilla y run_gold_pipeline pediría otro al Space.
+    params["brain_plan"] = brain_plan or {}
+    return params
 
-        os.makedirs("outputs", exist_ok=True)
-        md_path = f"outputs/auren_gold_{ts}.md"
-        json_path = f"outputs/auren_gold_{ts}.json"
 
-        with open(md_path, "w", encoding="utf-8") as f:
-            f.write(markdown)
+# ============================================================
+# 10) WORKER — modo daemon que vacía la cola de jobs
+# ============================================================
 
-        with open(json_path, "w", encoding="utf-8") as f:
-            f.write(json.dumps({"output": markdown}, ensure_ascii=False, indent=2))
+def enqueue_seed_jobs(limit: int | None = None) -> int:
+    """
+    Mete en la cola todos los (canal + semilla) libres de channel_router.
+    Devuelve cuántos jobs nuevos se encolaron.
+    """
+    added = 0
+    for job in pick_next_jobs(discover_hot_seeds(), limit=limit):
+        payload = {
+            "source": "router",
+            "channel": job["channel"],
+            "seed": asdict(job["seed"]),
+            "topic_slug": job["topic_slug"],
+        }
+        dedupe_key = f"router:{job['channel']['id']}:{job['topic_slug']}"
+        if job_queue.enqueue(payload, dedupe_key=dedupe_key) is not None:
+            added += 1
+    return added
 
-        print(f"\n💾 Guardado en: {md_path} y {json_path}")
 
-        os.makedirs("videos", exist_ok=True)
-        video_plan_path = f"videos/video_plan_{ts}.md"
+def enqueue_brain_plan_jobs(path: str, limit: int | None = None) -> int:
+    """
+    Mete en la cola los vídeos pendientes de un plan del Brain
+    (JSON plano, channels[].videos[] o JSON Lines). El fichero se lee en
+    streaming y los que el ledger del plan ya tiene como hechos no se encolan.
+    `limit` → solo los N siguientes pendientes (AUREN_BRAIN_PLAN_BATCH).
+    Los vídeos cuyo job acabó 'failed' (siguen pendientes en el ledger) se
+    vuelven a encolar: relanzar el plan los reintenta, como antes de la cola.
+    Devuelve cuántos jobs se encolaron (nuevos + reintentados).
+    """
+    key = plan_file_key(path)
+    if limit is None:
+        limit = BRAIN_PLAN_BATCH or None
 
-        video_plan_content = (
-            "# 🎬 AUREN VIDEO PLAN\n\n"
-            "## 📝 Guion + Producción\n\n"
-            f"{markdown}\n"
+    added = 0
+    for video_cfg in pending_plan_file_videos(path, key):
+        if limit is not None and added >= limit:
+            break
+        payload = {"source": "brain_plan", "video_cfg": video_cfg, "plan_key": key}
+        dedupe_key = f"{brain_plan_job_prefix(key)}{video_cfg['video_id']}"
+        if job_queue.enqueue(payload, dedupe_key=dedupe_key, retry_failed=True) is not None:
+            added += 1
+    return added
+
+
+def brain_plan_job_prefix(key: str) -> str:
+    """Prefijo del dedupe_key de los jobs de un plan (para reclamar solo esos)."""
+    return f"brain:{key}:"
+
+
+def job_memory_key(payload: Dict[str, Any]) -> tuple[str, str]:
+    """
+    Clave (channel_id, topic_slug) con la que un job se marca como hecho en topic_memory.
+    Es la completion idempotente: si otro nodo ya lo terminó, no se repite.
+    Para vídeos de un plan del Brain es el ledger de progreso del plan.
+    """
+    if payload.get("source") == "brain_plan":
+        cfg = payload["video_cfg"]
+        if payload.get("plan_key"):
+            return ledger_channel_id(payload["plan_key"]), cfg["video_id"]
+        return f"brain:{slugify(cfg['channel_name'])}", cfg["video_id"]
+    return payload["channel"]["id"], payload["topic_slug"]
+
+
+def run_queued_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ejecuta un job de la cola de principio a fin (pipeline + outputs + topic_memory).
+    """
+    payload = job["payload"]
+    source = payload.get("source")
+    channel_id, topic_slug = job_memory_key(payload)
+
+    # Un nodo murió tras terminar el vídeo pero antes de cerrar el job → no lo repetimos
+    if is_used(channel_id, topic_slug):
+        print(f"⏭️ Job {job['id']} ya completado antes ({channel_id} / {topic_slug}).")
+        return {"skipped": "already_done"}
+
+    if source == "brain_plan":
+        params = pipeline_params_from_brain_video(payload["video_cfg"])
+    elif source == "router":
+        seed_job = {
+            "channel": payload["channel"],
+            "seed": TopicSeed(**payload["seed"]),
+            "topic_slug": payload["topic_slug"],
+        }
+        params = pipeline_params_from_seed_job(seed_job)
+    else:
+        raise ValueError(f"Job con source desconocido: {source!r}")
+
+    markdown = run_gold_pipeline(**params)
+    paths = save_run_outputs(markdown, tag=f"job{job['id']}")
+    mark_used(channel_id, topic_slug)
+    return paths
+
+
+def run_worker(
+    workers: int = 2,
+    poll_interval: float = 5.0,
+    max_jobs: int | None = None,
+    exit_when_empty: bool = False,
+    dedupe_prefix: str | None = None,
+) -> int:
+    """
+    Bucle del worker: reclama jobs de la cola (con lease) y los ejecuta con `workers` hilos.
+
+    - Los clientes (gradio / Groq) y las cachés viven en el proceso → se reutilizan entre jobs.
+    - El vault se recarga en caliente si se editan sus JSON (watcher de vault_cache).
+    - Varios procesos / máquinas pueden compartir la misma cola (AUREN_JOB_QUEUE_PATH
+      en almacenamiento compartido): si uno muere, sus jobs vuelven a la cola al caducar el lease.
+    - SIGINT / SIGTERM → parada limpia: no se reclaman más jobs y se esperan los que están en curso.
+    - exit_when_empty → termina cuando la cola se vacía (modo batch, p. ej. GitHub Actions).
+    - dedupe_prefix → solo jobs cuyo dedupe_key empieza por él (p. ej. los de un plan del Brain):
+      los de otros productores que compartan la cola se quedan para sus workers.
+
+    Devuelve el número de jobs procesados.
+    """
+    stop = threading.Event()
+
+    def _handle_stop(signum, _frame):
+        print(f"\n🛑 Señal {signum} recibida: terminando jobs en curso y saliendo...")
+        stop.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, _handle_stop)
+        signal.signal(signal.SIGTERM, _handle_stop)
+
+    worker_id = job_queue.new_worker_id()
+    print(f"👷 AUREN worker {worker_id} arrancado con {max(1, workers)} hilos. Cola: {job_queue.counts()}")
+
+    # Ofertas editadas en vault/*.json se aplican sin reiniciar (y sin I/O por job)
+    vault_cache.start_watcher()
+    try:
+        processed = job_queue.run_lease_worker(
+            run_queued_job,
+            workers=workers,
+            poll_interval=poll_interval,
+            max_jobs=max_jobs,
+            exit_when_empty=exit_when_empty,
+            stop=stop,
+            worker_id=worker_id,
+            dedupe_prefix=dedupe_prefix,
         )
+    finally:
+        vault_cache.stop_watcher()
+
+    print(f"👋 Worker detenido. Jobs procesados: {processed}. Cola: {job_queue.counts()}")
+    print("\n📊 Métricas LLM por tier:\n" + format_llm_metrics())
+    coalesced = {k: v["coalesced"] for k, v in singleflight_stats().items() if v["coalesced"]}
+    if coalesced:
+        print(f"🛬 Llamadas idénticas agrupadas (singleflight): {coalesced}")
+    return processed
+
+
+def main(dry_run: bool = False):
+    """
+    Un vídeo por ejecución (semillas de channel_router), o el plan del Brain
+    entero si hay AUREN_BRAIN_PLAN_PATH.
+    dry_run=True → solo resuelve qué vídeo(s) tocaría(n) (sin llamar a Spaces ni a Groq).
+    """
+    # ¿Hay plan de Auren Brain?
+    brain_plan_path = os.getenv("AUREN_BRAIN_PLAN_PATH", "").strip()
 
-        with open(video_plan_path, "w", encoding="utf-8") as f:
-            f.write(video_plan_content)
+    if brain_plan_path:
+        # ============================
+        # 🎛️ MODO CONTROLADO POR BRAIN (plan JSON externo)
+        # ============================
+        # El plan entero en un solo run: se encolan los vídeos pendientes
+        # y los workers los vacían en paralelo (AUREN_WORKERS). Solo se
+        # reclaman los jobs de ESTE plan: si la cola es compartida, las
+        # semillas u otros planes encolados siguen ahí para sus workers.
+        key = plan_file_key(brain_plan_path)
+        pending = []
+        for video_cfg in pending_plan_file_videos(brain_plan_path, key):
+            pending.append(video_cfg)
+            if len(pending) >= 20:  # para el resumen basta con los primeros
+                break
+
+        if not pending:
+            print(f"✅ Plan '{key}': no quedan vídeos pendientes. Saliendo.")
+            return
+
+        print(f"🧠 Auren Brain activo (plan externo '{key}'). Próximos vídeos pendientes:")
+        for video_cfg in pending:
+            print(
+                f"   - [{video_cfg['video_id']}] {video_cfg['channel_name']} · {video_cfg['topic']} "
+                f"({video_cfg['emotion']}, {video_cfg['target_platform']})"
+            )
+
+        if dry_run:
+            print("🧪 Dry run: no se ejecuta el pipeline.")
+            return
 
-        print(f"📦 Plan de vídeo guardado en: {video_plan_path}")
+        print(f"📥 Jobs encolados desde plan Brain: {enqueue_brain_plan_jobs(brain_plan_path)}")
+        run_worker(
+            workers=int(os.getenv("AUREN_WORKERS", "2")),
+            poll_interval=0.5,
+            exit_when_empty=True,
+            dedupe_prefix=brain_plan_job_prefix(key),
+        )
         return
 
     # ============================
@@ -1337,87 +1853,59 @@ def main():
     print("🌱 Semilla seleccionada:", seed.keyword)
     print("🪪 Topic slug:", topic_slug)
 
-    # Defaults básicos (por si el Brain no responde)
-    niche = seed.keyword
-    country_code = channel["country"]
-    lang_topics = channel["language"]
-    emotion = "Motivador"
-    platform = "YouTube Shorts"
-    want_thumb = True
-    want_broll = True
-    run_quality = True
-    top_n = 1
-    channel_name = channel["name"]
-    affiliate_slot = None
-
-    # 💜 Intentamos enriquecer con AUREN MEDIA BRAIN
-    brain_cfg = maybe_enrich_with_brain(
-        channel_name=channel["name"],
-        seed_topic=seed.keyword,
-        topic_slug=topic_slug,
-        niche=seed.keyword,
-        country=country_code,
-        language=lang_topics,
-    )
+    if dry_run:
+        print("🧪 Dry run: no se ejecuta el pipeline.")
+        return
 
-    if brain_cfg:
-        print("🧠 Auren Media Brain activo, usando sus decisiones.")
-        channel_name = brain_cfg["channel_name"]
-        niche = brain_cfg["topic"]
-        country_code = brain_cfg["country"]
-        lang_topics = brain_cfg["language"]
-        emotion = map_emotion(brain_cfg["emotion"])
-        platform = map_platform(brain_cfg["target_platform"])
-        affiliate_slot = brain_cfg.get("affiliate_slot")
-    else:
-        print("ℹ️ Brain no disponible / sin respuesta válida. Usamos defaults.")
-
-    markdown = run_gold_pipeline(
-        niche=niche,
-        country_code=country_code,
-        lang_topics=lang_topics,
-        emotion=emotion,
-        platform=platform,
-        want_thumb=want_thumb,
-        want_broll=want_broll,
-        run_quality=run_quality,
-        top_n=top_n,
-        channel_name=channel_name,
-        affiliate_slot=affiliate_slot,
-    )
+    markdown = run_gold_pipeline(**pipeline_params_from_seed_job(job))
 
     print(markdown)
     mark_used(channel["id"], topic_slug)
 
-    os.makedirs("outputs", exist_ok=True)
-    from datetime import datetime
-    ts = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    save_run_outputs(markdown)
+    print("\n📊 Métricas LLM por tier:\n" + format_llm_metrics())
 
-    md_path = f"outputs/auren_gold_{ts}.md"
-    json_path = f"outputs/auren_gold_{ts}.json"
-
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(markdown)
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        f.write(json.dumps({"output": markdown}, ensure_ascii=False, indent=2))
-
-    print(f"\n💾 Guardado en: {md_path} y {json_path}")
-
-    os.makedirs("videos", exist_ok=True)
-    video_plan_path = f"videos/video_plan_{ts}.md"
 
-    video_plan_content = (
-        "# 🎬 AUREN VIDEO PLAN\n\n"
-        "## 📝 Guion + Producción\n\n"
-        f"{markdown}\n"
+def cli(argv: List[str] | None = None) -> None:
+    """
+    Sin argumentos → un vídeo por ejecución (comportamiento clásico).
+    Con --worker → modo daemon que vacía la cola de jobs.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AUREN AUTO GOLD — orquestador externo")
+    parser.add_argument("--worker", action="store_true", help="modo worker: procesa la cola de jobs")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("AUREN_WORKERS", "2")),
+        help="jobs en paralelo dentro del worker",
     )
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="segundos entre sondeos de la cola")
+    parser.add_argument("--max-jobs", type=int, default=None, help="parar tras N jobs")
+    parser.add_argument("--exit-when-empty", action="store_true", help="salir cuando la cola se vacíe")
+    parser.add_argument("--enqueue-seeds", action="store_true", help="encolar las semillas libres de channel_router")
+    parser.add_argument("--enqueue-plan", metavar="PATH", help="encolar los vídeos de un plan del Brain")
+    parser.add_argument("--dry-run", action="store_true", help="muestra el vídeo que tocaría, sin ejecutar nada remoto")
+    args = parser.parse_args(argv)
+
+    if args.enqueue_seeds:
+        print(f"📥 Jobs encolados desde channel_router: {enqueue_seed_jobs()}")
+    if args.enqueue_plan:
+        print(f"📥 Jobs encolados desde plan Brain: {enqueue_brain_plan_jobs(args.enqueue_plan)}")
+
+    if args.worker:
+        run_worker(
+            workers=args.workers,
+            poll_interval=args.poll_interval,
+            max_jobs=args.max_jobs,
+            exit_when_empty=args.exit_when_empty,
+        )
+        return
 
-    with open(video_plan_path, "w", encoding="utf-8") as f:
-        f.write(video_plan_content)
-
-    print(f"📦 Plan de vídeo guardado en: {video_plan_path}")
+    if not (args.enqueue_seeds or args.enqueue_plan):
+        main(dry_run=args.dry_run)
 
 
 if __name__ == "__main__":
-    main()
+    cli()
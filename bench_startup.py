@@ -0,0 +1,127 @@
+# bench_startup.py
+"""
+⏱️ Benchmark de arranque de AUREN AUTO GOLD.
+
+Mide cuánto tarda en arrancar el CLI y qué módulos se llevan el tiempo,
+usando `python -X importtime` en un proceso limpio (sin caché de imports).
+
+Uso:
+    python bench_startup.py                  # informe completo
+    python bench_startup.py --top 30         # más módulos en el ranking
+    python bench_startup.py --max-ms 400     # falla (exit 1) si el import supera 400 ms
+
+Útil en CI para que una regresión (p. ej. alguien vuelve a importar
+gradio_client o moviepy a nivel de módulo) se vea enseguida.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Módulos pesados que NO deberían cargarse solo por importar auto_gold
+HEAVY_MODULES = ["gradio_client", "groq", "requests", "moviepy", "numpy", "imageio", "httpx"]
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _run(args: List[str]) -> Tuple[float, str]:
+    """Ejecuta python con `args` desde la raíz del repo. Devuelve (segundos, stderr)."""
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return time.perf_counter() - t0, proc.stderr
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, object]]:
+    """
+    Parsea la salida de -X importtime.
+    Cada fila: {"module", "self_us", "cumulative_us", "depth"}.
+    """
+    rows: List[Dict[str, object]] = []
+    for line in stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, indent, module = m.groups()
+        rows.append(
+            {
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": len(indent) // 2,
+            }
+        )
+    return rows
+
+
+def report(target: str = "auto_gold", top: int = 20) -> Dict[str, object]:
+    """
+    Importa `target` con -X importtime y devuelve un resumen:
+      - wall_ms: tiempo total del proceso
+      - import_ms: tiempo acumulado del import de `target`
+      - top: módulos con más tiempo acumulado
+      - heavy_loaded: módulos pesados que se han colado en el arranque
+    """
+    wall_s, stderr = _run(["-X", "importtime", "-c", f"import {target}"])
+    rows = parse_importtime(stderr)
+
+    target_row = next((r for r in rows if r["module"] == target), None)
+    loaded = {str(r["module"]).split(".")[0] for r in rows}
+
+    return {
+        "target": target,
+        "wall_ms": round(wall_s * 1000, 1),
+        "import_ms": round(int(target_row["cumulative_us"]) / 1000, 1) if target_row else None,
+        "top": sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)[:top],
+        "heavy_loaded": [m for m in HEAVY_MODULES if m in loaded],
+        "errors": [l for l in stderr.splitlines() if not l.startswith("import time:")][-5:],
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de AUREN AUTO GOLD")
+    parser.add_argument("--target", default="auto_gold", help="módulo a importar")
+    parser.add_argument("--top", type=int, default=20, help="módulos a mostrar en el ranking")
+    parser.add_argument("--max-ms", type=float, default=None, help="presupuesto de import en ms")
+    args = parser.parse_args(argv)
+
+    rep = report(args.target, args.top)
+    help_s, _ = _run(["auto_gold.py", "--help"])
+
+    print(f"# ⏱️ Arranque de `{rep['target']}`\n")
+    print(f"- Proceso completo (`python -c 'import {rep['target']}'`): **{rep['wall_ms']} ms**")
+    print(f"- Import de `{rep['target']}` (acumulado): **{rep['import_ms']} ms**")
+    print(f"- `python auto_gold.py --help`: **{round(help_s * 1000, 1)} ms**")
+    print(f"- Módulos pesados cargados: {', '.join(rep['heavy_loaded']) or 'ninguno ✅'}")
+
+    print("\n| # | Módulo | Acumulado (ms) | Propio (ms) |")
+    print("|---|--------|----------------|-------------|")
+    for i, r in enumerate(rep["top"], start=1):
+        name = "  " * int(r["depth"]) + str(r["module"])
+        print(f"| {i} | `{name}` | {int(r['cumulative_us']) / 1000:.1f} | {int(r['self_us']) / 1000:.1f} |")
+
+    if rep["import_ms"] is None:
+        print("\n⚠️ No se pudo importar el módulo:")
+        for line in rep["errors"]:
+            print("   ", line)
+        return 1
+
+    if args.max_ms is not None and rep["import_ms"] > args.max_ms:
+        print(f"\n❌ Regresión: {rep['import_ms']} ms > presupuesto {args.max_ms} ms")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
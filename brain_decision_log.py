@@ -0,0 +1,284 @@
+# brain_decision_log.py
+"""
+Log de decisiones del AUREN MEDIA BRAIN (nivel 5 — bucle de aprendizaje).
+
+- Append-only JSONL en data/brain_decisions/decisions.jsonl
+  (AUREN_BRAIN_LOG_DIR para cambiar el directorio).
+- Escrituras en buffer: se vuelca cada FLUSH_EVERY decisiones o FLUSH_S segundos,
+  y se hace fsync como mucho cada FSYNC_S segundos (y siempre al salir). Un hilo
+  de fondo (arranca con la primera decisión) vuelca y hace fsync aunque el
+  proceso se quede parado: un daemon inactivo no retiene decisiones en memoria.
+- Rotación por tamaño (ROTATE_BYTES) o antigüedad (ROTATE_S): el fichero activo
+  pasa a decisions-<YYYYmmddTHHMMSS>.jsonl y se comprime a .jsonl.gz en segundo plano.
+- iter_decisions(...) recorre todo el histórico en streaming (línea a línea,
+  también dentro de los .gz), filtrando por canal y rango de fechas.
+
+Cada línea:
+{"ts": epoch, "kind": "video" | "plan", "channels": [str, ...], "decision": {...}}
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl  # POSIX: varios procesos escriben / rotan el mismo log
+except ImportError:  # Windows → solo lock entre hilos
+    fcntl = None
+
+LOG_DIR = Path(os.getenv("AUREN_BRAIN_LOG_DIR", "data/brain_decisions"))
+ACTIVE_NAME = "decisions.jsonl"
+
+FLUSH_EVERY = int(os.getenv("AUREN_BRAIN_LOG_FLUSH_EVERY", "100"))
+FLUSH_S = float(os.getenv("AUREN_BRAIN_LOG_FLUSH_S", "2"))
+FSYNC_S = float(os.getenv("AUREN_BRAIN_LOG_FSYNC_S", "5"))
+ROTATE_BYTES = int(os.getenv("AUREN_BRAIN_LOG_ROTATE_BYTES", str(64 * 1024 * 1024)))
+ROTATE_S = float(os.getenv("AUREN_BRAIN_LOG_ROTATE_S", str(24 * 3600)))
+
+_STAMP_FMT = "%Y%m%dT%H%M%S"
+
+
+def _channels_of(decision: Dict[str, Any]) -> List[str]:
+    """Canales de una decisión suelta ("channel") o de un plan ("channels": [...])."""
+    if isinstance(decision.get("channels"), list):
+        return [str(c.get("name") or c.get("id")) for c in decision["channels"] if isinstance(c, dict)]
+    name = decision.get("channel") or decision.get("channel_name")
+    return [str(name)] if name else []
+
+
+class DecisionLog:
+    """Writer append-only con buffer. Seguro entre hilos; entre procesos vía lock de fichero."""
+
+    def __init__(self, directory: Path | str = LOG_DIR) -> None:
+        self.dir = Path(directory)
+        self.path = self.dir / ACTIVE_NAME
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._last_fsync = time.monotonic()
+        self._compressors: List[threading.Thread] = []
+        self._unsynced = False  # hay datos escritos sin fsync
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_stop = threading.Event()
+
+    # ---------- escritura ----------
+
+    def append(self, decision: Dict[str, Any]) -> None:
+        record = {
+            "ts": time.time(),
+            "kind": "plan" if isinstance(decision.get("channels"), list) else "video",
+            "channels": _channels_of(decision),
+            "decision": decision,
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= FLUSH_EVERY or time.monotonic() - self._last_flush >= FLUSH_S:
+                self._flush_locked(fsync=time.monotonic() - self._last_fsync >= FSYNC_S)
+            if self._flusher is None:
+                self._start_flusher()
+
+    def _start_flusher(self) -> None:
+        """Hilo daemon: cada FLUSH_S vuelca el buffer y hace fsync si toca."""
+        def _run() -> None:
+            while not self._flusher_stop.wait(FLUSH_S):
+                try:
+                    with self._lock:
+                        if self._buffer or self._unsynced:
+                            self._flush_locked(fsync=time.monotonic() - self._last_fsync >= FSYNC_S)
+                except Exception as e:
+                    print(f"⚠️ Log de decisiones: error al volcar en segundo plano: {e}")
+
+        self._flusher_stop.clear()
+        self._flusher = threading.Thread(target=_run, name="brain-log-flush", daemon=True)
+        self._flusher.start()
+
+    def flush(self, fsync: bool = True) -> None:
+        with self._lock:
+            self._flush_locked(fsync=fsync)
+
+    def close(self) -> None:
+        self._flusher_stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush(fsync=True)
+        for t in self._compressors:
+            t.join()
+
+    def _flush_locked(self, fsync: bool) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            if fsync and self._unsynced:
+                self._fsync_active()
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        data = "".join(self._buffer).encode("utf-8")
+        self._buffer.clear()
+
+        lock_file = None
+        if fcntl is not None:
+            lock_file = open(self.dir / f"{ACTIVE_NAME}.lock", "a+")
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            self._maybe_rotate()
+            # O_APPEND + una sola escritura por lote: las líneas no se mezclan entre procesos
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+                if fsync:
+                    os.fsync(fd)
+                    self._last_fsync = time.monotonic()
+                self._unsynced = not fsync
+            finally:
+                os.close(fd)
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                lock_file.close()
+
+    def _fsync_active(self) -> None:
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        except FileNotFoundError:
+            self._unsynced = False  # rotado entretanto: el lote ya está en el fichero rotado
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+    # ---------- rotación + compactación ----------
+
+    def _maybe_rotate(self) -> None:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return
+        if st.st_size == 0:
+            return
+        first_ts = _first_ts(self.path)
+        too_old = first_ts is not None and time.time() - first_ts >= ROTATE_S
+        if st.st_size < ROTATE_BYTES and not too_old:
+            return
+
+        stamp = datetime.now(timezone.utc).strftime(_STAMP_FMT)
+        rotated = self.dir / f"decisions-{stamp}.jsonl"
+        n = 1
+        while rotated.exists() or rotated.with_name(rotated.name + ".gz").exists():
+            rotated = self.dir / f"decisions-{stamp}_{n:03d}.jsonl"
+            n += 1
+        os.replace(self.path, rotated)
+
+        t = threading.Thread(target=_compress, args=(rotated,), name="brain-log-gzip", daemon=True)
+        t.start()
+        self._compressors.append(t)
+
+
+def _first_ts(path: Path) -> Optional[float]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return float(json.loads(f.readline())["ts"])
+    except (OSError, ValueError, KeyError, json.JSONDecodeError):
+        return None
+
+
+def _compress(path: Path) -> None:
+    """decisions-X.jsonl → decisions-X.jsonl.gz (atómico: el .gz aparece completo o no aparece)."""
+    gz = path.with_name(path.name + ".gz")
+    tmp = gz.with_name(gz.name + ".tmp")
+    try:
+        with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp, gz)
+        path.unlink()
+    except OSError as e:
+        print(f"⚠️ No se pudo comprimir {path}: {e}")
+
+
+# ==========================================
+# 📖 LECTOR EN STREAMING
+# ==========================================
+
+def _log_files(directory: Path) -> List[Path]:
+    """Rotados (más antiguos primero) + activo al final."""
+    rotated = sorted(
+        p for p in directory.glob("decisions-*.jsonl*") if not p.name.endswith(".tmp")
+    )
+    # si el .gz ya existe, el .jsonl es un resto a medio borrar
+    names = {p.name for p in rotated}
+    rotated = [p for p in rotated if not (p.suffix == ".jsonl" and p.name + ".gz" in names)]
+    active = directory / ACTIVE_NAME
+    return rotated + ([active] if active.exists() else [])
+
+
+def _rotated_at(path: Path) -> Optional[float]:
+    """Momento de rotación (cota superior de los ts que contiene) según el nombre."""
+    stamp = path.name[len("decisions-"):].split(".", 1)[0].split("_", 1)[0]
+    try:
+        return datetime.strptime(stamp, _STAMP_FMT).replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def iter_decisions(
+    channel: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    directory: Path | str = LOG_DIR,
+    kind: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Recorre las decisiones registradas (más antiguas primero) sin cargar el log entero.
+    Filtros: canal, rango [since, until) en epoch segundos, tipo ("video" / "plan").
+    Los ficheros rotados antes de `since` ni se abren.
+    """
+    _default_log.flush(fsync=False)
+    for path in _log_files(Path(directory)):
+        rotated_at = _rotated_at(path) if path.name != ACTIVE_NAME else None
+        if since is not None and rotated_at is not None and rotated_at + 1 < since:
+            continue
+        opener = gzip.open if path.suffix == ".gz" else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # línea truncada (proceso muerto a mitad de escritura)
+                    ts = rec.get("ts", 0.0)
+                    if since is not None and ts < since:
+                        continue
+                    if until is not None and ts >= until:
+                        continue
+                    if kind is not None and rec.get("kind") != kind:
+                        continue
+                    if channel is not None and channel not in rec.get("channels", []):
+                        continue
+                    yield rec
+        except FileNotFoundError:
+            continue  # comprimido / rotado mientras leíamos la lista
+
+
+_default_log = DecisionLog()
+atexit.register(_default_log.close)
+
+
+def record(decision: Dict[str, Any]) -> None:
+    """Registra una decisión (o un plan semanal) en el log por defecto."""
+    _default_log.append(decision)
+
+
+def flush(fsync: bool = True) -> None:
+    _default_log.flush(fsync=fsync)
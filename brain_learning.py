@@ -0,0 +1,272 @@
+# brain_learning.py
+"""
+Aprendizaje online de los pesos del AUREN MEDIA BRAIN.
+
+Une las decisiones registradas (brain_decision_log.py) con el rendimiento real
+de cada vídeo (CTR, retención, revenue) y actualiza los pesos de
+simple_topic_score / simple_channel_score con ridge regression incremental:
+
+    w = (λI + Σ x xᵀ)⁻¹ (λ w₀ + Σ y x)        x = (features…, 1)
+
+- w₀ = pesos por defecto del Brain: sin datos, el modelo no se mueve de ahí.
+- El término independiente (bias, casi sin prior) absorbe el nivel medio de
+  rendimiento; los pesos exportados se reescalan a la suma |w| de los por
+  defecto, así que el aprendizaje cambia la importancia relativa de cada
+  campo, no la escala de los scores (ni los umbrales de classify_channel).
+- Solo se guardan las estadísticas suficientes (A = λI + Σ x xᵀ, b = λ w₀ + Σ y x):
+  actualizar con un lote es O(lote · k²) con k = 3 (topic) / 6 (canal), así que
+  se puede llamar en proceso después de cada batch.
+- Artefacto versionado pequeño en data/brain_weights.json
+  (AUREN_BRAIN_WEIGHTS_PATH), que auren_media_brain carga al arrancar.
+  Lo actualizan varios procesos: lectura-modificación-escritura bajo lock de
+  fichero (como topic_memory).
+
+Feedback (una fila por vídeo publicado):
+{"channel": str, "topic": str, "ctr": 0–100, "retention": 0–100, "revenue": 0–100, "ts": epoch?}
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl  # POSIX: lock entre procesos / nodos
+except ImportError:  # Windows → solo lock entre hilos
+    fcntl = None
+
+WEIGHTS_PATH = Path(os.getenv("AUREN_BRAIN_WEIGHTS_PATH", "data/brain_weights.json"))
+ARTIFACT_SCHEMA = 2  # 2: con bias + pesos reescalados (los de v1 no tenían bias)
+
+# Fuerza del prior hacia los pesos por defecto (en "muestras" de features ~50)
+RIDGE_LAMBDA = float(os.getenv("AUREN_BRAIN_RIDGE_LAMBDA", "10000"))
+# Prior casi nulo sobre el bias: se ajusta libremente al nivel medio de y
+BIAS_LAMBDA = 1e-3
+BIAS_FIELD = "_bias"
+
+# Hasta cuándo atrás se busca la decisión que originó un vídeo
+LOOKBACK_S = float(os.getenv("AUREN_BRAIN_LEARN_LOOKBACK_S", str(30 * 86400)))
+
+# Peso de cada métrica en el rendimiento realizado (0–100)
+PERFORMANCE_WEIGHTS = {"ctr": 0.3, "retention": 0.4, "revenue": 0.3}
+
+_lock = threading.Lock()
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Lock entre hilos + lock de fichero (<artefacto>.lock) entre procesos."""
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{path}.lock", "a+") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def performance_score(metrics: Dict[str, Any]) -> Optional[float]:
+    """Rendimiento realizado 0–100 (media ponderada de las métricas presentes)."""
+    total = weight = 0.0
+    for key, w in PERFORMANCE_WEIGHTS.items():
+        value = metrics.get(key)
+        if value is None:
+            continue
+        total += w * float(value)
+        weight += w
+    if weight == 0:
+        return None
+    return max(0.0, min(100.0, total / weight))
+
+
+# ==========================================
+# 💾 ARTEFACTO
+# ==========================================
+
+def load_weights(path: Path = WEIGHTS_PATH) -> Optional[Dict[str, Dict[str, float]]]:
+    """
+    {"topic": {campo: peso}, "channel": {campo: peso}} del artefacto, o None si no hay
+    (o es de otro esquema). No importa numpy: se llama al arrancar el Brain.
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    if data.get("schema") != ARTIFACT_SCHEMA:
+        print(f"⚠️ {path}: esquema de pesos desconocido ({data.get('schema')}), se ignora.")
+        return None
+    return {model: dict(data[model]["weights"]) for model in ("topic", "channel") if model in data}
+
+
+def _load_artifact(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    return data if data.get("schema") == ARTIFACT_SCHEMA else None
+
+
+def _save_artifact(data: Dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ==========================================
+# 🔗 JOIN decisiones ↔ rendimiento
+# ==========================================
+
+def _decision_samples(record: Dict[str, Any]) -> Iterable[Tuple[str, str, Dict[str, float], Dict[str, float]]]:
+    """(canal, topic, topic_features, channel_features) de una línea del log."""
+    decision = record.get("decision", {})
+    if record.get("kind") == "plan":
+        for ch in decision.get("channels", []):
+            ch_feats = ch.get("channel_features") or {}
+            for v in ch.get("videos", []):
+                yield ch.get("name", ""), v.get("topic", ""), v.get("topic_features") or {}, ch_feats
+    else:
+        meta = decision.get("brain_meta", {})
+        yield (
+            decision.get("channel", ""),
+            decision.get("topic", ""),
+            meta.get("topic_features") or {},
+            meta.get("channel_features") or {},
+        )
+
+
+def join_feedback(
+    feedback: List[Dict[str, Any]],
+    log_dir: Optional[Path] = None,
+) -> List[Tuple[Dict[str, float], Dict[str, float], float]]:
+    """
+    Para cada fila de feedback, la decisión más reciente (anterior al feedback)
+    del mismo canal + topic. Lee el log en streaming, solo la ventana LOOKBACK_S.
+    """
+    import brain_decision_log
+
+    wanted: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for row in feedback:
+        y = performance_score(row)
+        if y is None or not row.get("channel") or not row.get("topic"):
+            continue
+        wanted[(row["channel"], row["topic"].strip().lower())] = {"y": y, "ts": row.get("ts", time.time())}
+    if not wanted:
+        return []
+
+    oldest = min(w["ts"] for w in wanted.values()) - LOOKBACK_S
+    kwargs = {"since": oldest}
+    if log_dir is not None:
+        kwargs["directory"] = log_dir
+
+    matched: Dict[Tuple[str, str], Tuple[Dict[str, float], Dict[str, float]]] = {}
+    for record in brain_decision_log.iter_decisions(**kwargs):
+        for channel, topic, t_feats, c_feats in _decision_samples(record):
+            key = (channel, topic.strip().lower())
+            target = wanted.get(key)
+            if target is not None and record["ts"] <= target["ts"]:
+                matched[key] = (t_feats, c_feats)  # el log va en orden → se queda la última
+
+    return [(t, c, wanted[key]["y"]) for key, (t, c) in matched.items()]
+
+
+# ==========================================
+# 📈 RIDGE ONLINE
+# ==========================================
+
+def _init_model(defaults: Dict[str, float]) -> Dict[str, Any]:
+    fields = list(defaults) + [BIAS_FIELD]
+    k = len(fields)
+    prior = [RIDGE_LAMBDA] * (k - 1) + [BIAS_LAMBDA]
+    return {
+        "fields": fields,
+        "A": [[prior[i] if i == j else 0.0 for j in range(k)] for i in range(k)],
+        "b": [RIDGE_LAMBDA * defaults[f] for f in fields[:-1]] + [0.0],
+        "n": 0,
+        "bias": 0.0,
+        "weights": dict(defaults),
+    }
+
+
+def _rescale(raw: Dict[str, float], defaults: Dict[str, float]) -> Dict[str, float]:
+    """Pesos con la misma suma |w| que los por defecto (misma escala de score)."""
+    target = sum(abs(v) for v in defaults.values())
+    total = sum(abs(v) for v in raw.values())
+    scale = target / total if total > 0 else 1.0
+    return {f: round(v * scale, 6) for f, v in raw.items()}
+
+
+def _update_model(
+    model: Dict[str, Any],
+    samples: List[Tuple[Dict[str, float], float]],
+    defaults: Dict[str, float],
+) -> None:
+    import numpy as np
+
+    fields = [f for f in model["fields"] if f != BIAS_FIELD]
+    rows = [(feats, y) for feats, y in samples if all(f in feats for f in fields)]
+    if not rows:
+        return
+    X = np.array([[float(feats[f]) for f in fields] + [1.0] for feats, _ in rows])
+    y = np.array([y for _, y in rows])
+
+    A = np.array(model["A"]) + X.T @ X
+    b = np.array(model["b"]) + X.T @ y
+    w = np.linalg.solve(A, b)
+
+    model["A"] = A.tolist()
+    model["b"] = b.tolist()
+    model["n"] += len(rows)
+    model["bias"] = round(float(w[-1]), 6)
+    model["weights"] = _rescale({f: float(v) for f, v in zip(fields, w[:-1])}, defaults)
+
+
+def learn_from_feedback(
+    feedback: List[Dict[str, Any]],
+    path: Path = WEIGHTS_PATH,
+    log_dir: Optional[Path] = None,
+    apply: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """
+    Actualiza los pesos con un lote de feedback y guarda una nueva versión del artefacto.
+    Cada fila de feedback es un evento: pasarla dos veces la cuenta dos veces.
+    Con `apply`, los pesos nuevos se aplican en caliente al Brain de este proceso.
+    Devuelve el artefacto (o None si ninguna fila casó con una decisión).
+    """
+    import auren_media_brain as brain
+
+    samples = join_feedback(feedback, log_dir=log_dir)
+    if not samples:
+        return None
+
+    with _locked(path):
+        artifact = _load_artifact(path) or {
+            "schema": ARTIFACT_SCHEMA,
+            "version": 0,
+            "topic": _init_model(brain.DEFAULT_TOPIC_WEIGHTS),
+            "channel": _init_model(brain.DEFAULT_CHANNEL_WEIGHTS),
+        }
+        _update_model(artifact["topic"], [(t, y) for t, _, y in samples], brain.DEFAULT_TOPIC_WEIGHTS)
+        _update_model(artifact["channel"], [(c, y) for _, c, y in samples], brain.DEFAULT_CHANNEL_WEIGHTS)
+        artifact["version"] += 1
+        artifact["updated_at"] = time.time()
+        _save_artifact(artifact, path)
+
+    if apply:
+        brain.TOPIC_WEIGHTS.update(artifact["topic"]["weights"])
+        brain.CHANNEL_WEIGHTS.update(artifact["channel"]["weights"])
+
+    print(
+        f"🧠 Pesos del Brain v{artifact['version']} "
+        f"({len(samples)} vídeos nuevos, {artifact['topic']['n']} en total)"
+    )
+    return artifact
@@ -0,0 +1,315 @@
+# brain_plan_stream.py
+"""
+Lectura en streaming de planes del Brain grandes (memoria acotada).
+
+Dos formatos en disco:
+
+1) JSON Lines (.jsonl) — el recomendado para planes auto-generados:
+     {"plan_name": "...", "timezone": "..."}               ← cabecera (opcional)
+     {"channel": {"name": "...", "language": "es", ...}}   ← contexto de canal
+     {"video_id": "...", "topic": "...", ...}              ← un vídeo por línea
+     ...
+   Se lee línea a línea y admite reanudar con seek(): el cursor guardado en
+   data/brain_plan_cursors.json apunta a la primera línea con vídeos pendientes.
+
+2) JSON clásico (brain_plans/*.json, formato plano o channels[].videos[]):
+   parser incremental por bloques; cada vídeo se decodifica y se suelta,
+   sin cargar el fichero entero. Supone (como escribe build_weekly_plan) que
+   los campos del plan / canal van antes de su lista "videos".
+
+Ambos producen pares (vídeo crudo, contexto) que auren_brain_adapter normaliza.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, Optional, Set, Tuple
+
+CURSORS_PATH = Path(os.getenv("AUREN_BRAIN_PLAN_CURSORS_PATH", "data/brain_plan_cursors.json"))
+CHUNK_SIZE = 64 * 1024
+
+_WS = " \t\r\n"
+
+# (vídeo, contexto heredado del plan / canal)
+VideoEntry = Tuple[Dict[str, Any], Dict[str, Any]]
+
+
+def is_jsonl(path: str) -> bool:
+    return str(path).endswith((".jsonl", ".ndjson"))
+
+
+# ==========================================
+# 📜 JSON CLÁSICO — parser incremental
+# ==========================================
+
+class _Reader:
+    """Buffer deslizante sobre el fichero: solo guarda el valor que se está decodificando."""
+
+    def __init__(self, f: IO[str]) -> None:
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"Plan JSON mal formado: se esperaba {ch!r} y llegó {got!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # un número justo al final del buffer puede seguir en el siguiente bloque
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def items(self) -> Iterator[str]:
+        """Claves de un objeto (ya consumida la '{'); deja el lector en el valor."""
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            nxt = self.peek()
+            self.pos += 1
+            if nxt == "}":
+                return
+            if nxt != ",":
+                raise ValueError(f"Plan JSON mal formado: se esperaba ',' o '}}' y llegó {nxt!r}")
+
+    def elements(self) -> Iterator[None]:
+        """Recorre un array; en cada paso el lector está al inicio de un elemento."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            nxt = self.peek()
+            self.pos += 1
+            if nxt == "]":
+                return
+            if nxt != ",":
+                raise ValueError(f"Plan JSON mal formado: se esperaba ',' o ']' y llegó {nxt!r}")
+
+
+def _iter_json_plan(f: IO[str], header: Dict[str, Any]) -> Iterator[VideoEntry]:
+    r = _Reader(f)
+    r.expect("{")
+    for key in r.items():
+        if key == "videos":
+            for _ in r.elements():
+                v = r.value()
+                if isinstance(v, dict):
+                    yield v, header
+        elif key == "channels":
+            for _ in r.elements():
+                if r.peek() != "{":
+                    r.value()
+                    continue
+                r.expect("{")
+                ctx: Dict[str, Any] = {"_channel": True}
+                for ckey in r.items():
+                    if ckey == "videos":
+                        for _ in r.elements():
+                            v = r.value()
+                            if isinstance(v, dict):
+                                yield v, ctx
+                    else:
+                        ctx[ckey] = r.value()
+        else:
+            header[key] = r.value()
+
+
+# ==========================================
+# 📃 JSON LINES
+# ==========================================
+
+def _iter_jsonl_plan(
+    f: IO[bytes],
+    header: Dict[str, Any],
+    offset: int = 0,
+    ctx: Optional[Dict[str, Any]] = None,
+) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any], int]]:
+    """(vídeo, contexto, offset de la línea) a partir de `offset`."""
+    ctx = dict(ctx) if ctx else {}
+    f.seek(offset)
+    pos = offset
+    for raw in f:
+        line_pos, pos = pos, pos + len(raw)
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError:
+            print(f"⚠️ Línea de plan inválida en el byte {line_pos}, se ignora.")
+            continue
+        if not isinstance(obj, dict):
+            continue
+        if isinstance(obj.get("channel"), dict):
+            ctx = {"_channel": True, **obj["channel"]}
+        elif "topic" in obj or "seed_topic" in obj or "video_id" in obj:
+            yield obj, ctx or header, line_pos
+        else:
+            header.update(obj)
+
+
+def write_plan_jsonl(plan: Dict[str, Any], path: str) -> int:
+    """
+    Convierte un plan (dict, p. ej. de build_weekly_plan) a JSON Lines.
+    Devuelve el número de vídeos escritos.
+    """
+    header = {k: v for k, v in plan.items() if k not in ("channels", "videos")}
+    n = 0
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for v in plan.get("videos") or []:
+            f.write(json.dumps(v, ensure_ascii=False) + "\n")
+            n += 1
+        for ch in plan.get("channels") or []:
+            ch_ctx = {k: v for k, v in ch.items() if k != "videos"}
+            f.write(json.dumps({"channel": ch_ctx}, ensure_ascii=False) + "\n")
+            for v in ch.get("videos") or []:
+                f.write(json.dumps(v, ensure_ascii=False) + "\n")
+                n += 1
+    os.replace(tmp, path)
+    return n
+
+
+# ==========================================
+# ⏩ CURSOR DE REANUDACIÓN (solo JSONL)
+# ==========================================
+
+def _fingerprint(path: str) -> str:
+    """Hash de la primera línea: si el fichero se reescribe, el cursor deja de valer."""
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.readline()).hexdigest()
+
+
+def _load_cursors() -> Dict[str, Dict[str, Any]]:
+    try:
+        return json.loads(CURSORS_PATH.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def load_cursor(key: str, path: str) -> Optional[Dict[str, Any]]:
+    cur = _load_cursors().get(key)
+    if not cur or cur.get("fingerprint") != _fingerprint(path):
+        return None
+    if cur.get("offset", 0) > os.path.getsize(path):
+        return None
+    return cur
+
+
+def save_cursor(key: str, path: str, offset: int, header: Dict[str, Any], ctx: Dict[str, Any]) -> None:
+    """
+    Guarda dónde empieza lo pendiente. Es solo un atajo: todo lo anterior al
+    cursor está en el ledger, así que un cursor viejo (más atrás) sigue siendo correcto.
+    """
+    cursors = _load_cursors()
+    prev = cursors.get(key)
+    fp = _fingerprint(path)
+    if prev and prev.get("fingerprint") == fp and prev.get("offset", 0) >= offset:
+        return
+    cursors[key] = {"fingerprint": fp, "offset": offset, "header": header, "ctx": ctx}
+    CURSORS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CURSORS_PATH.with_name(f"{CURSORS_PATH.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(cursors, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, CURSORS_PATH)
+
+
+# ==========================================
+# 🚪 API
+# ==========================================
+
+def read_header(path: str) -> Dict[str, Any]:
+    """
+    Campos del plan que aparecen antes del primer vídeo (plan_name, meta, timezone...).
+    Lee solo hasta ahí.
+    """
+    header: Dict[str, Any] = {}
+    for _ in iter_plan_file(path, header):
+        break
+    return header
+
+
+def iter_plan_file(path: str, header: Optional[Dict[str, Any]] = None) -> Iterator[VideoEntry]:
+    """Todos los vídeos del fichero, en orden, con memoria acotada (cualquier formato)."""
+    header = {} if header is None else header
+    if is_jsonl(path):
+        with open(path, "rb") as f:
+            for v, ctx, _ in _iter_jsonl_plan(f, header):
+                yield v, ctx
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from _iter_json_plan(f, header)
+
+
+def iter_pending_plan_file(
+    path: str,
+    key: str,
+    done: Set[str],
+    video_id_of,
+) -> Iterator[VideoEntry]:
+    """
+    Vídeos cuyo video_id no está en `done` (ledger). En JSONL salta directamente
+    al cursor guardado y lo adelanta hasta el primer vídeo pendiente.
+    """
+    if not is_jsonl(path):
+        for v, ctx in iter_plan_file(path):
+            if video_id_of(v, ctx) not in done:
+                yield v, ctx
+        return
+
+    cur = load_cursor(key, path)
+    header: Dict[str, Any] = dict(cur["header"]) if cur else {}
+    first_pending = None
+    with open(path, "rb") as f:
+        entries = _iter_jsonl_plan(
+            f, header, offset=cur["offset"] if cur else 0, ctx=cur["ctx"] if cur else None
+        )
+        for v, ctx, line_pos in entries:
+            if video_id_of(v, ctx) in done:
+                continue
+            if first_pending is None:
+                first_pending = line_pos
+                save_cursor(key, path, line_pos, header, ctx if ctx is not header else {})
+            yield v, ctx
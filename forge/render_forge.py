@@ -1,11 +1,15 @@
 # forge/render_forge.py
 
+from __future__ import annotations
+
 import os
 import glob
 import time
-from typing import Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Dict, Any, Optional, List
 
-from moviepy.editor import VideoFileClip, concatenate_videoclips
+# moviepy arrastra NumPy + imageio: solo se importa cuando de verdad renderizamos
+if TYPE_CHECKING:
+    from moviepy.editor import VideoFileClip
 
 
 def _slugify(text: str) -> str:
@@ -42,6 +46,8 @@ def build_vertical_video_from_assets(
     - Corta la duración total a max_duration segundos (si se indica).
     """
 
+    from moviepy.editor import VideoFileClip, concatenate_videoclips
+
     if not os.path.isdir(assets_folder):
         raise FileNotFoundError(f"Carpeta de assets no encontrada: {assets_folder}")
 
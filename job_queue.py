@@ -0,0 +1,517 @@
+# job_queue.py
+"""
+Cola de trabajos persistente para el modo worker de AUTO GOLD.
+
+- Vive en un fichero SQLite (por defecto data/auren_jobs.sqlite).
+  Puede estar en almacenamiento compartido (NFS / SMB con locks de fichero
+  funcionales) para que varias máquinas repartan la carga.
+- La alimentan channel_router (semillas) o los planes del Brain.
+- auto_gold.run_worker() la vacía con N workers en paralelo.
+
+Estados de un job:
+    pending → running → done
+                      ↘ failed (tras agotar reintentos)
+
+Protocolo de leasing (multi-nodo):
+- Al reclamar un job, el worker se lo queda con un lease de LEASE_SECONDS.
+- Mientras lo procesa, un hilo de heartbeat renueva el lease.
+- Si el nodo muere, el lease caduca y cualquier otro worker lo vuelve a reclamar.
+- complete()/fail() solo tienen efecto si el worker sigue siendo el dueño del lease.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PATH = Path(os.getenv("AUREN_JOB_QUEUE_PATH", "data/auren_jobs.sqlite"))
+
+# Reintentos antes de marcar un job como 'failed'
+MAX_ATTEMPTS = int(os.getenv("AUREN_JOB_MAX_ATTEMPTS", "3"))
+
+# Duración del lease; el heartbeat lo renueva cada LEASE_SECONDS / 3
+LEASE_SECONDS = float(os.getenv("AUREN_JOB_LEASE_SECONDS", "120"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedupe_key  TEXT UNIQUE,
+    payload     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    result      TEXT,
+    error       TEXT,
+    lease_owner       TEXT,
+    lease_expires_at  REAL,
+    heartbeat_at      REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+"""
+
+# Columnas añadidas con el leasing (para colas creadas con la versión anterior)
+_LEASE_COLUMNS = {
+    "lease_owner": "TEXT",
+    "lease_expires_at": "REAL",
+    "heartbeat_at": "REAL",
+}
+
+
+def new_worker_id() -> str:
+    """Identificador único de worker: host + pid + sufijo aleatorio."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def _connect() -> sqlite3.Connection:
+    """
+    Abre una conexión nueva (una por llamada: así es seguro usarla desde
+    varios hilos y procesos sin compartir objetos sqlite3 entre ellos).
+    """
+    PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(PATH), timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA)
+
+    existing = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)").fetchall()}
+    for col, col_type in _LEASE_COLUMNS.items():
+        if col not in existing:
+            try:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {col} {col_type}")
+            except sqlite3.OperationalError:
+                # Otro proceso la añadió a la vez
+                pass
+    return conn
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "dedupe_key": row["dedupe_key"],
+        "payload": json.loads(row["payload"]),
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "lease_owner": row["lease_owner"],
+    }
+
+
+def enqueue(
+    payload: Dict[str, Any],
+    dedupe_key: str | None = None,
+    retry_failed: bool = False,
+) -> Optional[int]:
+    """
+    Añade un job a la cola.
+    Si ya existe otro con el mismo dedupe_key, no se duplica → devuelve None.
+    Con `retry_failed`, un job 'failed' con ese dedupe_key vuelve a 'pending'
+    (intentos a cero, payload nuevo) y se devuelve su id.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        if retry_failed and dedupe_key is not None:
+            row = conn.execute(
+                "INSERT INTO jobs (dedupe_key, payload, status, created_at, updated_at) "
+                "VALUES (?, ?, 'pending', ?, ?) "
+                "ON CONFLICT(dedupe_key) DO UPDATE SET "
+                "status = 'pending', attempts = 0, error = NULL, payload = excluded.payload, "
+                "lease_owner = NULL, lease_expires_at = NULL, updated_at = excluded.updated_at "
+                "WHERE jobs.status = 'failed' "
+                "RETURNING id",
+                (dedupe_key, json.dumps(payload, ensure_ascii=False), now, now),
+            ).fetchone()
+            return row["id"] if row else None
+
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO jobs (dedupe_key, payload, status, created_at, updated_at) "
+            "VALUES (?, ?, 'pending', ?, ?)",
+            (dedupe_key, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+        return cur.lastrowid if cur.rowcount else None
+    finally:
+        conn.close()
+
+
+def claim_next(
+    worker_id: str,
+    lease_seconds: float | None = None,
+    dedupe_prefix: str | None = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Reserva (de forma atómica) el siguiente job y lo pasa a 'running' con lease.
+
+    Candidatos:
+      - jobs 'pending'
+      - jobs 'running' cuyo lease ha caducado (su worker murió)
+    Con `dedupe_prefix`, solo los jobs cuyo dedupe_key empieza por él
+    (p. ej. "brain:<plan_key>:" → solo los vídeos de ese plan).
+
+    Devuelve None si no hay nada que hacer.
+    """
+    lease = lease_seconds or LEASE_SECONDS
+    conn = _connect()
+    try:
+        # BEGIN IMMEDIATE → bloqueo de escritura: dos workers nunca cogen el mismo job
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+
+        # Jobs huérfanos que ya agotaron intentos → failed (no se reintentan para siempre)
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', lease_owner = NULL, "
+            "error = COALESCE(error, 'lease caducado'), updated_at = ? "
+            "WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?",
+            (now, now, MAX_ATTEMPTS),
+        )
+
+        where = "(status = 'pending' OR (status = 'running' AND lease_expires_at < ?))"
+        params: tuple = (now,)
+        if dedupe_prefix:
+            # substr y no LIKE: LIKE no distingue mayúsculas y trata _ y % como comodines
+            where += " AND substr(dedupe_key, 1, ?) = ?"
+            params += (len(dedupe_prefix), dedupe_prefix)
+        row = conn.execute(f"SELECT * FROM jobs WHERE {where} ORDER BY id LIMIT 1", params).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+
+        if row["status"] == "running":
+            print(f"♻️ Job {row['id']} recuperado: el lease de {row['lease_owner']} caducó.")
+
+        conn.execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+            "lease_owner = ?, lease_expires_at = ?, heartbeat_at = ?, updated_at = ? "
+            "WHERE id = ?",
+            (worker_id, now + lease, now, now, row["id"]),
+        )
+        conn.execute("COMMIT")
+
+        job = _row_to_job(row)
+        job["status"] = "running"
+        job["attempts"] += 1
+        job["lease_owner"] = worker_id
+        return job
+    except Exception:
+        # Si falló el propio BEGIN (p. ej. "database is locked") no hay nada que deshacer
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def heartbeat(job_ids: List[int], worker_id: str, lease_seconds: float | None = None) -> List[int]:
+    """
+    Renueva el lease de los jobs indicados.
+    Devuelve los ids cuyo lease se ha perdido (otro worker se los quedó).
+    """
+    if not job_ids:
+        return []
+
+    lease = lease_seconds or LEASE_SECONDS
+    now = time.time()
+    lost: List[int] = []
+    conn = _connect()
+    try:
+        for job_id in job_ids:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, heartbeat_at = ? "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (now + lease, now, job_id, worker_id),
+            )
+            if not cur.rowcount:
+                lost.append(job_id)
+    finally:
+        conn.close()
+    return lost
+
+
+def complete(job_id: int, worker_id: str, result: Dict[str, Any] | None = None) -> bool:
+    """
+    Marca el job como 'done' si este worker sigue siendo el dueño del lease.
+    Devuelve False si otro worker se lo quedó entretanto.
+    """
+    conn = _connect()
+    try:
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, "
+            "lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+            "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (json.dumps(result or {}, ensure_ascii=False), time.time(), job_id, worker_id),
+        )
+        return bool(cur.rowcount)
+    finally:
+        conn.close()
+
+
+def fail(job_id: int, worker_id: str, error: str) -> bool:
+    """
+    Registra un fallo. Si quedan intentos, el job vuelve a 'pending';
+    si no, queda en 'failed' para revisión manual.
+    """
+    conn = _connect()
+    try:
+        cur = conn.execute(
+            "UPDATE jobs SET "
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+            "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+            (MAX_ATTEMPTS, error[:2000], time.time(), job_id, worker_id),
+        )
+        return bool(cur.rowcount)
+    finally:
+        conn.close()
+
+
+def requeue_expired() -> int:
+    """
+    Devuelve a 'pending' los jobs 'running' cuyo lease caducó (nodos muertos).
+    claim_next() ya los recoge solo; esto sirve para mantenimiento / dashboards.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        cur = conn.execute(
+            "UPDATE jobs SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL, "
+            "updated_at = ? WHERE status = 'running' AND lease_expires_at < ?",
+            (now, now),
+        )
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def counts() -> Dict[str, int]:
+    """Número de jobs por estado (para logs / dashboard)."""
+    conn = _connect()
+    try:
+        rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+    finally:
+        conn.close()
+
+
+def list_jobs(status: str | None = None, limit: int = 50) -> List[Dict[str, Any]]:
+    conn = _connect()
+    try:
+        if status:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY id LIMIT ?", (status, limit)
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [_row_to_job(r) for r in rows]
+    finally:
+        conn.close()
+
+
+# ============================================================
+# 👷 BUCLE GENÉRICO DE WORKER (claims + heartbeat + complete)
+# ============================================================
+
+def run_lease_worker(
+    handler: Callable[[Dict[str, Any]], Dict[str, Any] | None],
+    workers: int = 2,
+    poll_interval: float = 5.0,
+    max_jobs: int | None = None,
+    exit_when_empty: bool = False,
+    stop: threading.Event | None = None,
+    worker_id: str | None = None,
+    lease_seconds: float | None = None,
+    dedupe_prefix: str | None = None,
+) -> int:
+    """
+    Reclama jobs y los ejecuta con `handler(job)` en `workers` hilos.
+
+    - Un hilo de heartbeat renueva los leases de los jobs en curso.
+    - `dedupe_prefix` → solo reclama los jobs cuyo dedupe_key empieza por él (ver claim_next).
+    - `stop` (Event) → parada limpia: no se reclaman más jobs y se esperan los que están en curso.
+    - Devuelve el número de jobs procesados por este worker.
+    """
+    stop = stop or threading.Event()
+    worker_id = worker_id or new_worker_id()
+    lease = lease_seconds or LEASE_SECONDS
+    workers = max(1, workers)
+
+    in_flight: Dict[Any, int] = {}  # future → job_id
+    # jobs cuyo handler sigue corriendo (los que el heartbeat debe renovar);
+    # se quitan ANTES de complete()/fail() para no renovar jobs ya cerrados
+    active: set = set()
+    in_flight_lock = threading.Lock()
+    hb_stop = threading.Event()
+
+    def _heartbeat_loop():
+        while not hb_stop.wait(lease / 3):
+            with in_flight_lock:
+                ids = list(active)
+            lost = heartbeat(ids, worker_id, lease)
+            with in_flight_lock:
+                lost = [job_id for job_id in lost if job_id in active]
+            for job_id in lost:
+                print(f"⚠️ [{worker_id}] Lease perdido para el job {job_id}.")
+
+    def _process(job: Dict[str, Any]) -> None:
+        print(f"▶️ [{worker_id}] Job {job['id']} — intento {job['attempts']}")
+        try:
+            result = handler(job)
+        except Exception as e:
+            with in_flight_lock:
+                active.discard(job["id"])
+            print(f"❌ [{worker_id}] Job {job['id']} falló: {e}")
+            fail(job["id"], worker_id, str(e))
+            return
+        with in_flight_lock:
+            active.discard(job["id"])
+        if complete(job["id"], worker_id, result):
+            print(f"✅ [{worker_id}] Job {job['id']} completado.")
+        else:
+            print(f"⚠️ [{worker_id}] Job {job['id']} terminado, pero el lease ya no era nuestro.")
+
+    hb_thread = threading.Thread(target=_heartbeat_loop, name="auren-heartbeat", daemon=True)
+    hb_thread.start()
+
+    processed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auren-job") as pool:
+        while not stop.is_set():
+            # Rellenar huecos libres con jobs de la cola
+            while len(in_flight) < workers and not stop.is_set():
+                if max_jobs is not None and processed + len(in_flight) >= max_jobs:
+                    break
+                job = claim_next(worker_id, lease, dedupe_prefix)
+                if job is None:
+                    break
+                with in_flight_lock:
+                    active.add(job["id"])
+                    in_flight[pool.submit(_process, job)] = job["id"]
+
+            if not in_flight:
+                if exit_when_empty or (max_jobs is not None and processed >= max_jobs):
+                    break
+                stop.wait(poll_interval)
+                continue
+
+            done, _ = wait(list(in_flight), timeout=poll_interval, return_when=FIRST_COMPLETED)
+            with in_flight_lock:
+                for fut in done:
+                    in_flight.pop(fut, None)
+            processed += len(done)
+
+        # Parada limpia: dejamos acabar lo que ya estaba en marcha (con heartbeat activo)
+        for fut in list(in_flight):
+            fut.result()
+            processed += 1
+
+    hb_stop.set()
+    return processed
+
+
+# ============================================================
+# 🧪 SIMULACIÓN LOCAL MULTI-NODO
+# ============================================================
+
+def _simulated_node(node_idx: int, queue_path: str, memory_path: str, lease_seconds: float, crash: bool):
+    """
+    Proceso hijo que hace de "nodo". Cada job es un sleep corto;
+    la completion idempotente pasa por topic_memory.mark_used.
+    Si crash=True, el nodo muere a mitad de su primer job (sin liberar el lease).
+    """
+    global PATH
+    PATH = Path(queue_path)
+
+    import topic_memory
+    topic_memory.PATH = Path(memory_path)
+
+    def handler(job):
+        p = job["payload"]
+        if topic_memory.is_used(p["channel_id"], p["topic_slug"]):
+            return {"skipped": "ya completado por otro nodo"}
+        time.sleep(0.2)
+        if crash:
+            print(f"💥 Nodo {node_idx} muere con el job {job['id']} a medias.")
+            os._exit(1)
+        topic_memory.mark_used(p["channel_id"], p["topic_slug"])
+        return {"node": node_idx}
+
+    run_lease_worker(
+        handler,
+        workers=2,
+        poll_interval=0.2,
+        exit_when_empty=True,
+        worker_id=f"node{node_idx}",
+        lease_seconds=lease_seconds,
+    )
+
+
+def simulate_nodes(nodes: int = 3, jobs: int = 12, lease_seconds: float = 1.5) -> Dict[str, Any]:
+    """
+    Simula varios nodos compartiendo una cola SQLite en un directorio temporal.
+    El nodo 0 muere a mitad de un job: su lease caduca y otro nodo lo recupera.
+    Devuelve un resumen con el estado final de la cola y de topic_memory.
+    """
+    import multiprocessing
+    import tempfile
+
+    global PATH
+    old_path = PATH
+
+    with tempfile.TemporaryDirectory() as tmp:
+        PATH = Path(tmp) / "jobs.sqlite"
+        memory_path = Path(tmp) / "topics_used.json"
+        try:
+            for i in range(jobs):
+                enqueue({"channel_id": "sim", "topic_slug": f"topic-{i}"}, dedupe_key=f"sim:{i}")
+
+            procs = [
+                multiprocessing.Process(
+                    target=_simulated_node,
+                    args=(i, str(PATH), str(memory_path), lease_seconds, i == 0),
+                )
+                for i in range(nodes)
+            ]
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+
+            # Si todos los nodos supervivientes salieron antes de que caducara el lease
+            # del nodo muerto, un último barrido recoge lo que quede.
+            if counts().get("running") or counts().get("pending"):
+                import topic_memory
+                old_memory_path = topic_memory.PATH
+                time.sleep(lease_seconds)
+                try:
+                    _simulated_node(nodes, str(PATH), str(memory_path), lease_seconds, False)
+                finally:
+                    topic_memory.PATH = old_memory_path
+
+            used = json.loads(memory_path.read_text(encoding="utf-8")) if memory_path.exists() else {}
+            return {
+                "queue": counts(),
+                "topics_completed": len(used.get("sim", [])),
+                "jobs": jobs,
+            }
+        finally:
+            PATH = old_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cola de jobs de AUREN AUTO GOLD")
+    parser.add_argument("--counts", action="store_true", help="muestra jobs por estado")
+    parser.add_argument("--requeue-expired", action="store_true", help="devuelve a pending los leases caducados")
+    parser.add_argument("--simulate-nodes", type=int, metavar="N", help="simula N nodos en local")
+    parser.add_argument("--jobs", type=int, default=12, help="jobs para la simulación")
+    args = parser.parse_args()
+
+    if args.requeue_expired:
+        print(f"♻️ Jobs recuperados: {requeue_expired()}")
+    if args.counts:
+        print(counts())
+    if args.simulate_nodes:
+        print(simulate_nodes(nodes=args.simulate_nodes, jobs=args.jobs))
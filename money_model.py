@@ -0,0 +1,310 @@
+# money_model.py
+"""
+💰 money_score local: caché TTL del HUB + modelo NumPy.
+
+1) Caché (topic, lang) → {views_30d, intent, ads_density, money_score}
+   en data/money_flow_cache.json. Dentro del TTL no se vuelve a llamar al HUB.
+   Las entradas caducadas se quedan como datos de entrenamiento.
+
+2) Modelo local: ridge regression (forma cerrada) sobre features hasheadas
+   de las palabras del topic + idioma, ajustada con TODAS las respuestas del HUB
+   que hay en la caché. Sirve para:
+     - pre-ranking: puntuar miles de topics candidatos en un solo producto matricial
+     - fallback offline cuando el HUB no responde
+
+numpy se importa solo al usar el modelo (no al arrancar AUTO GOLD).
+Sin numpy o sin datos suficientes → heurística por palabras clave.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+
+try:
+    import fcntl  # POSIX: caché compartida entre procesos (varios workers)
+except ImportError:  # Windows → solo entre hilos
+    fcntl = None
+
+if TYPE_CHECKING:
+    import numpy as np
+
+CACHE_PATH = Path(os.getenv("AUREN_MONEY_CACHE_PATH", "data/money_flow_cache.json"))
+MODEL_PATH = Path(os.getenv("AUREN_MONEY_MODEL_PATH", "data/money_model.npz"))
+CACHE_TTL_S = float(os.getenv("AUREN_MONEY_CACHE_TTL_S", str(6 * 3600)))
+
+# Features hasheadas (palabras + bigramas + idioma)
+N_FEATURES = 512
+RIDGE_LAMBDA = 1.0
+MIN_SAMPLES = 20            # por debajo → heurística
+REFIT_GROWTH = 1.2          # reajustar cuando la caché crece un 20 %
+
+TARGETS = ("views_30d", "intent", "ads_density", "money_score")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_lock = threading.Lock()
+_cache: Dict[str, Dict[str, Any]] | None = None
+_model: Dict[str, Any] | None = None
+
+
+# ==========================================
+# 🗃️ CACHÉ TTL
+# ==========================================
+
+def _key(topic: str, lang: str) -> str:
+    return f"{lang}|{topic.strip().lower()}"
+
+
+def _load_cache() -> Dict[str, Dict[str, Any]]:
+    global _cache
+    if _cache is None:
+        try:
+            _cache = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            _cache = {}
+    return _cache
+
+
+def _save_cache(updates: Dict[str, Dict[str, Any]]) -> None:
+    """Mezcla `updates` con lo que haya en disco (otros procesos) y escribe atómicamente."""
+    global _cache
+    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = None
+    if fcntl is not None:
+        lock_file = open(f"{CACHE_PATH}.lock", "a+")
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+    try:
+        _cache = None
+        cache = _load_cache()
+        cache.update(updates)
+        tmp = CACHE_PATH.with_name(f"{CACHE_PATH.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(cache, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, CACHE_PATH)
+    finally:
+        if lock_file is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            lock_file.close()
+
+
+def cache_lookup(topics: Sequence[str], lang: str) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Devuelve (hits, misses):
+      - hits: {topic: fila del HUB} para los topics con entrada dentro del TTL
+      - misses: topics que hay que pedir al HUB (en el orden recibido)
+    """
+    now = time.time()
+    hits: Dict[str, Dict[str, Any]] = {}
+    misses: List[str] = []
+    with _lock:
+        cache = _load_cache()
+        for topic in topics:
+            entry = cache.get(_key(topic, lang))
+            if entry and now - entry["ts"] < CACHE_TTL_S:
+                hits[topic] = {**entry["row"], "topic": topic, "source": "cache"}
+            elif topic not in misses:
+                misses.append(topic)
+    return hits, misses
+
+
+def cache_store(rows: Sequence[Dict[str, Any]], lang: str) -> None:
+    """Guarda filas del HUB (solo las reales: nunca las estimadas en local)."""
+    now = time.time()
+    updates: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        if row.get("source") in ("local", "local_model", "cache") or not row.get("topic"):
+            continue
+        updates[_key(row["topic"], lang)] = {
+            "ts": now,
+            "lang": lang,
+            "row": {t: float(row.get(t, 0.0) or 0.0) for t in TARGETS},
+        }
+    if updates:
+        with _lock:
+            _save_cache(updates)
+
+
+# ==========================================
+# 🧮 MODELO NUMPY
+# ==========================================
+
+def _bucket(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little") % N_FEATURES
+
+
+def featurize(topics: Sequence[str], lang: str) -> "np.ndarray":
+    """Matriz (n, N_FEATURES + 1) de features hasheadas; última columna = bias."""
+    import numpy as np
+
+    rows: List[int] = []
+    cols: List[int] = []
+    for i, topic in enumerate(topics):
+        tokens = _TOKEN_RE.findall(topic.lower())
+        grams = tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])] + [f"lang={lang}"]
+        for g in grams:
+            rows.append(i)
+            cols.append(_bucket(g))
+
+    X = np.zeros((len(topics), N_FEATURES + 1), dtype=np.float32)
+    np.add.at(X, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+    X[:, :N_FEATURES] /= np.maximum(np.linalg.norm(X[:, :N_FEATURES], axis=1, keepdims=True), 1.0)
+    X[:, N_FEATURES] = 1.0
+    return X
+
+
+def fit(force: bool = False) -> Dict[str, Any] | None:
+    """
+    Ajusta el modelo con todas las filas de la caché (ridge, forma cerrada):
+        W = (XᵀX + λI)⁻¹ XᵀY
+    `views_30d` se aprende en log1p. Devuelve el modelo o None si no hay datos / numpy.
+    """
+    global _model
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    with _lock:
+        entries = list(_load_cache().items())
+
+    if len(entries) < MIN_SAMPLES:
+        return None
+    if not force and _model is not None and len(entries) < _model["n_samples"] * REFIT_GROWTH:
+        return _model
+
+    by_lang: Dict[str, List[Tuple[str, Dict[str, float]]]] = {}
+    for key, entry in entries:
+        lang, topic = key.split("|", 1)
+        by_lang.setdefault(lang, []).append((topic, entry["row"]))
+
+    X = np.vstack([featurize([t for t, _ in items], lang) for lang, items in by_lang.items()])
+    Y = np.array(
+        [[row[t] for t in TARGETS] for items in by_lang.values() for _, row in items],
+        dtype=np.float64,
+    )
+    Y[:, 0] = np.log1p(np.maximum(Y[:, 0], 0.0))
+
+    reg = RIDGE_LAMBDA * np.eye(X.shape[1])
+    reg[-1, -1] = 0.0  # el bias no se regulariza
+    W = np.linalg.solve(X.T @ X + reg, X.T @ Y)
+
+    _model = {"W": W, "n_samples": len(entries)}
+    MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(MODEL_PATH, W=W, n_samples=len(entries))
+    return _model
+
+
+def _get_model() -> Dict[str, Any] | None:
+    global _model
+    if _model is None and MODEL_PATH.exists():
+        try:
+            import numpy as np
+
+            data = np.load(MODEL_PATH)
+            if data["W"].shape[0] == N_FEATURES + 1:
+                _model = {"W": data["W"], "n_samples": int(data["n_samples"])}
+        except Exception as e:
+            print(f"⚠️ No se pudo cargar {MODEL_PATH}: {e}")
+    # fit() devuelve None si la caché bajó de MIN_SAMPLES: el modelo guardado sigue valiendo
+    return fit() or _model
+
+
+def predict_matrix(topics: Sequence[str], lang: str) -> "np.ndarray | None":
+    """
+    (n, 4) con views_30d, intent, ads_density, money_score estimados para todos
+    los topics en una sola operación. None si no hay modelo.
+    """
+    model = _get_model()
+    if model is None or not topics:
+        return None
+
+    import numpy as np
+
+    P = featurize(topics, lang) @ model["W"]
+    P[:, 0] = np.expm1(P[:, 0])
+    P[:, 1:] = np.clip(P[:, 1:], 0.0, 100.0)
+    P[:, 0] = np.maximum(P[:, 0], 0.0)
+    return P
+
+
+# ==========================================
+# 📊 API para AUTO GOLD
+# ==========================================
+
+# Palabras que suelen indicar intención de compra / monetización alta
+_MONEY_INTENT_WORDS = (
+    "dinero", "ganar", "invertir", "inversión", "negocio", "ingresos", "ahorrar",
+    "afiliado", "vender", "ia", "cripto", "bolsa", "freelance", "emprender",
+)
+_LOW_INTENT_WORDS = ("niños", "historia", "mitos", "explicado")
+
+
+def heuristic_rows(topics: Sequence[str]) -> List[Dict[str, Any]]:
+    """Heurística por palabras clave (sin numpy ni datos)."""
+    rows: List[Dict[str, Any]] = []
+    for topic in topics:
+        words = topic.lower()
+        hits = sum(1 for w in _MONEY_INTENT_WORDS if w in words)
+        misses = sum(1 for w in _LOW_INTENT_WORDS if w in words)
+        intent = max(5.0, min(95.0, 40.0 + 12.0 * hits - 10.0 * misses))
+        ads_density = max(5.0, min(90.0, 30.0 + 8.0 * hits))
+        rows.append(
+            {
+                "topic": topic,
+                "views_30d": 0,
+                "intent": intent,
+                "ads_density": ads_density,
+                "money_score": round(0.6 * intent + 0.4 * ads_density, 1),
+                "source": "local",
+            }
+        )
+    return rows
+
+
+def local_rows(topics: Sequence[str], lang: str = "es") -> List[Dict[str, Any]]:
+    """
+    Filas con la misma forma que /topic_money_flow, estimadas en local:
+    modelo NumPy si hay datos, heurística si no.
+    """
+    P = predict_matrix(topics, lang)
+    if P is None:
+        return heuristic_rows(topics)
+
+    return [
+        {
+            "topic": topic,
+            "views_30d": int(round(float(p[0]))),
+            "intent": round(float(p[1]), 1),
+            "ads_density": round(float(p[2]), 1),
+            "money_score": round(float(p[3]), 1),
+            "source": "local_model",
+        }
+        for topic, p in zip(topics, P)
+    ]
+
+
+def prerank(topics: Sequence[str], lang: str = "es", top_k: int = 20) -> List[str]:
+    """
+    Pre-ranking barato: se queda con los `top_k` topics de mayor money_score
+    estimado (en local) para que solo esos vayan al HUB. Mantiene el orden por score.
+    """
+    if len(topics) <= top_k:
+        return list(topics)
+
+    P = predict_matrix(topics, lang)
+    if P is None:
+        scores = [r["money_score"] for r in heuristic_rows(topics)]
+        order = sorted(range(len(topics)), key=lambda i: scores[i], reverse=True)[:top_k]
+        return [topics[i] for i in order]
+
+    import numpy as np
+
+    scores = P[:, 3]
+    idx = np.argpartition(-scores, top_k - 1)[:top_k]
+    idx = idx[np.argsort(-scores[idx])]
+    return [topics[i] for i in idx]
@@ -0,0 +1,240 @@
+# quality_gate.py
+"""
+🚦 Quality gate del guion V2.
+
+Se ejecuta justo después de AUREN_SCRIPT_DOCTOR y ANTES del fan-out caro
+(retención, clips, títulos, media plan, CTR, QA, render):
+
+  1) Scorer heurístico local (gratis, sin LLM): longitud, hook, ritmo, CTA...
+  2) Solo si la nota heurística queda en zona dudosa → AUREN_QUALITY_RATER (LLM).
+  3) Si no pasa: se regenera con SCRIPT_DOCTOR (presupuesto acotado) o se aborta
+     el topic, sin gastar tokens ni minutos de render en un guion que
+     rechazaríamos igualmente.
+
+    verdict = evaluate_script(script_v2, platform="YouTube Shorts")
+    if not verdict["passed"]: ...
+"""
+
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+# ==========================================
+# ⚙️ CONFIG
+# ==========================================
+GATE_ENABLED = os.getenv("AUREN_QUALITY_GATE", "1").strip().lower() not in ("0", "false", "no", "off")
+MIN_SCORE = float(os.getenv("AUREN_QUALITY_MIN_SCORE", "6.0"))
+REGEN_BUDGET = int(os.getenv("AUREN_QUALITY_REGEN_BUDGET", "1"))
+USE_RATER = os.getenv("AUREN_QUALITY_USE_RATER", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# Zona dudosa: con heurística >= MIN_SCORE + MARGIN se aprueba sin LLM,
+# con heurística < MIN_SCORE - MARGIN se rechaza sin LLM.
+RATER_MARGIN = 1.5
+
+# Objetivo de SCRIPT_DOCTOR: 120–220 palabras
+TARGET_WORDS = (120, 220)
+
+# Palabras de CTA por idioma; en idiomas sin lista no se penaliza la falta de CTA
+_CTA_WORDS: Dict[str, tuple] = {
+    "es": (
+        "sígueme", "sigueme", "suscríbete", "suscribete", "comenta", "guarda",
+        "comparte", "link", "enlace", "bio", "descubre", "empieza", "prueba",
+    ),
+    "en": (
+        "follow", "subscribe", "comment", "save", "share", "link", "bio",
+        "discover", "start", "try", "check out",
+    ),
+    "pt": (
+        "siga", "segue", "inscreva", "comente", "salve", "compartilhe", "link",
+        "bio", "descubra", "comece", "experimente",
+    ),
+}
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_RE = re.compile(r"[^.!?¿¡\n]+[.!?\n]?")
+_SCORE_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*(?:/\s*10|de\s+10|sobre\s+10)", re.IGNORECASE)
+# La escala repetida por el rater ("Nota global (0–10): 8") no es la nota
+_SCALE_RE = re.compile(r"\(?\b0\s*(?:[–—-]|a|to)\s*10\b\)?", re.IGNORECASE)
+_LABELED_SCORE_RE = re.compile(r"(?:nota|score|puntuaci[oó]n)[^0-9\n]{0,20}(10|\d(?:[.,]\d+)?)", re.IGNORECASE)
+
+
+# ==========================================
+# 🧮 SCORER HEURÍSTICO (local)
+# ==========================================
+
+def heuristic_score(script: str, lang: str = "es") -> Dict[str, Any]:
+    """
+    Nota 0–10 sin llamar a ningún modelo.
+    `lang` elige las palabras de CTA (es / en / pt; en otros idiomas no se evalúa la CTA).
+    Devuelve {"score": float, "issues": [str, ...]}.
+    """
+    text = (script or "").strip()
+    if not text or text.startswith(("ERROR_RATE_LIMIT:", "ERROR_LLM:")):
+        return {"score": 0.0, "issues": ["Guion vacío o error del LLM."]}
+
+    issues: List[str] = []
+    score = 10.0
+
+    words = _WORD_RE.findall(text)
+    n_words = len(words)
+    lo, hi = TARGET_WORDS
+    if n_words < lo:
+        score -= min(6.0, (lo - n_words) / lo * 7)
+        issues.append(f"Demasiado corto ({n_words} palabras, objetivo {lo}–{hi}).")
+    elif n_words > hi:
+        score -= min(3.0, (n_words - hi) / hi * 4)
+        issues.append(f"Demasiado largo ({n_words} palabras, objetivo {lo}–{hi}).")
+
+    # Hook: la primera frase tiene que ser corta y con gancho
+    sentences = [s.strip() for s in _SENTENCE_RE.findall(text) if s.strip()]
+    first = sentences[0] if sentences else ""
+    first_words = len(_WORD_RE.findall(first))
+    if first_words > 20:
+        score -= 1.5
+        issues.append("Hook inicial largo (más de 20 palabras).")
+    if first and not re.search(r"[?¿!¡]|\d", first):
+        score -= 0.5
+        issues.append("Hook sin pregunta, cifra ni exclamación.")
+
+    # Ritmo: frases respirables, aptas para teleprompter
+    if sentences:
+        avg = n_words / len(sentences)
+        if avg > 22:
+            score -= 1.5
+            issues.append(f"Frases largas (media {avg:.0f} palabras).")
+
+    # Repeticiones: líneas duplicadas suelen ser un fallo del modelo
+    lines = [l.strip().lower() for l in text.splitlines() if l.strip()]
+    if len(lines) != len(set(lines)):
+        score -= 1.0
+        issues.append("Líneas repetidas.")
+
+    # Cierre con CTA suave
+    tail = text[-300:].lower()
+    cta_words = _CTA_WORDS.get((lang or "es").lower()[:2])
+    if cta_words and not any(w in tail for w in cta_words):
+        score -= 1.0
+        issues.append("Sin CTA clara al final.")
+
+    return {"score": round(max(0.0, min(10.0, score)), 1), "issues": issues}
+
+
+def parse_rater_score(rating_raw: str) -> Optional[float]:
+    """Extrae la nota 0–10 del texto libre de AUREN_QUALITY_RATER (o None)."""
+    if not rating_raw or rating_raw.lstrip().startswith(("ERROR_RATE_LIMIT:", "ERROR_LLM:")):
+        return None
+    text = _SCALE_RE.sub(" ", rating_raw)
+    m = _SCORE_RE.search(text) or _LABELED_SCORE_RE.search(text)
+    if not m:
+        return None
+    try:
+        value = float(m.group(1).replace(",", "."))
+    except ValueError:
+        return None
+    return value if 0.0 <= value <= 10.0 else None
+
+
+# ==========================================
+# 🚦 GATE
+# ==========================================
+
+def evaluate_script(
+    script: str,
+    platform: str = "YouTube Shorts",
+    min_score: float | None = None,
+    use_rater: bool | None = None,
+    rater: Callable[[Dict[str, Any]], Dict[str, Any]] | None = None,
+    lang: str = "es",
+) -> Dict[str, Any]:
+    """
+    Veredicto del gate:
+    {
+        "passed": bool,
+        "score": float,            # nota final usada para decidir
+        "heuristic": float,
+        "rater": float | None,     # solo si se consultó al LLM
+        "issues": [str, ...],
+        "feedback": str,           # texto para pasar a SCRIPT_DOCTOR al regenerar
+    }
+    """
+    min_score = MIN_SCORE if min_score is None else min_score
+    use_rater = USE_RATER if use_rater is None else use_rater
+
+    h = heuristic_score(script, lang=lang)
+    verdict: Dict[str, Any] = {
+        "passed": h["score"] >= min_score,
+        "score": h["score"],
+        "heuristic": h["score"],
+        "rater": None,
+        "issues": list(h["issues"]),
+        "feedback": "",
+    }
+
+    doubtful = (min_score - RATER_MARGIN) <= h["score"] < (min_score + RATER_MARGIN)
+    if use_rater and doubtful and h["score"] > 0:
+        if rater is None:
+            from agents.registry import call_agent
+
+            def rater(payload: Dict[str, Any]) -> Dict[str, Any]:
+                return call_agent("quality_rater", payload)
+
+        try:
+            rating = rater({"clip_text": script, "purpose": platform})
+        except Exception as e:
+            print(f"⚠️ Quality gate: AUREN_QUALITY_RATER falló ({e}). Usamos solo heurística.")
+            rating = {}
+        rating_raw = rating.get("rating_raw", "")
+
+        # Modo estructurado: la nota ya viene parseada; si no, se saca del texto
+        parsed = rating.get("parsed") or {}
+        if isinstance(parsed.get("score"), (int, float)):
+            rater_score = float(parsed["score"])
+            rating_raw = parsed.get("feedback") or rating_raw
+        else:
+            rater_score = parse_rater_score(rating_raw)
+        if rater_score is not None:
+            verdict["rater"] = rater_score
+            # El LLM pesa más que la heurística cuando está disponible
+            verdict["score"] = round(0.7 * rater_score + 0.3 * h["score"], 1)
+            verdict["passed"] = verdict["score"] >= min_score
+            verdict["feedback"] = rating_raw.strip()
+
+    if not verdict["feedback"]:
+        verdict["feedback"] = "\n".join(f"- {i}" for i in verdict["issues"])
+
+    return verdict
+
+
+def gate_script(
+    script: str,
+    regenerate: Callable[[str, Dict[str, Any]], str],
+    platform: str = "YouTube Shorts",
+    budget: int | None = None,
+    min_score: float | None = None,
+    use_rater: bool | None = None,
+    lang: str = "es",
+) -> Dict[str, Any]:
+    """
+    Evalúa `script` y, si no pasa, llama a `regenerate(script, verdict)` hasta
+    `budget` veces. Devuelve el mejor intento:
+    {"script": str, "verdict": {...}, "attempts": int, "history": [score, ...]}
+    """
+    budget = REGEN_BUDGET if budget is None else max(0, budget)
+
+    verdict = evaluate_script(
+        script, platform=platform, min_score=min_score, use_rater=use_rater, lang=lang
+    )
+    best = {"script": script, "verdict": verdict}
+    history = [verdict["score"]]
+    attempts = 0
+
+    while not verdict["passed"] and attempts < budget:
+        attempts += 1
+        script = regenerate(best["script"], best["verdict"])
+        verdict = evaluate_script(
+            script, platform=platform, min_score=min_score, use_rater=use_rater, lang=lang
+        )
+        history.append(verdict["score"])
+        if verdict["score"] >= best["verdict"]["score"]:
+            best = {"script": script, "verdict": verdict}
+
+    return {**best, "attempts": attempts, "history": history}
@@ -0,0 +1,160 @@
+# run_profiles.py
+"""
+Perfiles de ejecución para run_gold_pipeline.
+
+Cada canal declara QUÉ artefactos publica (títulos, descripción, hashtags,
+render...). A partir de ahí se calcula el conjunto mínimo de etapas del
+pipeline (cierre de dependencias), y todo lo demás no se ejecuta:
+menos tokens y menos latencia por vídeo.
+
+    stages = resolve_stages(RUN_PROFILES["shorts_only"])
+    if "platform_versions" in stages: ...
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# ==========================================
+# 🧩 GRAFO DE ETAPAS (artefacto → dependencias)
+# ==========================================
+# El nombre de cada etapa es el artefacto que produce.
+STAGE_DEPS: Dict[str, List[str]] = {
+    "extra_mind": [],            # novelty + oportunidades + gaps
+    "brain_comment": [],         # comentario del Space AUREN MEDIA BRAIN
+    "angles": [],
+    "hooks": [],
+    "script_v1": ["angles"],
+    "script_v2": ["script_v1"],
+    "retention": ["script_v2"],
+    "clips": ["script_v2"],
+    "titles": ["script_v2"],
+    "platform_versions": ["script_v2"],
+    "description": ["script_v2"],
+    "hashtags": [],
+    "hotmart": [],
+    "saas": [],
+    "vault_offer": [],
+    "media_plan": ["script_v2"],
+    "broll": ["media_plan"],
+    "ctr": ["titles", "media_plan"],
+    "upload_plan": [],
+    "quality": ["script_v2"],
+    "render": ["script_v2"],     # usa el B-roll si existe, pero no lo exige
+    "dashboard": [],
+}
+
+ALL_STAGES: List[str] = list(STAGE_DEPS)
+
+# ==========================================
+# 📋 PERFILES (artefactos que se publican)
+# ==========================================
+RUN_PROFILES: Dict[str, List[str]] = {
+    # Todo, como siempre
+    "full": ALL_STAGES,
+    # Canal que solo publica Shorts: no hace falta adaptar a TikTok / Reels
+    "shorts_only": [s for s in ALL_STAGES if s != "platform_versions"],
+    # Lo justo para publicar un vídeo con enlace de afiliado
+    "lean": [
+        "titles",
+        "description",
+        "hashtags",
+        "vault_offer",
+        "broll",
+        "render",
+    ],
+}
+
+DEFAULT_PROFILE = os.getenv("AUREN_RUN_PROFILE", "full").strip() or "full"
+
+# Perfiles por canal (id o nombre) vía JSON opcional:
+#   AUREN_CHANNEL_PROFILES='{"Auren Imperio & Cashflow": "lean"}'
+def _load_env_profiles() -> Dict[str, str]:
+    raw = os.getenv("AUREN_CHANNEL_PROFILES", "") or "{}"
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError as e:
+        print(f"⚠️ AUREN_CHANNEL_PROFILES no es JSON válido ({e}). Se ignora.")
+        return {}
+    if not isinstance(data, dict):
+        print("⚠️ AUREN_CHANNEL_PROFILES debe ser un objeto {canal: perfil}. Se ignora.")
+        return {}
+    return data
+
+
+_ENV_CHANNEL_PROFILES: Dict[str, str] = _load_env_profiles()
+
+
+def resolve_stages(artifacts: Iterable[str]) -> Set[str]:
+    """
+    Devuelve el conjunto mínimo de etapas necesario para producir `artifacts`
+    (los propios artefactos + todas sus dependencias transitivas).
+    """
+    needed: Set[str] = set()
+    pending = list(artifacts)
+    while pending:
+        stage = pending.pop()
+        if stage in needed:
+            continue
+        if stage not in STAGE_DEPS:
+            raise KeyError(f"Etapa desconocida en el perfil: {stage!r}")
+        needed.add(stage)
+        pending.extend(STAGE_DEPS[stage])
+    return needed
+
+
+def profile_for_channel(
+    channel_name: Optional[str],
+    channels: Optional[List[Dict[str, Any]]] = None,
+) -> str:
+    """
+    Perfil de un canal:
+      1) AUREN_CHANNEL_PROFILES (env)
+      2) campo "run_profile" del canal en channel_router.CHANNELS
+      3) AUREN_RUN_PROFILE / "full"
+    """
+    if channel_name:
+        if channel_name in _ENV_CHANNEL_PROFILES:
+            return _ENV_CHANNEL_PROFILES[channel_name]
+
+        if channels is None:
+            from agents.channel_router import CHANNELS
+            channels = CHANNELS
+
+        for ch in channels:
+            if channel_name in (ch.get("name"), ch.get("id")):
+                if ch.get("id") in _ENV_CHANNEL_PROFILES:
+                    return _ENV_CHANNEL_PROFILES[ch["id"]]
+                if ch.get("run_profile"):
+                    return ch["run_profile"]
+
+    return DEFAULT_PROFILE
+
+
+def stages_for_run(
+    profile: str,
+    run_quality: bool = True,
+    want_broll: bool = True,
+    offer_pinned: bool = False,
+) -> Set[str]:
+    """
+    Etapas a ejecutar en un run concreto:
+      - parte del perfil,
+      - respeta los flags clásicos de run_gold_pipeline (run_quality, want_broll),
+      - si el Vault ya fija la oferta (affiliate_slot / override de canal),
+        Hotmart y SaaS sobran.
+    """
+    if profile not in RUN_PROFILES:
+        print(f"⚠️ Perfil de ejecución desconocido '{profile}'. Usamos 'full'.")
+        profile = "full"
+
+    wanted = set(RUN_PROFILES[profile])
+    if not run_quality:
+        wanted.discard("quality")
+    if not want_broll:
+        wanted.discard("broll")
+    if offer_pinned:
+        wanted.discard("hotmart")
+        wanted.discard("saas")
+
+    return resolve_stages(wanted)
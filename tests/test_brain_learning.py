@@ -0,0 +1,81 @@
+import multiprocessing
+import time
+
+import pytest
+
+import auren_media_brain as brain
+import brain_decision_log
+import brain_learning
+
+
+CHANNEL_FEATURES = {"ctr": 6.0, "retention": 55.0, "growth": 12.0, "rpm": 4.0, "revenue": 30.0, "engagement": 7.0}
+
+
+def _log_decisions(log_dir, n):
+    log = brain_decision_log.DecisionLog(log_dir)
+    for i in range(n):
+        log.append(
+            {
+                "channel": "Auren",
+                "topic": f"tema {i}",
+                "brain_meta": {
+                    "topic_features": {"base_money_score": 40.0 + i, "novelty": 50.0, "competition": 30.0},
+                    "channel_features": CHANNEL_FEATURES,
+                },
+            }
+        )
+    log.close()
+
+
+def _feedback(n, offset=0):
+    now = time.time() + 1
+    return [
+        {"channel": "Auren", "topic": f"tema {i}", "ctr": 50, "retention": 50, "revenue": 50, "ts": now}
+        for i in range(offset, offset + n)
+    ]
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    d = tmp_path / "decisions"
+    _log_decisions(d, 40)
+    return d
+
+
+def test_mean_performance_does_not_inflate_the_weight_scale(tmp_path, log_dir):
+    path = tmp_path / "brain_weights.json"
+    for _ in range(5):
+        artifact = brain_learning.learn_from_feedback(_feedback(40), path=path, log_dir=log_dir, apply=False)
+
+    channel = artifact["channel"]["weights"]
+    topic = artifact["topic"]["weights"]
+    assert sum(abs(v) for v in channel.values()) == pytest.approx(
+        sum(abs(v) for v in brain.DEFAULT_CHANNEL_WEIGHTS.values()), rel=1e-3
+    )
+    assert sum(abs(v) for v in topic.values()) == pytest.approx(
+        sum(abs(v) for v in brain.DEFAULT_TOPIC_WEIGHTS.values()), rel=1e-3
+    )
+    # el nivel medio (y ≈ 50) lo absorbe el bias
+    assert artifact["channel"]["bias"] > 10
+    assert brain.classify_channel(brain.simple_channel_score(brain.ChannelInfo(
+        name="x", niche="", platform="youtube", **CHANNEL_FEATURES), channel)) == brain.classify_channel(
+        brain.simple_channel_score(brain.ChannelInfo(name="x", niche="", platform="youtube", **CHANNEL_FEATURES),
+                                   brain.DEFAULT_CHANNEL_WEIGHTS))
+
+
+def _learn_in_process(path, log_dir, offset):
+    brain_learning.learn_from_feedback(_feedback(10, offset), path=path, log_dir=log_dir, apply=False)
+
+
+def test_concurrent_processes_do_not_lose_updates(tmp_path, log_dir):
+    path = tmp_path / "brain_weights.json"
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_learn_in_process, args=(path, log_dir, 10 * i)) for i in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    artifact = brain_learning._load_artifact(path)
+    assert artifact["version"] == 4
+    assert artifact["topic"]["n"] == 40
@@ -0,0 +1,90 @@
+import pytest
+
+import auren_brain_adapter
+import auren_resilience
+import auto_gold
+from agents.topic_scout import TopicSeed
+
+PLAN = {
+    "markdown": "PLAN DEL BRAIN",
+    "videos": [
+        {
+            "topic": "cómo ahorrar 500€ al mes",
+            "channel_name": "Auren Dinero",
+            "country": "ES",
+            "language": "es",
+            "video_id": "v1",
+        }
+    ],
+}
+
+
+@pytest.fixture
+def brain_calls(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_call(*args):
+        calls.append(args)
+        return PLAN
+
+    def no_space(space_id):
+        raise RuntimeError("sin Spaces en los tests")
+
+    monkeypatch.setattr(auren_resilience, "CB_STATE_PATH", tmp_path / "circuits.json")
+    monkeypatch.setattr(auren_resilience, "_cb_cache", {"states": {}, "loaded_at": None})
+    monkeypatch.setattr(auren_brain_adapter, "BRAIN_SPACE_ID", "test/brain")
+    monkeypatch.setattr(auren_brain_adapter, "_call_brain_plan", fake_call)
+    monkeypatch.setattr(auren_brain_adapter, "_plan_cache", {})
+    monkeypatch.setattr(auto_gold, "get_client", no_space)
+    monkeypatch.setattr(auto_gold, "stages_for_run", lambda *a, **k: {"brain_comment"})
+    return calls
+
+
+def _seed_job():
+    seed = TopicSeed(keyword="ahorro", niche="finanzas", country="ES", language="es", source="manual")
+    return {
+        "channel": {"id": "auren_dinero", "name": "Auren Dinero", "country": "ES", "language": "es"},
+        "seed": seed,
+        "topic_slug": "ahorro",
+    }
+
+
+def test_seed_run_calls_the_brain_space_once(brain_calls):
+    params = auto_gold.pipeline_params_from_seed_job(_seed_job())
+    assert params["niche"] == "cómo ahorrar 500€ al mes"
+    assert len(brain_calls) == 1
+
+    markdown = auto_gold.run_gold_pipeline(**params)
+
+    assert "PLAN DEL BRAIN" in markdown
+    assert len(brain_calls) == 1
+    assert brain_calls[0][1] == "ahorro"  # la semilla original, no el topic del plan
+
+
+def test_brain_down_is_not_asked_again_by_the_comment_stage(brain_calls, monkeypatch):
+    def down(*args):
+        brain_calls.append(args)
+        raise RuntimeError("Space caído")
+
+    monkeypatch.setattr(auren_brain_adapter, "_call_brain_plan", down)
+
+    params = auto_gold.pipeline_params_from_seed_job(_seed_job())
+    assert params["niche"] == "ahorro"
+    auto_gold.run_gold_pipeline(**params)
+
+    assert len(brain_calls) == 1
+
+
+def test_brain_plan_mode_only_drains_the_plan_jobs(monkeypatch):
+    worker_kwargs = {}
+    video = dict(PLAN["videos"][0], emotion="aspiracional", target_platform="youtube")
+    monkeypatch.setenv("AUREN_BRAIN_PLAN_PATH", "brain_plans/sample_plan.json")
+    monkeypatch.setattr(auto_gold, "plan_file_key", lambda path: "plan_semana")
+    monkeypatch.setattr(auto_gold, "pending_plan_file_videos", lambda path, key: iter([video]))
+    monkeypatch.setattr(auto_gold, "enqueue_brain_plan_jobs", lambda path: 1)
+    monkeypatch.setattr(auto_gold, "run_worker", lambda **kwargs: worker_kwargs.update(kwargs))
+
+    auto_gold.main()
+
+    assert worker_kwargs["exit_when_empty"] is True
+    assert worker_kwargs["dedupe_prefix"] == auto_gold.brain_plan_job_prefix("plan_semana") == "brain:plan_semana:"
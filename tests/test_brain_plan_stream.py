@@ -0,0 +1,151 @@
+import glob
+import json
+from pathlib import Path
+
+import pytest
+
+import auren_media_brain as brain
+import brain_plan_stream as bps
+
+PLANS = sorted(glob.glob(str(Path(__file__).resolve().parent.parent / "brain_plans" / "*.json")))
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(bps, "CURSORS_PATH", tmp_path / "cursors.json")
+    monkeypatch.setattr(brain, "record_brain_decision", lambda *a, **k: None)
+
+
+def _expected(plan):
+    """Lo que debe producir el parser incremental, calculado con json.load."""
+    header = {k: v for k, v in plan.items() if k not in ("videos", "channels")}
+    out = [(v, header) for v in plan.get("videos") or []]
+    for ch in plan.get("channels") or []:
+        ctx = {"_channel": True, **{k: v for k, v in ch.items() if k != "videos"}}
+        out += [(v, ctx) for v in ch.get("videos") or []]
+    return out, header
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64 * 1024])
+@pytest.mark.parametrize("path", PLANS)
+def test_json_plans_parse_the_same_with_any_chunk_size(path, chunk_size, monkeypatch):
+    monkeypatch.setattr(bps, "CHUNK_SIZE", chunk_size)
+    with open(path, encoding="utf-8") as f:
+        expected, header = _expected(json.load(f))
+
+    got_header = {}
+    got = list(bps.iter_plan_file(path, got_header))
+
+    assert got == expected
+    assert got_header == header
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 13])
+def test_chunk_boundaries_inside_numbers_strings_and_escapes(tmp_path, chunk_size, monkeypatch):
+    monkeypatch.setattr(bps, "CHUNK_SIZE", chunk_size)
+    plan = {
+        "plan_name": "frontera \"comillas\" y \\ barras",
+        "meta": {"n": [1, 2.5e3, -0.125, True, None]},
+        "videos": [
+            {"video_id": "v1", "topic": "ahorro 💶 ñandú", "topic_score": 12345.678},
+            {"video_id": "v2", "topic": "línea\nnueva", "topic_score": 7},
+            [],
+            {"video_id": "v3", "topic": "", "extra": {"a": [{}, []]}},
+        ],
+        "trailer": 10,
+    }
+    path = tmp_path / "plan.json"
+    path.write_text(json.dumps(plan, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    header = {}
+    videos = [v for v, _ in bps.iter_plan_file(str(path), header)]
+
+    assert videos == [plan["videos"][0], plan["videos"][1], plan["videos"][3]]
+    assert header == {"plan_name": plan["plan_name"], "meta": plan["meta"], "trailer": 10}
+
+
+def test_malformed_plan_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(bps, "CHUNK_SIZE", 4)
+    path = tmp_path / "roto.json"
+    path.write_text('{"videos": [{"video_id": "v1"} {"video_id": "v2"}]}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(bps.iter_plan_file(str(path)))
+
+
+def _weekly_plan(out_path):
+    channels = [
+        brain.ChannelInfo(
+            name=name, niche="dinero", platform="youtube",
+            ctr=ctr, retention=50.0, growth=10.0, revenue=100.0, rpm=3.0, engagement=5.0,
+        )
+        for name, ctr in (("Auren Dinero", 8.0), ("Auren Cashflow", 6.0))
+    ]
+    topics = [
+        brain.TopicCandidate(
+            topic=f"tema {i}", base_money_score=40 + i, novelty=50, competition=30,
+            emotion=("aspiracional", "alerta")[i % 2],
+        )
+        for i in range(20)
+    ]
+    return brain.build_weekly_plan(channels, topics, days=["Lunes", "Martes", "Miércoles"], out_path=out_path)
+
+
+def test_weekly_plan_round_trips_through_jsonl(tmp_path):
+    path = tmp_path / "semana.jsonl"
+    plan = _weekly_plan(str(path))
+    expected, header = _expected(plan)
+
+    got_header = {}
+    assert list(bps.iter_plan_file(str(path), got_header)) == expected
+    assert got_header == header
+    assert bps.read_header(str(path))["plan_name"] == plan["plan_name"]
+
+    classic = tmp_path / "semana.json"
+    brain.save_plan(plan, str(classic))
+    assert list(bps.iter_plan_file(str(classic))) == expected
+
+
+def test_jsonl_resumes_from_the_ledger_cursor(tmp_path, monkeypatch):
+    path = str(tmp_path / "semana.jsonl")
+    plan = _weekly_plan(path)
+    all_ids = [v["video_id"] for ch in plan["channels"] for v in ch["videos"]]
+    video_id = lambda v, ctx: v["video_id"]  # noqa: E731
+
+    # primera pasada: los 2 primeros ya están en el ledger
+    done = set(all_ids[:2])
+    pending = list(bps.iter_pending_plan_file(path, "k", done, video_id))
+    assert [v["video_id"] for v, _ in pending] == all_ids[2:]
+
+    cursor = bps.load_cursor("k", path)
+    with open(path, "rb") as f:
+        f.seek(cursor["offset"])
+        assert json.loads(f.readline())["video_id"] == all_ids[2]
+
+    # segunda pasada: arranca en el cursor (no relee lo anterior) y conserva el contexto de canal
+    offsets = []
+    real = bps._iter_jsonl_plan
+
+    def spy(f, header, offset=0, ctx=None):
+        offsets.append(offset)
+        return real(f, header, offset=offset, ctx=ctx)
+
+    monkeypatch.setattr(bps, "_iter_jsonl_plan", spy)
+    done = set(all_ids[:4])
+    pending = list(bps.iter_pending_plan_file(path, "k", done, video_id))
+
+    assert offsets == [cursor["offset"]]
+    assert [v["video_id"] for v, _ in pending] == all_ids[4:]
+    assert all(ctx.get("_channel") and ctx.get("name") for _, ctx in pending)
+    assert bps.load_cursor("k", path)["offset"] > cursor["offset"]
+
+
+def test_rewritten_plan_invalidates_the_cursor(tmp_path):
+    path = str(tmp_path / "semana.jsonl")
+    plan = _weekly_plan(path)
+    first = plan["channels"][0]["videos"][0]["video_id"]
+    list(bps.iter_pending_plan_file(path, "k", {first}, lambda v, ctx: v["video_id"]))
+    assert bps.load_cursor("k", path) is not None
+
+    plan["plan_name"] = "otra semana"
+    bps.write_plan_jsonl(plan, path)
+    assert bps.load_cursor("k", path) is None
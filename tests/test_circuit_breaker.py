@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+import auren_resilience as res
+
+
+@pytest.fixture(autouse=True)
+def state_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(res, "CB_STATE_PATH", tmp_path / "circuits.json")
+    monkeypatch.setattr(res, "_cb_cache", {"states": {}, "loaded_at": None})
+    return res.CB_STATE_PATH
+
+
+def test_closed_path_does_not_touch_the_state_file(state_path, monkeypatch):
+    cb = res.CircuitBreaker("svc", failure_threshold=3, open_seconds=60)
+    assert cb.allow()
+
+    def no_locked_io():
+        raise AssertionError("el camino normal no debe bloquear ni escribir el fichero")
+
+    monkeypatch.setattr(res, "_circuit_states", no_locked_io)
+    for _ in range(50):
+        assert cb.allow()
+        cb.record_success()
+    cb.record_failure()
+    cb.record_failure()
+    assert not state_path.exists()
+
+
+def test_transitions_are_persisted_and_shared(state_path, monkeypatch):
+    cb = res.CircuitBreaker("svc", failure_threshold=2, open_seconds=0.2)
+    cb.record_failure()
+    cb.record_failure()
+    assert cb.state() == "open"
+    assert not cb.allow()
+
+    # otro proceso (otro breaker, sin caché) ve el circuito abierto tras refrescar
+    monkeypatch.setattr(res, "_cb_cache", {"states": {}, "loaded_at": None})
+    other = res.CircuitBreaker("svc", failure_threshold=2, open_seconds=0.2)
+    assert other.state() == "open"
+
+    time.sleep(0.25)
+    assert other.allow()          # una sola petición de prueba
+    assert not cb.allow()         # la caché se refrescó en la transición
+    other.record_success()
+    assert res.circuit_states()["svc"]["state"] == "closed"
@@ -0,0 +1,25 @@
+import time
+
+import brain_decision_log
+
+
+def test_idle_writer_flushes_in_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(brain_decision_log, "FLUSH_EVERY", 100)
+    monkeypatch.setattr(brain_decision_log, "FLUSH_S", 0.1)
+    monkeypatch.setattr(brain_decision_log, "FSYNC_S", 0.0)
+
+    log = brain_decision_log.DecisionLog(tmp_path)
+    try:
+        log.append({"channel": "Auren", "topic": "invertir"})
+        log.append({"channel": "Auren", "topic": "ahorrar"})
+        assert not log.path.exists()  # sigue en el buffer
+
+        time.sleep(0.35)  # sin más appends: vuelca el hilo de fondo
+        assert log.path.read_text(encoding="utf-8").count("\n") == 2
+        assert not log._unsynced
+
+        records = list(brain_decision_log.iter_decisions(directory=tmp_path, channel="Auren"))
+        assert [r["decision"]["topic"] for r in records] == ["invertir", "ahorrar"]
+    finally:
+        log.close()
+    assert log._flusher is None
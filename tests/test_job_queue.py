@@ -0,0 +1,150 @@
+import threading
+import time
+
+import pytest
+
+import job_queue
+
+
+@pytest.fixture(autouse=True)
+def queue_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "PATH", tmp_path / "jobs.sqlite")
+    return job_queue.PATH
+
+
+def test_expired_lease_is_reclaimed_by_another_worker():
+    job_id = job_queue.enqueue({"n": 1}, dedupe_key="k1")
+
+    job = job_queue.claim_next("w1", lease_seconds=0.2)
+    assert job["id"] == job_id
+    assert job_queue.claim_next("w2", lease_seconds=0.2) is None
+
+    time.sleep(0.3)
+    reclaimed = job_queue.claim_next("w2", lease_seconds=5)
+    assert reclaimed["id"] == job_id
+    assert reclaimed["attempts"] == 2
+
+    # el dueño anterior ya no puede cerrar el job
+    assert job_queue.complete(job_id, "w1") is False
+    assert job_queue.heartbeat([job_id], "w1") == [job_id]
+    assert job_queue.complete(job_id, "w2", {"ok": True}) is True
+    assert job_queue.counts() == {"done": 1}
+
+
+def test_heartbeat_keeps_the_lease():
+    job_queue.enqueue({"n": 1})
+    job = job_queue.claim_next("w1", lease_seconds=0.3)
+    for _ in range(3):
+        time.sleep(0.15)
+        assert job_queue.heartbeat([job["id"]], "w1", lease_seconds=0.3) == []
+    assert job_queue.claim_next("w2") is None
+
+
+def test_expired_lease_without_attempts_left_fails(monkeypatch):
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 1)
+    job_queue.enqueue({"n": 1})
+    job_queue.claim_next("w1", lease_seconds=0.1)
+    time.sleep(0.2)
+    assert job_queue.claim_next("w2") is None
+    assert job_queue.counts() == {"failed": 1}
+
+
+def test_failed_job_can_be_enqueued_again(monkeypatch):
+    monkeypatch.setattr(job_queue, "MAX_ATTEMPTS", 1)
+    job_id = job_queue.enqueue({"try": 1}, dedupe_key="brain:plan:v1")
+    job_queue.claim_next("w1")
+    assert job_queue.fail(job_id, "w1", "boom") is True
+    assert job_queue.counts() == {"failed": 1}
+
+    # sin retry_failed se respeta el dedupe; con él vuelve a 'pending'
+    assert job_queue.enqueue({"try": 2}, dedupe_key="brain:plan:v1") is None
+    assert job_queue.enqueue({"try": 2}, dedupe_key="brain:plan:v1", retry_failed=True) == job_id
+    job = job_queue.claim_next("w2")
+    assert job["id"] == job_id
+    assert job["attempts"] == 1
+    assert job["payload"] == {"try": 2}
+
+    # un job vivo o hecho no se toca
+    assert job_queue.enqueue({"try": 3}, dedupe_key="brain:plan:v1", retry_failed=True) is None
+    assert job_queue.complete(job_id, "w2") is True
+    assert job_queue.enqueue({"try": 3}, dedupe_key="brain:plan:v1", retry_failed=True) is None
+    assert job_queue.counts() == {"done": 1}
+
+
+def test_prefix_worker_only_drains_its_own_jobs():
+    job_queue.enqueue({"n": "seed"}, dedupe_key="router:auren_dinero:ahorro")
+    job_queue.enqueue({"n": "otro"}, dedupe_key="brain:Plan_B:v1")
+    job_queue.enqueue({"n": "case"}, dedupe_key="brain:plan_a:v1")  # LIKE los confundiría
+    for i in range(3):
+        job_queue.enqueue({"n": i}, dedupe_key=f"brain:Plan_A:v{i}")
+
+    seen = []
+    processed = job_queue.run_lease_worker(
+        lambda job: seen.append(job["payload"]["n"]),
+        workers=2,
+        poll_interval=0.1,
+        exit_when_empty=True,
+        dedupe_prefix="brain:Plan_A:",
+    )
+
+    assert processed == 3
+    assert sorted(seen) == [0, 1, 2]
+    assert job_queue.counts() == {"done": 3, "pending": 3}
+    assert job_queue.claim_next("w", dedupe_prefix="brain:Plan_A:") is None
+    assert job_queue.claim_next("w")["payload"] == {"n": "seed"}
+
+
+def test_worker_does_not_report_lost_leases_for_finished_jobs(capsys, monkeypatch):
+    for i in range(3):
+        job_queue.enqueue({"n": i}, dedupe_key=f"k{i}")
+
+    real_complete = job_queue.complete
+
+    def slow_complete(*args, **kwargs):
+        # el job ya está 'done' pero el future sigue vivo un rato: el heartbeat pasa por aquí
+        ok = real_complete(*args, **kwargs)
+        time.sleep(0.7)
+        return ok
+
+    monkeypatch.setattr(job_queue, "complete", slow_complete)
+
+    processed = job_queue.run_lease_worker(
+        lambda job: {"n": job["payload"]["n"]},
+        workers=3,
+        poll_interval=0.5,
+        exit_when_empty=True,
+        lease_seconds=1.5,
+    )
+    assert processed == 3
+    assert job_queue.counts() == {"done": 3}
+    assert "Lease perdido" not in capsys.readouterr().out
+
+
+def test_dead_node_job_is_recovered_across_processes():
+    summary = job_queue.simulate_nodes(nodes=3, jobs=6, lease_seconds=1.0)
+    assert summary["queue"] == {"done": 6}
+    assert summary["topics_completed"] == 6
+
+
+def test_concurrent_claims_never_share_a_job():
+    for i in range(20):
+        job_queue.enqueue({"n": i}, dedupe_key=f"k{i}")
+
+    claimed = []
+    lock = threading.Lock()
+
+    def claimer(worker):
+        while True:
+            job = job_queue.claim_next(worker, lease_seconds=60)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job["id"])
+
+    threads = [threading.Thread(target=claimer, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(set(claimed))
+    assert len(claimed) == 20
@@ -0,0 +1,61 @@
+from vault.keyword_matcher import KeywordMatcher, normalize, tokenize
+
+
+def _hits(matcher, text):
+    """{frase: nº de apariciones} para que los asserts se lean solos."""
+    return {matcher.phrases[pid]: n for pid, n in matcher.find(text).items()}
+
+
+def test_normalize_drops_case_accents_and_punctuation():
+    assert normalize("¿Cómo INVERTIR?") == "como invertir"
+    assert normalize("  Inversión,   ahorro… ") == "inversion ahorro"
+    assert tokenize("") == []
+    assert tokenize("ETF: índice") == ["etf", "indice"]
+
+
+def test_accents_and_case_are_ignored_on_both_sides():
+    matcher = KeywordMatcher([("inversión", "a"), ("Ahorro", "b")])
+    assert _hits(matcher, "Guía de INVERSION y ahórro") == {"inversion": 1, "ahorro": 1}
+    assert matcher.payloads[matcher.find("inversion").popitem()[0]] == ["a"]
+
+
+def test_only_whole_words_match():
+    matcher = KeywordMatcher([("ia", "ia"), ("etf", "etf")])
+    assert _hits(matcher, "finanzas en familia") == {}
+    assert _hits(matcher, "los ETFs de la media") == {}
+    assert _hits(matcher, "la IA, los etf y la ia.") == {"ia": 2, "etf": 1}
+
+
+def test_multi_word_phrases_need_every_word_in_order():
+    matcher = KeywordMatcher([("control de gastos", "cg"), ("fondo indexado", "fi")])
+    assert _hits(matcher, "App de CONTROL   de gastos!") == {"control de gastos": 1}
+    assert _hits(matcher, "gastos de control") == {}
+    assert _hits(matcher, "fondo de emergencia indexado") == {}
+    assert _hits(matcher, "fondo indexados") == {}
+
+
+def test_overlapping_patterns_are_found_in_one_pass():
+    matcher = KeywordMatcher(
+        [("invertir", 1), ("invertir en bolsa", 2), ("en bolsa", 3), ("bolsa", 4), ("bolsa de valores", 5)]
+    )
+    assert _hits(matcher, "invertir en bolsa de valores") == {
+        "invertir": 1,
+        "invertir en bolsa": 1,
+        "en bolsa": 1,
+        "bolsa": 1,
+        "bolsa de valores": 1,
+    }
+    # repeticiones pegadas comparten el espacio de separación
+    assert _hits(matcher, "bolsa bolsa bolsa") == {"bolsa": 3}
+
+
+def test_duplicate_phrases_share_an_id_and_keep_every_payload():
+    matcher = KeywordMatcher([("Inversión", "oferta_a"), ("inversion", "oferta_b"), ("¿?", "vacía")])
+    assert matcher.phrases == ["inversion"]
+    assert matcher.payloads == [["oferta_a", "oferta_b"]]
+
+
+def test_phrases_added_after_build_are_picked_up():
+    matcher = KeywordMatcher([("ahorro", "a")])
+    matcher.add("presupuesto mensual", "p")
+    assert _hits(matcher, "ahorro y presupuesto mensual") == {"ahorro": 1, "presupuesto mensual": 1}
@@ -0,0 +1,96 @@
+import sys
+import time
+import types
+
+import pytest
+
+import auren_resilience as res
+from agents import auren_llm
+
+
+class _Delta:
+    def __init__(self, content):
+        self.choices = [types.SimpleNamespace(delta=types.SimpleNamespace(content=content))]
+
+
+class _FakeGroq:
+    """Cliente con la forma de groq.Groq: chat.completions.create(stream=True)."""
+
+    def __init__(self, chunks=(), error=None):
+        self.chunks = chunks
+        self.error = error
+        self.calls = []
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.error:
+            raise self.error
+        return (_Delta(c) for c in self.chunks)
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    # groq no es dependencia de los tests: solo hace falta su RateLimitError
+    fake_groq = types.ModuleType("groq")
+    fake_groq.RateLimitError = type("RateLimitError", (Exception,), {})
+    monkeypatch.setitem(sys.modules, "groq", fake_groq)
+    monkeypatch.setattr(res, "CB_STATE_PATH", tmp_path / "circuits.json")
+    monkeypatch.setattr(res, "_cb_cache", {"states": {}, "loaded_at": None})
+    monkeypatch.setattr(res, "_breakers", {})
+    monkeypatch.setattr(auren_llm, "route_model", lambda model=None: ("large", "test-model"))
+
+
+def _use_client(monkeypatch, client):
+    monkeypatch.setattr(auren_llm, "_get_client", lambda: client)
+    return client
+
+
+def test_stream_yields_chunks_and_keeps_the_circuit_closed(monkeypatch):
+    client = _use_client(monkeypatch, _FakeGroq(chunks=["hola ", "mundo"]))
+    assert "".join(auren_llm.stream_chat_completion("sys", "user")) == "hola mundo"
+    assert client.calls[0]["stream"] is True
+    assert res.circuit("groq:test-model").state() == "closed"
+
+
+def test_stream_errors_open_the_groq_breaker(monkeypatch):
+    client = _use_client(monkeypatch, _FakeGroq(error=ConnectionError("Groq caído")))
+    for _ in range(res.CB_FAILURES):
+        out = list(auren_llm.stream_chat_completion("sys", "user"))
+        assert out[0].startswith("ERROR_LLM:")
+    assert res.circuit("groq:test-model").state() == "open"
+
+    # circuito abierto → no se abre el stream: se delega en chat_completion
+    monkeypatch.setattr(auren_llm, "chat_completion", lambda *a, **k: "ERROR_LLM: circuito abierto")
+    calls_before = len(client.calls)
+    assert list(auren_llm.stream_chat_completion("sys", "user")) == ["ERROR_LLM: circuito abierto"]
+    assert len(client.calls) == calls_before
+
+
+def test_stalled_stream_is_cut_by_the_run_deadline(monkeypatch):
+    class _Slow(_FakeGroq):
+        def _create(self, **kwargs):
+            self.calls.append(kwargs)
+
+            def chunks():
+                for c in ("uno ", "dos ", "tres"):
+                    yield _Delta(c)
+                    time.sleep(0.2)
+
+            return chunks()
+
+    client = _use_client(monkeypatch, _Slow())
+    with res.deadline(0.3):
+        out = list(auren_llm.stream_chat_completion("sys", "user"))
+
+    assert out == ["uno ", "dos "]
+    assert 0 < client.calls[0]["timeout"] <= 0.3
+
+
+def test_stream_without_api_key_yields_a_soft_error(monkeypatch):
+    def no_key():
+        raise RuntimeError("Falta GROQ_API_KEY")
+
+    monkeypatch.setattr(auren_llm, "_get_client", no_key)
+    out = list(auren_llm.stream_chat_completion("sys", "user"))
+    assert len(out) == 1 and out[0].startswith("ERROR_LLM:")
@@ -0,0 +1,87 @@
+import random
+
+import numpy as np
+import pytest
+
+import auren_media_brain as brain
+
+
+@pytest.fixture(autouse=True)
+def no_decision_log(monkeypatch):
+    monkeypatch.setattr(brain, "record_brain_decision", lambda *a, **k: None)
+
+
+def _channel(name, **metrics):
+    base = dict(ctr=5.0, retention=50.0, growth=10.0, revenue=100.0, rpm=3.0, engagement=5.0)
+    base.update(metrics)
+    return brain.ChannelInfo(name=name, niche="dinero", platform="youtube", **base)
+
+
+def _topic(name, money, novelty=50.0, competition=30.0):
+    return brain.TopicCandidate(
+        topic=name, base_money_score=money, novelty=novelty, competition=competition, emotion="aspiracional"
+    )
+
+
+def _pick(decision):
+    meta = decision["brain_meta"]
+    return decision["channel"], decision["topic"], meta["channel_score"], meta["topic_score"]
+
+
+def _both_modes(channels, topics):
+    classic = brain.run_media_brain_once(channels, topics)
+    columnar = brain.run_media_brain_once(brain.channels_to_array(channels), brain.topics_to_array(topics))
+    return _pick(classic), _pick(columnar)
+
+
+def test_classic_and_columnar_pick_the_same_channel_and_topic():
+    rng = random.Random(7)
+    channels = [_channel(f"canal {i}", ctr=rng.uniform(0, 20), growth=rng.uniform(0, 50)) for i in range(30)]
+    topics = [_topic(f"tema {i}", rng.uniform(0, 100), rng.uniform(0, 100), rng.uniform(0, 100)) for i in range(200)]
+
+    classic, columnar = _both_modes(channels, topics)
+    assert classic == columnar
+
+
+def test_ties_go_to_the_first_candidate_in_both_modes():
+    # mismas métricas → mismo score: gana el primero, como el sort estable del modo clásico
+    channels = [_channel("flojo", ctr=1.0), _channel("empate A"), _channel("empate B"), _channel("empate C")]
+    topics = [_topic("bajo", 10.0), _topic("empate 1", 80.0), _topic("empate 2", 80.0)]
+
+    classic, columnar = _both_modes(channels, topics)
+    assert classic == columnar
+    assert classic[:2] == ("empate A", "empate 1")
+
+
+def test_top_k_edges_and_ties():
+    scores = np.array([5.0, 9.0, 7.0, 9.0, 1.0])
+
+    assert brain.top_k(scores, 0).tolist() == []
+    assert brain.top_k(scores, -3).tolist() == []
+    assert brain.top_k(scores, 1).tolist() == [1]
+    assert brain.top_k(scores, 2).tolist() == [1, 3]
+    assert brain.top_k(scores, 3).tolist() == [1, 3, 2]
+    assert brain.top_k(scores, 5).tolist() == [1, 3, 2, 0, 4]
+    assert brain.top_k(scores, 50).tolist() == [1, 3, 2, 0, 4]
+    assert brain.top_k(np.array([]), 3).tolist() == []
+
+
+def test_score_topics_matches_simple_topic_score():
+    topics = [_topic(f"tema {i}", 10.0 * i, 7.5 * i, 3.0 * i) for i in range(12)]
+    vectorised = brain.score_topics(brain.topics_to_array(topics))
+
+    assert vectorised.tolist() == [brain.simple_topic_score(t) for t in topics]
+
+
+def test_vectorised_scores_match_the_classic_ones_on_many_candidates():
+    rng = random.Random(3)
+    topics = [
+        _topic(f"t{i}", round(rng.uniform(0, 100), 2), round(rng.uniform(0, 100), 2), round(rng.uniform(0, 100), 2))
+        for i in range(5000)
+    ]
+    channels = [_channel(f"c{i}", ctr=round(rng.uniform(0, 30), 2), rpm=round(rng.uniform(0, 20), 2)) for i in range(2000)]
+
+    assert brain.score_topics(brain.topics_to_array(topics)).tolist() == [brain.simple_topic_score(t) for t in topics]
+    assert brain.score_channels(brain.channels_to_array(channels)).tolist() == [
+        brain.simple_channel_score(c) for c in channels
+    ]
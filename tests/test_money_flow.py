@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+import auto_gold
+import money_model
+
+
+@pytest.fixture(autouse=True)
+def isolated_money_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(money_model, "CACHE_PATH", tmp_path / "money_flow_cache.json")
+    monkeypatch.setattr(money_model, "MODEL_PATH", tmp_path / "money_model.npz")
+    monkeypatch.setattr(money_model, "_cache", None)
+    monkeypatch.setattr(money_model, "_model", None)
+
+
+class _Hub:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def predict(self, topics_json, lang, api_name=None):
+        return self.rows(json.loads(topics_json))
+
+
+def _row(topic, score):
+    return {"topic": topic, "views_30d": 1000, "intent": 50.0, "ads_density": 40.0, "money_score": score}
+
+
+def test_hub_rows_are_matched_by_topic_not_position(monkeypatch):
+    # el HUB invierte el orden y omite "c"
+    hub = _Hub(lambda topics: [_row("B", 80.0), _row("a", 10.0)])
+    monkeypatch.setattr(auto_gold, "get_client", lambda space_id: hub)
+
+    rows = auto_gold.hub_topic_money_flow(["a", "b", "c"], lang="es")
+
+    assert [r["topic"] for r in rows] == ["a", "b", "c"]
+    assert rows[0]["money_score"] == 10.0
+    assert rows[1]["money_score"] == 80.0
+    assert rows[2]["source"] in ("local", "local_model")
+
+    hits, misses = money_model.cache_lookup(["a", "b", "c"], "es")
+    assert hits["a"]["money_score"] == 10.0 and hits["b"]["money_score"] == 80.0
+    assert misses == ["c"]
+
+
+def test_persisted_model_survives_an_expired_cache(monkeypatch):
+    monkeypatch.setattr(money_model, "MIN_SAMPLES", 3)
+    money_model.cache_store([_row(f"tema {i}", 10.0 * i) for i in range(5)], "es")
+    assert money_model.fit(force=True) is not None
+
+    # nuevo proceso: sin caché (caducada) pero con el modelo en disco
+    money_model.CACHE_PATH.unlink()
+    monkeypatch.setattr(money_model, "_cache", None)
+    monkeypatch.setattr(money_model, "_model", None)
+
+    assert money_model.predict_matrix(["tema 3"], "es") is not None
+    assert money_model.local_rows(["tema 3"], "es")[0]["source"] == "local_model"
+
+
+def test_featurize_is_normalised_hashed_bag_of_words():
+    X = money_model.featurize(["Invertir en ETFs", "invertir en etfs", ""], "es")
+
+    assert X.shape == (3, money_model.N_FEATURES + 1)
+    assert (X[:, -1] == 1.0).all()  # bias
+    assert (X[0] == X[1]).all()  # sin mayúsculas
+    norms = (X[:, :-1] ** 2).sum(axis=1) ** 0.5
+    assert abs(norms[0] - 1.0) < 1e-5
+    assert (money_model.featurize(["invertir en etfs"], "en")[0] != X[0]).any()  # el idioma cuenta
+
+
+def test_prerank_keeps_the_top_k_of_predict_matrix(monkeypatch):
+    monkeypatch.setattr(money_model, "MIN_SAMPLES", 5)
+    words = ["dinero", "inversión", "ahorro", "cocina", "historia", "viajes"]
+    value = {"dinero": 90.0, "inversión": 70.0, "ahorro": 50.0, "cocina": 20.0, "historia": 10.0, "viajes": 5.0}
+    money_model.cache_store(
+        [_row(f"{w} tema {i}", value[w] + i) for w in words for i in range(4)],
+        "es",
+    )
+    assert money_model.fit(force=True) is not None
+
+    topics = [f"{w} idea {i}" for i in range(3) for w in words]
+    P = money_model.predict_matrix(topics, "es")
+    expected = [topics[i] for i in sorted(range(len(topics)), key=lambda i: -P[i, 3])[:4]]
+
+    assert money_model.prerank(topics, "es", top_k=4) == expected
+    assert all(t.split()[0] in ("dinero", "inversión") for t in expected)
+    assert money_model.prerank(topics[:3], "es", top_k=4) == topics[:3]
+
+
+def test_prerank_without_model_uses_the_heuristic():
+    topics = ["historia del dinero", "cómo ganar dinero con afiliados", "mitos del ahorro"]
+    scores = {r["topic"]: r["money_score"] for r in money_model.heuristic_rows(topics)}
+
+    top = money_model.prerank(topics, "es", top_k=1)
+
+    assert top == [max(topics, key=scores.get)]
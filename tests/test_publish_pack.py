@@ -0,0 +1,40 @@
+import json
+
+from agents import publish_pack
+
+SCRIPT = "Guion de prueba sobre cómo ahorrar los primeros 1000 euros."
+
+
+def _run(monkeypatch, obj):
+    monkeypatch.setattr(publish_pack, "chat_completion", lambda **kwargs: json.dumps(obj))
+    return publish_pack.run_agent({"script_v2": SCRIPT, "topic": "ahorro", "niche": "finanzas"})
+
+
+def test_parsed_titles_are_the_rendered_ones(monkeypatch):
+    result = _run(monkeypatch, {"titles": [42, None, "  Ahorra 1000€  ", "", "Sin excusas", "El método 50/30/20"]})
+
+    assert result["parsed"]["titles"] == ["Ahorra 1000€", "Sin excusas", "El método 50/30/20"]
+    assert result["titles_raw"] == "1) Ahorra 1000€\n2) Sin excusas\n3) El método 50/30/20"
+    # lo que hace la etapa CTR con el primero
+    assert result["parsed"]["titles"][0].strip() == "Ahorra 1000€"
+
+
+def test_invalid_fields_are_reported_and_not_parsed(monkeypatch):
+    result = _run(
+        monkeypatch,
+        {
+            "titles": ["solo uno", 3],
+            "description": "corta",
+            "hashtags": {"tiktok": ["ahorro", "#dinero", "finanzas"], "shorts": ["#a", "#b", "#c"], "reels": ["x", "y", "z"]},
+        },
+    )
+
+    assert sorted(result["invalid_fields"]) == ["description", "titles"]
+    assert result["parsed"] == {
+        "hashtags": {
+            "tiktok": ["#ahorro", "#dinero", "#finanzas"],
+            "shorts": ["#a", "#b", "#c"],
+            "reels": ["#x", "#y", "#z"],
+        }
+    }
+    assert result["hashtags_raw"].startswith("[TIKTOK]\n#ahorro #dinero #finanzas")
@@ -0,0 +1,44 @@
+import pytest
+
+import quality_gate
+from quality_gate import evaluate_script, heuristic_score, parse_rater_score
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("Nota global (0–10): 8", 8.0),
+        ("Nota global 0-10 → 6", 6.0),
+        ("Nota global (0 a 10): 7,5\nGancho flojo.", 7.5),
+        ("Score (0-10): 10", 10.0),
+        ("Le doy un 7/10 al guion.", 7.0),
+        ("Nota: 9", 9.0),
+        ("Sin nota.", None),
+        ("ERROR_LLM: timeout", None),
+    ],
+)
+def test_parse_rater_score(raw, expected):
+    assert parse_rater_score(raw) == expected
+
+
+def test_rater_repeating_the_scale_does_not_sink_the_gate():
+    script = "¿Sabías esto? " + "Invierte poco cada mes y deja que el tiempo trabaje. " * 14 + "Sígueme."
+    verdict = evaluate_script(
+        script,
+        min_score=9.0,  # heurística 10 → zona dudosa, se consulta al rater
+        use_rater=True,
+        rater=lambda payload: {"rating_raw": "Nota global (0–10): 9\nBuen ritmo."},
+    )
+    assert verdict["heuristic"] == 10.0
+    assert verdict["rater"] == 9.0
+    assert verdict["passed"]
+
+
+def test_cta_penalty_is_language_aware():
+    en_script = "Want more money? " + "Save a little every month and let time work. " * 14 + "Follow for more."
+    en_issues = heuristic_score(en_script, lang="en")["issues"]
+    assert not any("CTA" in i for i in en_issues)
+    assert any("CTA" in i for i in heuristic_score(en_script, lang="es")["issues"])
+    # idioma sin lista de CTA → no se penaliza
+    assert heuristic_score(en_script, lang="de")["score"] >= heuristic_score(en_script, lang="es")["score"]
+    assert quality_gate._CTA_WORDS["es"]
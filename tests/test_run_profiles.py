@@ -0,0 +1,80 @@
+import pytest
+
+import run_profiles as rp
+
+LEAN = {
+    "titles", "description", "hashtags", "vault_offer", "broll", "render",
+    # dependencias transitivas
+    "script_v2", "script_v1", "angles", "media_plan",
+}
+CHANNELS = [
+    {"id": "auren_dinero", "name": "Auren Dinero", "run_profile": "shorts_only"},
+    {"id": "auren_cashflow", "name": "Auren Cashflow"},
+]
+
+
+def test_resolve_stages_adds_transitive_dependencies():
+    assert rp.resolve_stages(["ctr"]) == {"ctr", "titles", "media_plan", "script_v2", "script_v1", "angles"}
+    assert rp.resolve_stages(["hashtags"]) == {"hashtags"}
+    assert rp.resolve_stages([]) == set()
+
+
+def test_unknown_stage_raises():
+    with pytest.raises(KeyError, match="no_existe"):
+        rp.resolve_stages(["titles", "no_existe"])
+
+
+def test_full_profile_runs_everything_unless_flags_prune_it():
+    assert rp.stages_for_run("full") == set(rp.ALL_STAGES)
+
+    stages = rp.stages_for_run("full", run_quality=False, want_broll=False, offer_pinned=True)
+    assert stages == set(rp.ALL_STAGES) - {"quality", "broll", "hotmart", "saas"}
+    assert "media_plan" in stages  # ctr la sigue pidiendo
+
+
+def test_shorts_only_skips_platform_versions():
+    assert rp.stages_for_run("shorts_only") == set(rp.ALL_STAGES) - {"platform_versions"}
+    assert rp.stages_for_run("shorts_only", offer_pinned=True) == set(rp.ALL_STAGES) - {
+        "platform_versions", "hotmart", "saas",
+    }
+
+
+def test_lean_keeps_only_the_dependency_closure():
+    assert rp.stages_for_run("lean") == LEAN
+    assert rp.stages_for_run("lean", offer_pinned=True) == LEAN
+    # sin B-roll, media_plan ya no lo pide nadie
+    assert rp.stages_for_run("lean", want_broll=False) == LEAN - {"broll", "media_plan"}
+
+
+def test_unknown_profile_falls_back_to_full(capsys):
+    assert rp.stages_for_run("no_existe") == set(rp.ALL_STAGES)
+    assert "Perfil de ejecución desconocido" in capsys.readouterr().out
+
+
+def test_channel_profile_precedence(monkeypatch):
+    monkeypatch.setattr(rp, "_ENV_CHANNEL_PROFILES", {})
+    monkeypatch.setattr(rp, "DEFAULT_PROFILE", "full")
+    assert rp.profile_for_channel("Auren Dinero", CHANNELS) == "shorts_only"
+    assert rp.profile_for_channel("auren_dinero", CHANNELS) == "shorts_only"
+    assert rp.profile_for_channel("Auren Cashflow", CHANNELS) == "full"
+    assert rp.profile_for_channel(None, CHANNELS) == "full"
+
+    # el env gana, por nombre o por id
+    monkeypatch.setattr(rp, "_ENV_CHANNEL_PROFILES", {"Auren Dinero": "lean", "auren_cashflow": "lean"})
+    assert rp.profile_for_channel("Auren Dinero", CHANNELS) == "lean"
+    assert rp.profile_for_channel("Auren Cashflow", CHANNELS) == "lean"
+
+
+@pytest.mark.parametrize(
+    "raw, expected, warning",
+    [
+        ('{"Auren Dinero": "lean"}', {"Auren Dinero": "lean"}, False),
+        ("", {}, False),
+        ("{no es json", {}, True),
+        ('["lean"]', {}, True),
+    ],
+)
+def test_env_channel_profiles_parsing(monkeypatch, capsys, raw, expected, warning):
+    monkeypatch.setenv("AUREN_CHANNEL_PROFILES", raw)
+    assert rp._load_env_profiles() == expected
+    assert ("AUREN_CHANNEL_PROFILES" in capsys.readouterr().out) is warning
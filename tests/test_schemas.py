@@ -0,0 +1,21 @@
+from agents.schemas import AGENT_SCHEMAS, validate
+
+
+def _ctr(estimate):
+    return {
+        "ctr_estimate": estimate,
+        "reason": "Título concreto con cifra.",
+        "variants": [{"title": "Ahorra 1000€ en 3 meses", "thumbnail_idea": "Hucha rota"}],
+    }
+
+
+def test_ctr_forecaster_keeps_the_categorical_estimate():
+    spec = AGENT_SCHEMAS["ctr_forecaster"]
+
+    assert validate(_ctr("medio"), spec["schema"]) == []
+    assert validate(_ctr(7.5), spec["schema"]) == ["ctr_estimate: se esperaba string"]
+    assert validate(_ctr("altísimo"), spec["schema"]) == ["ctr_estimate: debe ser uno de bajo, medio, alto"]
+
+    text = spec["render"](_ctr("alto"))
+    assert "- CTR estimado: alto\n" in text
+    assert "1) Ahorra 1000€ en 3 meses — Hucha rota" in text
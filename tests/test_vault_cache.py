@@ -0,0 +1,129 @@
+import json
+import os
+
+import pytest
+
+from vault import vault_cache
+from vault.vault_engine import engine_for
+from vault.vault_index import get_index
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(vault_cache, "_entries", {})
+    monkeypatch.setattr(vault_cache, "_derived", vault_cache.OrderedDict())
+    monkeypatch.setattr(vault_cache, "CHECK_S", 0)
+
+
+@pytest.fixture
+def loads():
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("root no es objeto")
+        return data
+
+    loader.calls = calls
+    return loader
+
+
+def _write(path, data, mtime_ns=None):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_unchanged_file_is_parsed_once(tmp_path, loads):
+    path = tmp_path / "vault.json"
+    _write(path, {"offers": [{"id": "a"}]})
+    first = vault_cache.get(path, loads)
+    assert vault_cache.get(str(path), loads) is first
+    assert len(loads.calls) == 1
+
+
+def test_new_mtime_with_same_size_reloads(tmp_path, loads):
+    path = tmp_path / "vault.json"
+    _write(path, {"offers": [{"id": "a"}]}, mtime_ns=1_000_000_000)
+    vault_cache.get(path, loads)
+
+    _write(path, {"offers": [{"id": "b"}]}, mtime_ns=2_000_000_000)
+    assert vault_cache.get(path, loads)["offers"] == [{"id": "b"}]
+    assert len(loads.calls) == 2
+
+
+def test_new_size_with_same_mtime_reloads(tmp_path, loads):
+    path = tmp_path / "vault.json"
+    _write(path, {"offers": [{"id": "a"}]}, mtime_ns=1_000_000_000)
+    vault_cache.get(path, loads)
+
+    _write(path, {"offers": [{"id": "a"}, {"id": "b"}]}, mtime_ns=1_000_000_000)
+    assert len(vault_cache.get(path, loads)["offers"]) == 2
+
+
+def test_stat_is_skipped_inside_check_window(tmp_path, loads, monkeypatch):
+    monkeypatch.setattr(vault_cache, "CHECK_S", 3600)
+    path = tmp_path / "vault.json"
+    _write(path, {"offers": [{"id": "a"}]}, mtime_ns=1_000_000_000)
+    vault_cache.get(path, loads)
+
+    _write(path, {"offers": [{"id": "b"}]}, mtime_ns=2_000_000_000)
+    assert vault_cache.get(path, loads)["offers"] == [{"id": "a"}]
+
+    vault_cache.reload(path)
+    assert vault_cache.get(path, loads)["offers"] == [{"id": "b"}]
+
+    _write(path, {"offers": [{"id": "c"}]}, mtime_ns=3_000_000_000)
+    vault_cache.reload()
+    assert vault_cache.get(path, loads)["offers"] == [{"id": "c"}]
+
+
+def test_bad_edit_keeps_the_last_good_version(tmp_path, loads):
+    path = tmp_path / "vault.json"
+    _write(path, {"offers": [{"id": "a"}]}, mtime_ns=1_000_000_000)
+    good = vault_cache.get(path, loads)
+
+    path.write_text('{"offers": [{"id": ', encoding="utf-8")  # JSON a medio editar
+    assert vault_cache.get(path, loads) is good
+    vault_cache.reload(path)
+    assert vault_cache.get(path, loads) is good
+    n = len(loads.calls)
+    assert vault_cache.get(path, loads) is good
+    assert len(loads.calls) == n  # la versión rota no se reintenta hasta que vuelva a cambiar
+
+    _write(path, {"offers": [{"id": "b"}]}, mtime_ns=2_000_000_000)
+    assert vault_cache.get(path, loads)["offers"] == [{"id": "b"}]
+
+
+def test_first_load_of_a_bad_file_raises(tmp_path, loads):
+    path = tmp_path / "vault.json"
+    path.write_text("[]", encoding="utf-8")
+    with pytest.raises(ValueError):
+        vault_cache.get(path, loads)
+
+
+def test_index_and_engine_live_outside_the_shared_dict(tmp_path, loads):
+    path = tmp_path / "vault.json"
+    _write(path, {"offers": [{"id": "a", "url": "https://example.com", "keywords": ["ahorro"]}]})
+    data = vault_cache.get(path, loads)
+    snapshot = json.dumps(data, sort_keys=True)
+
+    index = get_index(data)
+    engine = engine_for(data, "affiliates")
+    assert get_index(data) is index
+    assert engine_for(data, "affiliates") is engine
+    assert json.dumps(data, sort_keys=True) == snapshot
+    assert set(data) == {"offers"}
+
+    # ofertas sustituidas → se reconstruye
+    data2 = dict(data, offers=data["offers"] + [{"id": "b", "url": "https://example.com/b"}])
+    assert get_index(data2) is not index
+    assert len(engine_for(data2, "affiliates").offers) == 2
+
+    # recarga del fichero → lo derivado del dict viejo se suelta
+    _write(path, {"offers": []}, mtime_ns=5_000_000_000)
+    vault_cache.get(path, loads)
+    assert all(v[0] is not data for v in vault_cache._derived.values())
@@ -0,0 +1,114 @@
+import json
+
+from vault import auren_affiliates_vault, vault_media
+from vault.vault_engine import VaultEngine
+
+AFFILIATES = {
+    "offers": [
+        {
+            "id": "curso_inversion_basica",
+            "name": "Curso de Inversión para Principiantes",
+            "url": "https://example.com/curso",
+            "countries": ["ES", "MX"],
+            "keywords": ["invertir", "principiantes"],
+            "slot": "dinero_principiantes",
+        },
+        {
+            "id": "saas_tracking_inversion",
+            "name": "App de seguimiento de finanzas",
+            "url": "https://example.com/app",
+            "countries": ["ES"],
+            "keywords": ["seguimiento", "control de gastos"],
+            "slot": "dinero_principiantes",
+        },
+        {
+            "id": "saas_presupuesto",
+            "name": "Presupuesto mensual",
+            "url": "https://example.com/presupuesto",
+            "keywords": ["control de gastos", "presupuesto"],
+            "slot": "ahorro",
+        },
+    ]
+}
+
+MEDIA = {
+    "offers": [
+        {
+            "id": "curso_media",
+            "name": "Curso media",
+            "base_url": "https://example.com/media",
+            "default_slot": "curso_slot",
+            "tags": ["invertir"],
+        }
+    ],
+    "channel_overrides": [
+        {
+            "channel_name": "Auren Dinero",
+            "affiliate_slot": "curso_slot",
+            "offer_id": "curso_media",
+            "custom_url": "https://example.com/media?src=auren",
+        }
+    ],
+}
+
+
+def _engine():
+    return VaultEngine([("media", MEDIA), ("affiliates", AFFILIATES)])
+
+
+def test_slot_with_several_offers_is_ranked_by_topic():
+    engine = _engine()
+    offer = engine.suggest(
+        "app de seguimiento para control de gastos", country_code="ES", affiliate_slot="dinero_principiantes"
+    )
+    assert offer["id"] == "saas_tracking_inversion"
+    assert offer["source"] == "slot_topic_match"
+
+    offer = engine.suggest("cómo invertir siendo principiantes", country_code="ES", affiliate_slot="dinero_principiantes")
+    assert offer["id"] == "curso_inversion_basica"
+
+
+def test_slot_without_topic_match_falls_back_inside_the_slot():
+    offer = _engine().suggest("recetas de cocina", country_code="ES", affiliate_slot="dinero_principiantes")
+    assert offer["id"] == "curso_inversion_basica"
+    assert offer["source"] == "slot_fallback"
+
+
+def test_only_single_offer_slots_and_overrides_are_pinned():
+    engine = _engine()
+    # en MX solo queda una oferta del slot → fijada aunque el topic apunte a otra
+    offer = engine.suggest("control de gastos", country_code="MX", affiliate_slot="dinero_principiantes")
+    assert (offer["id"], offer["source"]) == ("curso_inversion_basica", "slot_match")
+
+    offer = engine.suggest("lo que sea", channel_name="Auren Dinero", affiliate_slot="curso_slot")
+    assert offer["source"] == "channel_override"
+    assert offer["final_url"] == "https://example.com/media?src=auren"
+
+    assert engine.pinned_offer(affiliate_slot="dinero_principiantes", country_code="ES") is None
+
+
+def test_match_many_ranks_each_topic_inside_the_slot():
+    results = _engine().match_many(
+        ["app de seguimiento para control de gastos", "invertir para principiantes"],
+        country_code="ES",
+        affiliate_slot="dinero_principiantes",
+    )
+    assert [r["id"] for r in results] == ["saas_tracking_inversion", "curso_inversion_basica"]
+
+
+def test_module_helpers_delegate_to_the_engine(tmp_path):
+    offer = vault_media.suggest_offer_for_video(
+        dict(MEDIA), "invertir", "", "ES", channel_name="Auren Dinero", affiliate_slot="curso_slot"
+    )
+    assert offer["source"] == "channel_override"
+
+    path = tmp_path / "affiliates_vault.json"
+    path.write_text(json.dumps(AFFILIATES), encoding="utf-8")
+    offer = auren_affiliates_vault.pick_offer_for_video(
+        "app de seguimiento para control de gastos",
+        audience="principiantes",
+        slot="dinero_principiantes",
+        country_code="ES",
+        vault_path=str(path),
+    )
+    assert offer["id"] == "saas_tracking_inversion"
@@ -0,0 +1,29 @@
+import pytest
+
+import auren_media_brain as brain
+
+
+@pytest.fixture(autouse=True)
+def no_decision_log(monkeypatch):
+    monkeypatch.setattr(brain, "record_brain_decision", lambda *a, **k: None)
+
+
+def _channel(name):
+    return brain.ChannelInfo(
+        name=name, niche="dinero", platform="youtube",
+        ctr=5.0, retention=50.0, growth=10.0, revenue=100.0, rpm=3.0, engagement=5.0,
+    )
+
+
+def test_channels_with_the_same_slug_get_distinct_ids():
+    topics = [
+        brain.TopicCandidate(topic=f"tema {i}", base_money_score=50 + i, novelty=50, competition=30, emotion="aspiracional")
+        for i in range(10)
+    ]
+    plan = brain.build_weekly_plan([_channel("Auren Dinero"), _channel("Auren Dinero!")], topics, days=["lunes", "martes"])
+
+    ids = [ch["id"] for ch in plan["channels"]]
+    video_ids = [v["video_id"] for ch in plan["channels"] for v in ch["videos"]]
+    assert len(set(ids)) == 2
+    assert len(video_ids) == 4
+    assert len(set(video_ids)) == len(video_ids)
@@ -1,9 +1,39 @@
 # topic_memory.py
 import json
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+try:
+    import fcntl  # POSIX: lock entre procesos / nodos
+except ImportError:  # Windows → solo lock entre hilos
+    fcntl = None
+
 PATH = Path("data/topics_used.json")
 
+# En modo worker varios hilos marcan topics a la vez → serializamos el read-modify-write
+_LOCK = threading.Lock()
+
+
+@contextmanager
+def _locked():
+    """
+    Lock entre hilos + lock de fichero (data/topics_used.json.lock) entre procesos,
+    para que varios workers / nodos no se pisen al marcar topics.
+    """
+    with _LOCK:
+        if fcntl is None:
+            yield
+            return
+        PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{PATH}.lock", "a+") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
 
 def _load():
     if not PATH.exists():
@@ -13,18 +43,34 @@ def _load():
 
 def _save(data):
     PATH.parent.mkdir(parents=True, exist_ok=True)
-    PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Escritura atómica: nadie lee nunca un JSON a medio escribir
+    tmp = PATH.with_name(f"{PATH.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, PATH)
 
 
 def is_used(channel_id: str, topic_slug: str) -> bool:
-    data = _load()
+    with _locked():
+        data = _load()
     return topic_slug in data.get(channel_id, [])
 
 
 def mark_used(channel_id: str, topic_slug: str):
-    data = _load()
-    lst = data.get(channel_id, [])
-    if topic_slug not in lst:
-        lst.append(topic_slug)
-    data[channel_id] = lst
-    _save(data)
+    """
+    Idempotente: marcar dos veces el mismo topic no duplica nada.
+    Es el punto de "completion" de un job en modo multi-nodo.
+    """
+    with _locked():
+        data = _load()
+        lst = data.get(channel_id, [])
+        if topic_slug not in lst:
+            lst.append(topic_slug)
+        data[channel_id] = lst
+        _save(data)
+
+
+def used_slugs(channel_id: str) -> set:
+    """Todos los topics (o video_ids) ya hechos de un canal / plan, en una sola lectura."""
+    with _locked():
+        data = _load()
+    return set(data.get(channel_id, []))
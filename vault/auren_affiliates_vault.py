@@ -2,7 +2,11 @@
 
 import json
 import os
-from typing import Optional, Dict, Any, List
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from . import vault_cache
+from .vault_index import VaultIndex, get_index
 
 
 DEFAULT_VAULT_PATH = os.getenv(
@@ -11,16 +15,24 @@ DEFAULT_VAULT_PATH = os.getenv(
 )
 
 
+def _parse_vault(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data.setdefault("offers", [])
+    get_index(data, keyword_fields=("keywords",), slot_fields=("slot",))
+    return data
+
+
 def _load_json(path: str) -> Dict[str, Any]:
     if not os.path.isfile(path):
         return {"offers": []}
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # Parseado + indexado una vez por proceso; se recarga si cambia el fichero
+    return vault_cache.get(path, _parse_vault)
 
 
 def load_vault(path: Optional[str] = None) -> Dict[str, Any]:
     """
-    Carga el Vault desde un JSON.
+    Carga el Vault desde un JSON (cacheado por proceso, ver vault_cache.py).
 
     Estructura esperada:
     {
@@ -46,26 +58,10 @@ def load_vault(path: Optional[str] = None) -> Dict[str, Any]:
 def _topic_matches_offer(topic: str, offer: Dict[str, Any]) -> int:
     """
     Devuelve un pequeño score de encaje topic ↔ oferta, basado en keywords.
-    Cuanto más alto, mejor.
+    Cuanto más alto, mejor. (Una sola oferta; para muchas, usar el índice.)
     """
-    topic_l = topic.lower()
-    score = 0
-
-    for kw in offer.get("keywords", []):
-        if kw.lower() in topic_l:
-            score += 3
-
-    for niche in offer.get("niches", []):
-        if niche.lower() in topic_l:
-            score += 2
-
-    # Bonus: si el título de la oferta contiene palabras del topic
-    name = offer.get("name", "").lower()
-    for word in topic_l.split():
-        if len(word) > 4 and word in name:
-            score += 1
-
-    return score
+    ranked = VaultIndex([offer], keyword_fields=("keywords",), slot_fields=("slot",)).match(topic, limit=1)
+    return ranked[0][1] if ranked else 0
 
 
 def pick_offer_for_video(
@@ -78,43 +74,17 @@ def pick_offer_for_video(
     """
     Selecciona la mejor oferta del Vault para este vídeo.
 
-    - Usa keywords / niches.
-    - Filtra opcionalmente por 'slot' (por ejemplo, "dinero_principiantes").
+    Delegado en el motor del vault (vault_engine.py) sobre este fichero:
+    - 'slot' (por ejemplo, "dinero_principiantes"): si tiene una sola oferta
+      válida para el país, esa; si tiene varias, la que mejor encaja con el topic.
+    - Si no, keywords / niches / nombre (Aho–Corasick, vault_index.py).
     - Filtra opcionalmente por país.
     """
+    # Import aquí: vault_engine importa este módulo para cargar el vault
+    from .vault_engine import engine_for
 
     data = load_vault(vault_path)
-    offers: List[Dict[str, Any]] = data.get("offers", [])
-
-    if not offers:
-        return None
-
-    candidates: List[Dict[str, Any]] = []
-
-    for offer in offers:
-        # Filtro por slot (si se especifica)
-        if slot and offer.get("slot") and offer.get("slot") != slot:
-            continue
-
-        # Filtro por país (si se especifica)
-        if country_code:
-            countries = offer.get("countries")
-            if countries and country_code not in countries:
-                continue
-
-        score = _topic_matches_offer(topic, offer)
-        if score <= 0:
-            continue
-
-        offer_copy = dict(offer)
-        offer_copy["_score"] = score
-        candidates.append(offer_copy)
-
-    if not candidates:
+    if not data.get("offers"):
         return None
 
-    # Escogemos el de mejor score
-    candidates.sort(key=lambda o: o["_score"], reverse=True)
-    best = candidates[0]
-    best.pop("_score", None)
-    return best
+    return engine_for(data, "affiliates").suggest(topic, country_code=country_code, affiliate_slot=slot)
@@ -0,0 +1,116 @@
+"""
+keyword_matcher.py
+
+Matcher multi-patrón Aho–Corasick (sin dependencias).
+
+- Se construye UNA vez con todas las frases (keywords, tags, nichos...).
+- find() recorre el texto en un solo pase, O(len(texto) + nº de hits),
+  da igual cuántas frases haya: sirve para un topic o para un guion entero.
+- Insensible a mayúsculas y acentos ("Inversión" == "inversion") y a la
+  puntuación: texto y frases se normalizan a palabras separadas por un espacio.
+- Solo palabras completas: "ia" no casa dentro de "familia".
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+_NON_WORD_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """'¿Cómo INVERTIR?' → 'como invertir' (sin acentos, minúsculas, palabras separadas por un espacio)."""
+    decomposed = unicodedata.normalize("NFKD", (text or "").lower())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_WORD_RE.sub(" ", stripped).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    norm = normalize(text)
+    return norm.split(" ") if norm else []
+
+
+class KeywordMatcher:
+    """
+    Autómata Aho–Corasick sobre frases normalizadas.
+    Cada frase lleva una lista de payloads (lo que se devuelve en cada hit).
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]] = ()) -> None:
+        # nodo = índice; transiciones, fallo y salida (ids de frase que terminan aquí)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._own: List[List[int]] = [[]]  # frases que terminan exactamente en el nodo
+        self._out: List[List[int]] = [[]]  # + las de sus enlaces de fallo (tras build)
+        self._phrase_ids: Dict[str, int] = {}
+        self.phrases: List[str] = []
+        self.payloads: List[List[Any]] = []
+        self._built = False
+        for phrase, payload in patterns:
+            self.add(phrase, payload)
+        self.build()
+
+    def add(self, phrase: str, payload: Any) -> None:
+        norm = normalize(phrase)
+        if not norm:
+            return
+        pid = self._phrase_ids.get(norm)
+        if pid is None:
+            pid = self._phrase_ids[norm] = len(self.phrases)
+            self.phrases.append(norm)
+            self.payloads.append([])
+            # los espacios de los extremos fijan los límites de palabra
+            node = 0
+            for ch in f" {norm} ":
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._own.append([])
+                node = nxt
+            self._own[node].append(pid)
+            self._built = False
+        self.payloads[pid].append(payload)
+
+    def build(self) -> None:
+        """Enlaces de fallo (BFS). Se llama solo tras añadir frases."""
+        self._out = [list(own) for own in self._own]
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+
+    def iter_hits(self, text: str) -> Iterator[int]:
+        """Ids de frase por cada aparición en `text` (un solo pase)."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in f" {normalize(text)} ":
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield from out[node]
+
+    def find(self, text: str) -> Dict[int, int]:
+        """{id de frase: nº de apariciones} en `text`."""
+        counts: Dict[int, int] = {}
+        for pid in self.iter_hits(text):
+            counts[pid] = counts.get(pid, 0) + 1
+        return counts
@@ -0,0 +1,166 @@
+"""
+vault_cache.py
+
+Caché de proceso para los JSON del VAULT (ya parseados + indexados).
+
+- Cada fichero se parsea una vez; se vuelve a leer solo si cambia su
+  (mtime, tamaño). El stat se hace como mucho cada CHECK_S segundos por fichero.
+- Con el watcher arrancado (modo daemon / worker) ni siquiera eso: un hilo
+  revisa los ficheros cada WATCH_S segundos y recarga en caliente, y las
+  llamadas no tocan disco.
+- reload() fuerza la recarga (todo o un fichero).
+- Si una recarga falla (p. ej. JSON a medio editar), se sigue sirviendo la
+  última versión buena.
+
+El loader recibe la ruta y devuelve el dict listo (lanza excepción si el
+fichero no es válido). Quien recibe el dict no debe mutarlo: es compartido.
+Lo que se construye a partir de él (índice, motor) se guarda aparte con derived().
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+CHECK_S = float(os.getenv("AUREN_VAULT_CHECK_S", "2"))
+WATCH_S = float(os.getenv("AUREN_VAULT_WATCH_S", "5"))
+DERIVED_MAX = int(os.getenv("AUREN_VAULT_DERIVED_MAX", "64"))  # objetos derivados vivos (LRU)
+
+Loader = Callable[[Path], Dict[str, Any]]
+
+_lock = threading.Lock()
+_entries: Dict[str, Dict[str, Any]] = {}
+_watcher: Optional[threading.Thread] = None
+_watcher_stop = threading.Event()
+
+# (id(dict), nombre) → (dict, fuentes, objeto). Guarda la referencia al dict:
+# mientras está aquí su id no se puede reutilizar.
+_derived_lock = threading.Lock()
+_derived: "OrderedDict[Tuple[int, str], Tuple[Dict[str, Any], Tuple[Any, ...], Any]]" = OrderedDict()
+
+
+def _signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _load_entry(key: str, path: Path, loader: Loader, sig: Optional[Tuple[int, int]]) -> Dict[str, Any]:
+    prev = _entries.get(key)
+    try:
+        data = loader(path)
+    except Exception as e:
+        if prev is None:
+            raise
+        print(f"[AUREN_VAULT] No se pudo recargar {path}: {e}. Se mantiene la versión anterior.")
+        prev.update(sig=sig, checked=time.monotonic())
+        return prev["data"]
+    if prev is not None:
+        print(f"[AUREN_VAULT] 🔄 Vault recargado: {path}")
+        forget_derived(prev["data"])
+    _entries[key] = {"path": path, "loader": loader, "sig": sig, "data": data, "checked": time.monotonic()}
+    return data
+
+
+def get(path: Path | str, loader: Loader) -> Dict[str, Any]:
+    """Dict del fichero `path` (parseado con `loader`), desde caché si no ha cambiado."""
+    path = Path(path)
+    key = str(path.resolve())
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            if watcher_running() or time.monotonic() - entry["checked"] < CHECK_S:
+                return entry["data"]
+            sig = _signature(path)
+            if sig == entry["sig"]:
+                entry["checked"] = time.monotonic()
+                return entry["data"]
+            return _load_entry(key, path, loader, sig)
+        return _load_entry(key, path, loader, _signature(path))
+
+
+def reload(path: Path | str | None = None) -> None:
+    """Recarga ya un fichero (o todos los cacheados)."""
+    with _lock:
+        keys = [str(Path(path).resolve())] if path is not None else list(_entries)
+        for key in keys:
+            entry = _entries.get(key)
+            if entry is not None:
+                _load_entry(key, entry["path"], entry["loader"], _signature(entry["path"]))
+
+
+def derived(data: Dict[str, Any], name: str, sources: Tuple[Any, ...], build: Callable[[], Any]) -> Any:
+    """
+    Objeto construido a partir de `data` (p. ej. su índice), sin escribirlo en
+    el dict compartido. Se reutiliza mientras `data` sea el mismo objeto y
+    `sources` (las piezas de las que depende) sigan siendo las mismas (is).
+    """
+    key = (id(data), name)
+    with _derived_lock:
+        hit = _derived.get(key)
+        if hit is not None and hit[0] is data and len(hit[1]) == len(sources) and all(
+            a is b for a, b in zip(hit[1], sources)
+        ):
+            _derived.move_to_end(key)
+            return hit[2]
+    obj = build()  # fuera del lock: compilar un índice grande no bloquea al resto
+    with _derived_lock:
+        _derived[key] = (data, sources, obj)
+        _derived.move_to_end(key)
+        while len(_derived) > DERIVED_MAX:
+            _derived.popitem(last=False)
+    return obj
+
+
+def forget_derived(data: Dict[str, Any]) -> None:
+    """Suelta los objetos derivados de `data` (p. ej. tras recargar el fichero)."""
+    with _derived_lock:
+        for key in [k for k, v in _derived.items() if v[0] is data]:
+            del _derived[key]
+
+
+def _check_all() -> None:
+    with _lock:
+        for key, entry in list(_entries.items()):
+            sig = _signature(entry["path"])
+            if sig != entry["sig"]:
+                _load_entry(key, entry["path"], entry["loader"], sig)
+            else:
+                entry["checked"] = time.monotonic()
+
+
+def watcher_running() -> bool:
+    return _watcher is not None and _watcher.is_alive()
+
+
+def start_watcher(interval: float | None = None) -> None:
+    """Hilo daemon que recarga en caliente los vaults cacheados cuando cambian."""
+    global _watcher
+    if watcher_running():
+        return
+    every = interval or WATCH_S
+    _watcher_stop.clear()
+
+    def _run() -> None:
+        while not _watcher_stop.wait(every):
+            try:
+                _check_all()
+            except Exception as e:
+                print(f"[AUREN_VAULT] Error en el watcher: {e}")
+
+    _watcher = threading.Thread(target=_run, name="vault-watcher", daemon=True)
+    _watcher.start()
+
+
+def stop_watcher() -> None:
+    global _watcher
+    _watcher_stop.set()
+    if _watcher is not None:
+        _watcher.join()
+    _watcher = None
@@ -0,0 +1,305 @@
+"""
+vault_engine.py
+
+Motor único del VAULT: une los dos formatos en una sola representación compilada.
+
+- vault_media.json        → base_url / default_slot / tags + channel_overrides
+- affiliates_vault.json   → url / slot / keywords
+
+Cada oferta se normaliza a un esquema común (se conservan los campos originales):
+  id, name, url (enlace final), base_url, slot, keywords (tags + keywords),
+  niches, countries, notes, default_cta, vault ("media" | "affiliates")
+Si un id está en los dos ficheros, gana vault_media (es el que lleva overrides).
+
+Un solo VaultIndex (Aho–Corasick + bitmaps de país / slot) sobre todas las
+ofertas. Orden de decisión (también el de vault_media.suggest_offer_for_video
+y auren_affiliates_vault.pick_offer_for_video, que delegan aquí):
+
+1) override del canal (+ slot) → esa oferta con su custom_url
+2) affiliate_slot con una sola oferta válida para el país → esa (fijada)
+3) affiliate_slot con varias → mejor score dentro del slot (index.match con
+   slot=); si ninguna puntúa, la primera del slot válida para el país
+4) mejor score de topic / nicho / guion entre las ofertas válidas para el país
+   (keyword/tag 3, nicho 2, palabra del nombre 1, frase del guion 1)
+5) si nada puntúa: primera oferta válida para el país (source "fallback")
+
+Solo 1) y 2) fijan la oferta (source "channel_override" / "slot_match"): el
+resto se puede volver a puntuar con el guion. match_many() resuelve todos los
+topics de un run de una vez: 1) y 2) no dependen del topic y se calculan una
+sola vez, y las consultas repetidas se reutilizan.
+
+Los ficheros se leen con los loaders de cada módulo (caché de proceso +
+recarga en caliente, vault_cache.py); el motor se recompila solo cuando
+alguno de los dos cambia.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from . import auren_affiliates_vault, vault_cache, vault_media
+from .vault_index import VaultIndex
+
+# Lo que match_many acepta por topic: el texto o un dict con campos propios
+TopicQuery = Union[str, Dict[str, Any]]
+
+_lock = threading.Lock()
+_engine: Optional["VaultEngine"] = None
+_engine_sources: Tuple[Any, ...] = ()
+
+
+def _as_list(value: Any) -> List[Any]:
+    if not value:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def normalize_offer(offer: Dict[str, Any], vault_name: str) -> Dict[str, Any]:
+    """Oferta de cualquiera de los dos formatos → esquema común (copia)."""
+    result = dict(offer)
+    result["id"] = str(offer.get("id") or "")
+    result["url"] = offer.get("url") or offer.get("base_url") or ""
+    result["slot"] = offer.get("slot") or offer.get("default_slot") or None
+    result["keywords"] = _as_list(offer.get("keywords")) + _as_list(offer.get("tags"))
+    result["niches"] = _as_list(offer.get("niches"))
+    result["countries"] = _as_list(offer.get("countries"))
+    result["vault"] = vault_name
+    return result
+
+
+class VaultEngine:
+    """Ofertas normalizadas de ambos vaults + overrides de canal + índice compilado."""
+
+    def __init__(self, sources: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        self.offers: List[Dict[str, Any]] = []
+        self.channel_overrides: List[Dict[str, Any]] = []
+        seen: set = set()
+        for vault_name, data in sources:
+            for offer in data.get("offers") or []:
+                norm = normalize_offer(offer, vault_name)
+                if norm["id"] and norm["id"] in seen:
+                    continue
+                seen.add(norm["id"])
+                self.offers.append(norm)
+            self.channel_overrides.extend(data.get("channel_overrides") or [])
+        self.index = VaultIndex(
+            self.offers,
+            self.channel_overrides,
+            keyword_fields=("keywords",),
+            slot_fields=("slot",),
+        )
+
+    # ---------- piezas de la decisión ----------
+
+    def _result(self, offer: Dict[str, Any], source: str, url: Optional[str] = None) -> Dict[str, Any]:
+        result = dict(offer)
+        result["url"] = url or offer.get("url")
+        result["final_url"] = result["url"]  # nombre que usaba vault_media
+        result["source"] = source
+        return result
+
+    def pinned_offer(
+        self,
+        channel_name: Optional[str] = None,
+        affiliate_slot: Optional[str] = None,
+        country_code: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Oferta fijada (no depende del topic): override de canal, o la única
+        oferta del slot válida para el país. Con varias en el slot → None (se rankea).
+        """
+        override = self.index.channel_override(channel_name, affiliate_slot)
+        if override:
+            offer = self.index.by_id(str(override.get("offer_id")))
+            if offer:
+                return self._result(offer, "channel_override", override.get("custom_url"))
+        if affiliate_slot:
+            in_slot = self.index.slot_offers(affiliate_slot, country_code)
+            if len(in_slot) == 1:
+                return self._result(in_slot[0], "slot_match")
+        return None
+
+    def rank(
+        self,
+        topic: str,
+        niche: str = "",
+        country_code: Optional[str] = None,
+        script: str = "",
+        limit: Optional[int] = 10,
+        affiliate_slot: Optional[str] = None,
+    ) -> List[Tuple[Dict[str, Any], int]]:
+        """Candidatos [(oferta, score)] ya filtrados por país (y slot, si se da)."""
+        return self.index.match(
+            topic, niche=niche, country=country_code, slot=affiliate_slot, limit=limit, script=script
+        )
+
+    def _fallback(self, country_code: Optional[str]) -> Optional[Dict[str, Any]]:
+        allowed = self.index.allowed_bits(country=country_code)
+        for i, offer in enumerate(self.offers):
+            if allowed >> i & 1:
+                return self._result(offer, "fallback")
+        return None
+
+    def _best(
+        self,
+        topic: str,
+        niche: str,
+        country_code: Optional[str],
+        affiliate_slot: Optional[str],
+        script: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Pasos 3) a 5): mejor oferta por topic cuando nada la fija."""
+        in_slot = self.index.slot_offers(affiliate_slot, country_code) if affiliate_slot else []
+        if in_slot:
+            ranked = self.rank(topic, niche, country_code, script=script, limit=1, affiliate_slot=affiliate_slot)
+            if ranked:
+                result = self._result(ranked[0][0], "slot_topic_match")
+                result["match_score"] = ranked[0][1]
+                return result
+            return self._result(in_slot[0], "slot_fallback")
+
+        ranked = self.rank(topic, niche, country_code, script=script, limit=1)
+        if ranked:
+            result = self._result(ranked[0][0], "topic_or_niche")
+            result["match_score"] = ranked[0][1]
+            return result
+        return self._fallback(country_code)
+
+    # ---------- API ----------
+
+    def suggest(
+        self,
+        topic: str,
+        niche: str = "",
+        country_code: Optional[str] = None,
+        channel_name: Optional[str] = None,
+        affiliate_slot: Optional[str] = None,
+        script: str = "",
+    ) -> Optional[Dict[str, Any]]:
+        """Mejor oferta para un vídeo (ver el orden de decisión arriba)."""
+        pinned = self.pinned_offer(channel_name, affiliate_slot, country_code)
+        if pinned:
+            return pinned
+        return self._best(topic, niche, country_code, affiliate_slot, script)
+
+    def match_many(
+        self,
+        topics: Iterable[TopicQuery],
+        niche: str = "",
+        country_code: Optional[str] = None,
+        channel_name: Optional[str] = None,
+        affiliate_slot: Optional[str] = None,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Mejor oferta para cada topic de un run, en el mismo orden.
+        Cada elemento es el topic o un dict {"topic", "niche", "country_code",
+        "channel_name", "affiliate_slot", "script"} que pisa los valores comunes.
+        """
+        defaults = {
+            "niche": niche,
+            "country_code": country_code,
+            "channel_name": channel_name,
+            "affiliate_slot": affiliate_slot,
+            "script": "",
+        }
+        pinned_cache: Dict[Tuple[Any, ...], Optional[Dict[str, Any]]] = {}
+        ranked_cache: Dict[Tuple[Any, ...], Optional[Dict[str, Any]]] = {}
+        results: List[Optional[Dict[str, Any]]] = []
+
+        for item in topics:
+            q = dict(defaults)
+            if isinstance(item, dict):
+                q.update({k: v for k, v in item.items() if k in defaults or k == "topic"})
+            else:
+                q["topic"] = item
+
+            pin_key = (q["channel_name"], q["affiliate_slot"], q["country_code"])
+            if pin_key not in pinned_cache:
+                pinned_cache[pin_key] = self.pinned_offer(*pin_key)
+            offer = pinned_cache[pin_key]
+
+            if offer is None:
+                key = (
+                    q.get("topic") or "",
+                    q["niche"] or "",
+                    q["country_code"],
+                    q["affiliate_slot"],
+                    q["script"] or "",
+                )
+                if key not in ranked_cache:
+                    ranked_cache[key] = self._best(*key)
+                offer = ranked_cache[key]
+
+            results.append(dict(offer) if offer else None)
+        return results
+
+
+def engine_for(vault: Dict[str, Any], vault_name: str) -> VaultEngine:
+    """
+    Motor sobre un solo vault ya cargado ("media" | "affiliates"), guardado aparte
+    como el índice de get_index (vault_cache.derived). Se reconstruye si cambian
+    las ofertas o los overrides.
+    """
+    sources = (vault.get("offers"), vault.get("channel_overrides"))
+    return vault_cache.derived(vault, f"engine:{vault_name}", sources, lambda: VaultEngine([(vault_name, vault)]))
+
+
+def get_engine(
+    media_path: Optional[str] = None,
+    affiliates_path: Optional[str] = None,
+) -> VaultEngine:
+    """
+    Motor compilado sobre vault_media.json + affiliates_vault.json.
+    Se reconstruye solo si alguno de los dos ficheros se ha recargado.
+    """
+    global _engine, _engine_sources
+    media = vault_media.load_vault(media_path)
+    affiliates = auren_affiliates_vault.load_vault(affiliates_path)
+
+    # Un vault ausente se devuelve como dict vacío nuevo en cada llamada: no invalida
+    sources = tuple(
+        d if (d.get("offers") or d.get("channel_overrides")) else None for d in (media, affiliates)
+    )
+    with _lock:
+        same = len(sources) == len(_engine_sources) and all(
+            a is b for a, b in zip(sources, _engine_sources)
+        )
+        if _engine is None or not same:
+            _engine = VaultEngine([("media", media), ("affiliates", affiliates)])
+            _engine_sources = sources
+        return _engine
+
+
+def suggest_offer(
+    topic: str,
+    niche: str = "",
+    country_code: Optional[str] = None,
+    channel_name: Optional[str] = None,
+    affiliate_slot: Optional[str] = None,
+    script: str = "",
+) -> Optional[Dict[str, Any]]:
+    return get_engine().suggest(
+        topic,
+        niche=niche,
+        country_code=country_code,
+        channel_name=channel_name,
+        affiliate_slot=affiliate_slot,
+        script=script,
+    )
+
+
+def match_many(
+    topics: Iterable[TopicQuery],
+    niche: str = "",
+    country_code: Optional[str] = None,
+    channel_name: Optional[str] = None,
+    affiliate_slot: Optional[str] = None,
+) -> List[Optional[Dict[str, Any]]]:
+    return get_engine().match_many(
+        topics,
+        niche=niche,
+        country_code=country_code,
+        channel_name=channel_name,
+        affiliate_slot=affiliate_slot,
+    )
@@ -0,0 +1,211 @@
+"""
+vault_index.py
+
+Índice compilado del VAULT (se construye una vez al cargar):
+
+- id → oferta y slot → ofertas (hash maps)
+- un único autómata Aho–Corasick (keyword_matcher.py) con todas las
+  keywords / tags / nichos / palabras del nombre de todas las ofertas
+- país → bitmap de ofertas (int de Python como bitset); las ofertas sin
+  restricción de país van en un bitmap aparte que se suma siempre
+- overrides de canal por (canal, slot)
+
+match(topic, niche, country, slot, script) devuelve candidatos rankeados en
+un solo pase por texto, da igual cuántas ofertas y keywords haya: por eso
+también se puede puntuar contra el guion entero (script_v2).
+
+Pesos (los de auren_affiliates_vault): keyword/tag 3, nicho 2, palabra del nombre 1;
+cada frase distinta encontrada en el guion suma SCRIPT_WEIGHT.
+Las frases de varias palabras ("finanzas personales") casan como palabras
+completas, sin distinguir mayúsculas ni acentos ("inversión" == "inversion").
+
+Lo usan vault_media.py y auren_affiliates_vault.py.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from . import vault_cache
+from .keyword_matcher import KeywordMatcher, tokenize
+
+KEYWORD_WEIGHT = 3
+NICHE_WEIGHT = 2
+NAME_WEIGHT = 1
+SCRIPT_WEIGHT = 1
+NAME_MIN_LEN = 5  # palabras del nombre de la oferta que cuentan (como en el vault de afiliados)
+
+
+class VaultIndex:
+    """Índice de solo lectura sobre una lista de ofertas (no la copia ni la modifica)."""
+
+    def __init__(
+        self,
+        offers: List[Dict[str, Any]],
+        channel_overrides: Optional[List[Dict[str, Any]]] = None,
+        keyword_fields: Sequence[str] = ("keywords", "tags"),
+        niche_fields: Sequence[str] = ("niches",),
+        slot_fields: Sequence[str] = ("default_slot", "slot"),
+        name_field: str = "name",
+    ) -> None:
+        self.offers = offers
+        self.channel_overrides = channel_overrides
+        self.slot_fields = tuple(slot_fields)
+
+        self._by_id: Dict[str, int] = {}
+        self._by_slot: Dict[str, List[int]] = {}
+        # payload de cada frase: (oferta, peso, ¿es nicho?); los nichos se buscan también en el nicho del vídeo
+        self._matcher = KeywordMatcher()
+
+        self._country_bits: Dict[str, int] = {}
+        self._all_countries_bits = 0
+        self._slot_bits: Dict[str, int] = {}
+        self._no_slot_bits = 0
+
+        for i, offer in enumerate(offers):
+            bit = 1 << i
+            oid = offer.get("id")
+            if oid is not None:
+                self._by_id.setdefault(str(oid), i)
+
+            slots = [offer.get(f) for f in self.slot_fields if offer.get(f)]
+            if slots:
+                for slot in slots:
+                    self._by_slot.setdefault(str(slot), []).append(i)
+                    self._slot_bits[str(slot)] = self._slot_bits.get(str(slot), 0) | bit
+            else:
+                self._no_slot_bits |= bit
+
+            countries = offer.get("countries") or []
+            if countries:
+                for c in countries:
+                    self._country_bits[str(c)] = self._country_bits.get(str(c), 0) | bit
+            else:
+                self._all_countries_bits |= bit
+
+            for field in keyword_fields:
+                for kw in offer.get(field) or []:
+                    self._matcher.add(kw, (i, KEYWORD_WEIGHT, False))
+            for field in niche_fields:
+                for niche in offer.get(field) or []:
+                    self._matcher.add(niche, (i, NICHE_WEIGHT, True))
+            for word in tokenize(offer.get(name_field, "")):
+                if len(word) >= NAME_MIN_LEN:
+                    self._matcher.add(word, (i, NAME_WEIGHT, False))
+        self._matcher.build()
+
+        self._by_channel: Dict[str, List[Dict[str, Any]]] = {}
+        for ov in channel_overrides or []:
+            self._by_channel.setdefault(ov.get("channel_name"), []).append(ov)
+
+    # ---------- búsquedas exactas ----------
+
+    def by_id(self, offer_id: str) -> Optional[Dict[str, Any]]:
+        i = self._by_id.get(str(offer_id))
+        return self.offers[i] if i is not None else None
+
+    def by_slot(self, slot: str) -> Optional[Dict[str, Any]]:
+        """Primera oferta (en orden del vault) con ese slot."""
+        ids = self._by_slot.get(str(slot))
+        return self.offers[ids[0]] if ids else None
+
+    def slot_offers(self, slot: str, country: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Ofertas con ese slot (orden del vault), solo las válidas para `country`."""
+        allowed = self.allowed_bits(country=country)
+        return [self.offers[i] for i in self._by_slot.get(str(slot), ()) if allowed >> i & 1]
+
+    def channel_override(self, channel_name: Optional[str], slot: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Override del canal para ese slot; sin slot, el primero del canal."""
+        if not channel_name:
+            return None
+        for ov in self._by_channel.get(channel_name, ()):
+            if not slot or ov.get("affiliate_slot") == slot:
+                return ov
+        return None
+
+    # ---------- filtros (bitmaps) ----------
+
+    def allowed_bits(self, country: Optional[str] = None, slot: Optional[str] = None) -> int:
+        """
+        Bitset de ofertas permitidas: sin restricción de país o que incluyen `country`;
+        y sin slot o con ese `slot`. -1 = todas.
+        """
+        bits = -1
+        if country:
+            bits &= self._country_bits.get(country, 0) | self._all_countries_bits
+        if slot:
+            bits &= self._slot_bits.get(slot, 0) | self._no_slot_bits
+        return bits
+
+    def allows_country(self, i: int, country: Optional[str]) -> bool:
+        return bool(self.allowed_bits(country=country) >> i & 1)
+
+    # ---------- matching ----------
+
+    def _score_into(
+        self,
+        scores: Dict[int, int],
+        text: str,
+        allowed: int,
+        niche_only: bool = False,
+        weight: Optional[int] = None,
+    ) -> None:
+        """
+        Suma a `scores` el peso de cada frase de cada oferta que aparece en `text`.
+        La misma frase (o keyword repetida) cuenta una vez por oferta y peso.
+        `weight` fija el peso de cualquier hit (lo usa el guion).
+        """
+        hit: set = set()
+        for pid in self._matcher.find(text):
+            for i, w, is_niche in self._matcher.payloads[pid]:
+                if niche_only and not is_niche:
+                    continue
+                if not (allowed >> i & 1):
+                    continue
+                w = w if weight is None else weight
+                key = (i, w, pid)
+                if key in hit:
+                    continue
+                hit.add(key)
+                scores[i] = scores.get(i, 0) + w
+
+    def match(
+        self,
+        topic: str,
+        niche: str = "",
+        country: Optional[str] = None,
+        slot: Optional[str] = None,
+        limit: Optional[int] = 10,
+        script: str = "",
+    ) -> List[Tuple[Dict[str, Any], int]]:
+        """
+        Candidatos [(oferta, score)] de mayor a menor score (empates → orden del vault).
+        - keywords / tags / nichos / palabras del nombre se buscan en el topic
+        - además, los nichos de la oferta se buscan en el nicho del vídeo
+        - con `script` (guion completo), cada frase distinta que aparece suma SCRIPT_WEIGHT
+        Solo ofertas con score > 0 que pasan los filtros de país y slot.
+        """
+        allowed = self.allowed_bits(country, slot)
+        scores: Dict[int, int] = {}
+        self._score_into(scores, topic, allowed)
+        if niche:
+            self._score_into(scores, niche, allowed, niche_only=True)
+        if script:
+            self._score_into(scores, script, allowed, weight=SCRIPT_WEIGHT)
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(self.offers[i], s) for i, s in ranked]
+
+
+def get_index(vault: Dict[str, Any], **kwargs: Any) -> VaultIndex:
+    """
+    Índice del vault, construido la primera vez y guardado aparte (vault_cache.derived):
+    el dict no se toca. Si la lista de ofertas o los overrides se sustituyen, se reconstruye.
+    """
+    offers = vault.get("offers")
+    overrides = vault.get("channel_overrides")
+    return vault_cache.derived(
+        vault, "index", (offers, overrides), lambda: VaultIndex(offers or [], overrides, **kwargs)
+    )
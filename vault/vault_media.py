@@ -3,7 +3,7 @@ vault_media.py
 
 Módulo VAULT para Auren Media:
 
-- Carga vault_media.json
+- Carga vault_media.json (+ índice compilado, vault_index.py)
 - Devuelve la mejor oferta para un vídeo concreto
 - Integra slots del Brain (affiliate_slot) + canal + país + nicho
 
@@ -14,17 +14,39 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import vault_cache
+from .vault_index import get_index
 
 
 VAULT_PATH_DEFAULT = Path(__file__).parent / "vault_media.json"
 
 
+def _parse_vault(p: Path) -> Dict[str, Any]:
+    """Lee + valida + indexa vault_media.json (lanza si el fichero no es válido)."""
+    with p.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if not isinstance(data, dict):
+        raise ValueError("Formato inválido (root no es objeto)")
+
+    data.setdefault("offers", [])
+    data.setdefault("channel_overrides", [])
+
+    # Índice id / slot / tokens / países, una vez por carga
+    get_index(data)
+
+    return data
+
+
 def load_vault(path: str | None = None) -> Dict[str, Any]:
     """
     Carga el VAULT desde JSON.
 
     Si no se especifica path, usa vault_media.json en esta carpeta.
+    Cacheado por proceso (vault_cache.py): solo se vuelve a parsear si el
+    fichero cambia. El dict es compartido: no mutarlo.
     """
     if path:
         p = Path(path)
@@ -37,92 +59,26 @@ def load_vault(path: str | None = None) -> Dict[str, Any]:
         return {"offers": [], "channel_overrides": []}
 
     try:
-        with p.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-    except json.JSONDecodeError as e:
+        return vault_cache.get(p, _parse_vault)
+    except (json.JSONDecodeError, ValueError) as e:
         print(f"[AUREN_VAULT] JSON inválido en {p}: {e}. Usando VAULT vacío.")
         return {"offers": [], "channel_overrides": []}
 
-    if not isinstance(data, dict):
-        print(f"[AUREN_VAULT] Formato inválido (root no es objeto). Usando VAULT vacío.")
-        return {"offers": [], "channel_overrides": []}
-
-    data.setdefault("offers", [])
-    data.setdefault("channel_overrides", [])
-
-    return data
-
-
-def _find_channel_override(
-    vault: Dict[str, Any],
-    channel_name: Optional[str],
-    affiliate_slot: Optional[str],
-) -> Optional[Dict[str, Any]]:
-    """
-    Busca en channel_overrides una entrada que coincida con canal y slot.
-    """
-    if not channel_name:
-        return None
-
-    overrides: List[Dict[str, Any]] = vault.get("channel_overrides", []) or []
-    for ov in overrides:
-        if ov.get("channel_name") != channel_name:
-            continue
-        if affiliate_slot and ov.get("affiliate_slot") == affiliate_slot:
-            return ov
-        # Si no hay slot, nos vale cualquier override del canal
-        if not affiliate_slot:
-            return ov
-
-    return None
-
-
-def _find_offer_by_id(vault: Dict[str, Any], offer_id: str) -> Optional[Dict[str, Any]]:
-    offers: List[Dict[str, Any]] = vault.get("offers", []) or []
-    for offer in offers:
-        if offer.get("id") == offer_id:
-            return offer
-    return None
-
-
-def _find_offer_by_slot(
-    vault: Dict[str, Any],
-    affiliate_slot: str,
-) -> Optional[Dict[str, Any]]:
-    """
-    Busca una oferta cuyo default_slot coincida con affiliate_slot.
-    """
-    offers: List[Dict[str, Any]] = vault.get("offers", []) or []
-    for offer in offers:
-        if offer.get("default_slot") == affiliate_slot:
-            return offer
-    return None
-
 
-def _find_offer_by_topic(
+def rank_offers_by_topic(
     vault: Dict[str, Any],
     topic: str,
     niche: str,
-) -> Optional[Dict[str, Any]]:
+    country_code: Optional[str] = None,
+    limit: Optional[int] = 10,
+    script: str = "",
+) -> List[Tuple[Dict[str, Any], int]]:
     """
-    Búsqueda muy simple por nicho y topic.
-    Se puede mejorar en el futuro con embeddings / LLM.
+    Candidatos [(oferta, score)] por tags / nichos / nombre, ya filtrados por país.
+    Usa el índice del vault (vault_index.py): no recorre todas las ofertas.
+    Con `script` (guion completo) también puntúan las keywords que aparecen en él.
     """
-    topic_lower = topic.lower()
-    niche_lower = niche.lower()
-
-    offers: List[Dict[str, Any]] = vault.get("offers", []) or []
-
-    # 1) Coincidencia grosera por palabras clave en nicho
-    for offer in offers:
-        tags = [t.lower() for t in (offer.get("tags") or [])]
-        niches = [n.lower() for n in (offer.get("niches") or [])]
-
-        if any(word in niche_lower for word in niches) or any(word in topic_lower for word in tags):
-            return offer
-
-    # 2) fallback: primera oferta
-    return offers[0] if offers else None
+    return get_index(vault).match(topic, niche=niche, country=country_code, limit=limit, script=script)
 
 
 def suggest_offer_for_video(
@@ -132,52 +88,29 @@ def suggest_offer_for_video(
     country_code: str,
     channel_name: Optional[str] = None,
     affiliate_slot: Optional[str] = None,
+    script: str = "",
 ) -> Optional[Dict[str, Any]]:
     """
-    Devuelve la mejor oferta para un vídeo concreto.
+    Devuelve la mejor oferta para un vídeo concreto (resultado con `final_url`
+    y `source`).
 
-    Lógica v1 (sencilla, pero funcional):
+    Misma decisión que el motor unificado (vault_engine.py), aplicada solo a
+    este vault:
 
-    1) Si hay override específico para canal + slot → usar esa oferta + URL custom.
-    2) Si no, si hay affiliate_slot:
-       - buscar oferta por default_slot == affiliate_slot
-    3) Si no, buscar oferta por topic/niche.
-    4) Filtrar por país si es posible.
+    1) Override específico para canal + slot → esa oferta + URL custom.
+    2) affiliate_slot con una sola oferta válida para el país → esa.
+    3) affiliate_slot con varias → la que mejor encaja con topic/niche dentro del slot.
+    4) Si no, por topic/niche (y guion, si ya existe) entre las válidas para el país.
+    5) Si nada puntúa, la primera oferta válida para el país.
     """
-    # 1) Overrides por canal
-    override = _find_channel_override(vault, channel_name, affiliate_slot)
-    if override:
-        offer = _find_offer_by_id(vault, str(override.get("offer_id")))
-        if offer:
-            # Ensamblar resultado combinado
-            result = dict(offer)
-            # URL final = custom_url si existe, si no base_url
-            result["final_url"] = override.get("custom_url") or offer.get("base_url")
-            result["source"] = "channel_override"
-            return result
-
-    # 2) Buscar por slot
-    if affiliate_slot:
-        offer = _find_offer_by_slot(vault, affiliate_slot)
-        if offer:
-            result = dict(offer)
-            result["final_url"] = offer.get("base_url")
-            result["source"] = "slot_match"
-            return result
-
-    # 3) Buscar por topic/niche
-    offer = _find_offer_by_topic(vault, topic, niche)
-    if offer:
-        # 3.1) Filtrar por país (si la oferta tiene restricción)
-        countries = offer.get("countries") or []
-        if countries and country_code not in countries:
-            # País no soportado → mejor no devolver oferta
-            return None
-
-        result = dict(offer)
-        result["final_url"] = offer.get("base_url")
-        result["source"] = "topic_or_niche"
-        return result
-
-    # Nada encontrado
-    return None
+    # Import aquí: vault_engine importa este módulo para cargar el vault
+    from .vault_engine import engine_for
+
+    return engine_for(vault, "media").suggest(
+        topic,
+        niche=niche,
+        country_code=country_code,
+        channel_name=channel_name,
+        affiliate_slot=affiliate_slot,
+        script=script,
+    )